@@ -0,0 +1,161 @@
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+ARMED = 'armed'
+TRIGGERED = 'triggered'
+
+TAKE_PROFIT = 'tp'
+STOP_LOSS = 'sl'
+
+
+def beyond(kind, side, price, level, margin=0.0):
+    """True if price is past the TP/SL level of a long or short position
+
+    A positive margin requires the price to be that fraction of the level
+    further past it; a negative margin accepts prices just short of it.
+    """
+    offset = level * margin
+    if (kind == TAKE_PROFIT) == (side == 'long'):
+        return price >= level + offset
+    return price <= level - offset
+
+
+class AlertState:
+    """Edge-triggered TP/SL alerts per position, persisted to disk
+
+    Every (position, tp|sl) pair is a small state machine: ARMED until the
+    market price crosses the level, which fires the alert once and moves it
+    to TRIGGERED; it re-arms only after the price is back on the other side
+    of the level by more than rearm_ratio (hysteresis against ticks around
+    the level) or when the level itself changes. close() forgets a closed
+    position. The states are written to path on every transition, so a
+    restart does not fire the alerts of levels that were already crossed.
+    """
+
+    def __init__(self, path='data/alert_state.json', rearm_ratio=0.001):
+        """
+        Args:
+            path (str): JSON file the states are kept in (None keeps them in memory only)
+            rearm_ratio (float): Fraction of the level the price must retreat before re-arming
+        """
+        self.path = path
+        self.rearm_ratio = float(rearm_ratio)
+        self._lock = threading.Lock()
+        self._states = self._load()
+        self._fired = 0
+        self._rearmed = 0
+        self._suppressed = 0
+
+    def _load(self):
+        if not self.path:
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                states = json.load(f)
+            return states if isinstance(states, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self._states, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Failed to save alert state: {str(e)}")
+
+    def evaluate(self, pos_id, kind, side, level, price):
+        """Advance the state machine of one level with the current market price
+
+        Args:
+            pos_id (str): Position key (position_stream.position_key)
+            kind (str): TAKE_PROFIT or STOP_LOSS
+            side (str): 'long' or 'short'
+            level (float): TP/SL price; 0 means the position has none
+            price (float): Current market price
+
+        Returns:
+            bool: True exactly when the alert should be sent
+        """
+        level, price = float(level), float(price)
+        if level <= 0 or price <= 0:
+            return False
+        key = f"{pos_id}|{kind}"
+        with self._lock:
+            entry = self._states.get(key)
+            if entry is None or entry['level'] != level or entry['side'] != side:
+                entry = {'state': ARMED, 'level': level, 'side': side}
+                self._states[key] = entry
+                changed = True
+            else:
+                changed = False
+
+            fire = False
+            if entry['state'] == ARMED:
+                if beyond(kind, side, price, level):
+                    entry['state'] = TRIGGERED
+                    self._fired += 1
+                    fire = changed = True
+            elif not beyond(kind, side, price, level, -self.rearm_ratio):
+                # Fiyat seviyenin diğer tarafına yeterince döndü: bir sonraki geçiş yeniden bildirilir
+                entry['state'] = ARMED
+                self._rearmed += 1
+                changed = True
+            else:
+                self._suppressed += 1
+
+            if changed:
+                self._save()
+            return fire
+
+    def close(self, pos_id):
+        """Forget the alerts of a closed position"""
+        prefix = f"{pos_id}|"
+        with self._lock:
+            keys = [key for key in self._states if key.startswith(prefix)]
+            for key in keys:
+                del self._states[key]
+            if keys:
+                self._save()
+
+    def prune(self, open_ids):
+        """Forget the alerts of positions that are no longer open (closed while the app was down)"""
+        open_ids = set(open_ids)
+        with self._lock:
+            keys = [key for key in self._states if key.rsplit('|', 1)[0] not in open_ids]
+            for key in keys:
+                del self._states[key]
+            if keys:
+                self._save()
+
+    def state(self, pos_id, kind):
+        with self._lock:
+            entry = self._states.get(f"{pos_id}|{kind}")
+            return entry['state'] if entry else None
+
+    def is_triggered(self, pos_id, kind, side, level):
+        """True if the alert of this exact level already fired and has not re-armed"""
+        with self._lock:
+            entry = self._states.get(f"{pos_id}|{kind}")
+            return entry is not None and entry['state'] == TRIGGERED \
+                and entry['level'] == float(level) and entry['side'] == side
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'tracked': len(self._states),
+                'triggered': sum(1 for entry in self._states.values() if entry['state'] == TRIGGERED),
+                'fired': self._fired,
+                'rearmed': self._rearmed,
+                'suppressed': self._suppressed
+            }
@@ -4,7 +4,6 @@ from werkzeug.security import generate_password_hash, check_password_hash
 import os
 import json
 import threading
-import asyncio
 import time
 from datetime import datetime
 import logging
@@ -13,6 +12,13 @@ from threading import Thread
 
 from models import User, Config, Position
 from bitget_handler import BitgetHandler
+from signal_queue import SignalQueue
+from symbol_executor import SymbolExecutor, TradeLimits
+from trade_ledger import TradeLedger
+from pretrade import PreTradeGatherer
+from order_warmer import OrderWarmer
+from candle_builder import CandleFeed
+from event_loop import get_loop
 
 # Setup logging
 logging.basicConfig(
@@ -67,13 +73,13 @@ def init_data_files():
                 "enable_trading": True,
                 "auto_position_switch": False
             }, f)
-    
-    if not os.path.exists('data/positions.json'):
-        with open('data/positions.json', 'w') as f:
-            json.dump([], f)
 
 init_data_files()
 
+# Trade ledger (SQLite); data/positions.json is imported once on first start
+trade_ledger = TradeLedger(os.path.join('data', 'trades.db'))
+trade_ledger.migrate_from_json('data/positions.json')
+
 # User loader function for Flask-Login
 @login_manager.user_loader
 def load_user(user_id):
@@ -84,56 +90,85 @@ def load_user(user_id):
         return User(user_id, users[user_id].get('is_admin', False))
     return None
 
-# Bitget handler instance
+# Bitget handler instance (long-lived, reconfigured in place by load_config)
 bitget_handler = None
 
+CONFIG_FILE = 'data/config.json'
+
+# Cached config snapshot, invalidated by file mtime/size or save_config()
+_config_lock = threading.Lock()
+_config_version = 0
+_config_snapshot = {'key': None, 'data': None, 'config': None}
+
+def _config_key():
+    stat = os.stat(CONFIG_FILE)
+    return (stat.st_mtime_ns, stat.st_size, _config_version)
+
 # Load configuration
 def load_config():
-    with open('data/config.json', 'r') as f:
-        config_data = json.load(f)
+    """Return the current Config, re-reading data/config.json only when it changed
     
+    The BitgetHandler singleton is created on first use; later changes are
+    applied to it in place so API clients are rebuilt only when the
+    credentials change.
+    """
     global bitget_handler
-    if config_data.get('bitget_api_key') and config_data.get('bitget_secret_key') and config_data.get('bitget_passphrase'):
-        bitget_handler = BitgetHandler(
-            config_data['bitget_api_key'],
-            config_data['bitget_secret_key'],
-            config_data['bitget_passphrase'],
-            config_data
-        )
+    key = _config_key()
+    if _config_snapshot['key'] == key:
+        return _config_snapshot['config']
     
-    return Config(**config_data)
+    with _config_lock:
+        if _config_snapshot['key'] == key:
+            return _config_snapshot['config']
+        
+        with open(CONFIG_FILE, 'r') as f:
+            config_data = json.load(f)
+        
+        if bitget_handler is None:
+            bitget_handler = BitgetHandler(
+                config_data.get('bitget_api_key', ''),
+                config_data.get('bitget_secret_key', ''),
+                config_data.get('bitget_passphrase', ''),
+                config_data
+            )
+        else:
+            bitget_handler.apply_config(config_data)
+            # Kimlik bilgileri veya warm_symbols sonradan girildiyse emir ısıtıcısını başlat
+            if bitget_handler.order_warmer is not None and bitget_handler.order_warmer.armed():
+                bitget_handler.order_warmer.start()
+        
+        config = Config(**config_data)
+        _config_snapshot.update(key=key, data=config_data, config=config)
+        logger.info("Configuration loaded from disk")
+        return config
+
+def save_config(config_data):
+    """Write data/config.json atomically and invalidate the cached snapshot"""
+    global _config_version
+    tmp_path = CONFIG_FILE + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(config_data, f)
+    with _config_lock:
+        os.replace(tmp_path, CONFIG_FILE)
+        _config_version += 1
+    return load_config()
 
 # Telegram notification function
-async def send_telegram_notification(message):
-    config = load_config()
-    if config.telegram_bot_token and config.telegram_chat_id:
-        try:
-            from telegram import Bot
-            bot = Bot(token=config.telegram_bot_token)
-            
-            # Telegram chat_id formatını düzeltme
-            chat_id = config.telegram_chat_id
-            
-            # Eğer chat_id sayısal bir değerse
-            if chat_id.isdigit():
-                # Grup ID'si için negatif değer kullanılması gerekiyor
-                # 1002... ile başlayan ID'ler grup ID'leri, bunları negatife çeviriyoruz
-                if chat_id.startswith("100"):
-                    chat_id = "-" + chat_id
-                    logger.info(f"Converting group ID to negative: {chat_id}")
-            
-            logger.info(f"Sending telegram with chat_id: {chat_id}")
-            await bot.send_message(chat_id=chat_id, text=message)
-            logger.info(f"Telegram notification sent: {message}")
-        except Exception as e:
-            logger.error(f"Failed to send Telegram notification: {str(e)}")
-            # Hata ayıklama için daha detaylı bilgi
-            import traceback
-            logger.error(f"Telegram hata detayları: {traceback.format_exc()}")
-            
-            # Kullanıcıya bilgi vermek için hata mesajı
-            logger.error(f"Telegram bilgilerinizi kontrol edin. Bot token: {config.telegram_bot_token[:5]}... ve Chat ID: {config.telegram_chat_id}")
-            logger.error("Telegram botunuzla bir kez mesajlaştığınızdan veya botu gruba eklediğinizden emin olun.")
+def send_telegram_notification(message):
+    """Queue a Telegram message on the handler's notifier (never blocks the request)"""
+    load_config()
+    bitget_handler.send_telegram_notification(message)
+
+# Exchange requests made while serving a page count as dashboard spend in the request budget
+@app.before_request
+def charge_dashboard_requests():
+    if bitget_handler:
+        bitget_handler.request_budget.set_source('dashboard')
+
+@app.teardown_request
+def reset_request_source(exception=None):
+    if bitget_handler:
+        bitget_handler.request_budget.set_source(None)
 
 # Routes
 @app.route('/')
@@ -308,14 +343,9 @@ def position_history():
             # Continue with local data in case of error
             try:
                 logger.info("Falling back to local position data")
-                with open('data/positions.json', 'r') as f:
-                    positions_data = json.load(f)
                 
-                # Filter closed positions
-                closed_positions_data = [pos for pos in positions_data if pos.get('closed', False)]
-                
-                # Sort by date, newest first
-                closed_positions_data.sort(key=lambda x: x.get('close_time', ''), reverse=True)
+                # Closed positions from the ledger, newest first
+                closed_positions_data = trade_ledger.closed_positions()
                 
                 # Calculate PnL for each position and find total
                 total_pnl = 0
@@ -381,17 +411,18 @@ def close_position():
                 
                 # Fiyat bilgisini al
                 current_price = bitget_handler.get_symbol_price(symbol)
+                close_price = f"${current_price:.2f}" if current_price > 0 else "n/a"
                 
                 # Send Telegram notification
                 message = (
                     f"🔔 {direction.upper()} position closed\n"
                     f"Symbol: {symbol}\n"
                     f"Size: {size}\n"
-                    f"Close Price: ${current_price:.2f}\n"
+                    f"Close Price: {close_price}\n"
                     f"Order ID: {order_result['data']['orderId']}\n"
                     f"Reason: {reason}"
                 )
-                asyncio.run(send_telegram_notification(message))
+                send_telegram_notification(message)
                 
                 flash(f"Successfully closed {direction.upper()} position for {symbol}", 'success')
             else:
@@ -432,17 +463,12 @@ def settings():
             "auto_position_switch": 'auto_position_switch' in request.form
         }
         
-        with open('data/config.json', 'w') as f:
-            json.dump(updated_config, f)
+        # Keep config keys that are not on the settings form
+        merged_config = dict(_config_snapshot['data'] or {})
+        merged_config.update(updated_config)
         
-        # Reinitialize Bitget handler with new settings
-        global bitget_handler
-        bitget_handler = BitgetHandler(
-            updated_config['bitget_api_key'],
-            updated_config['bitget_secret_key'],
-            updated_config['bitget_passphrase'],
-            updated_config
-        )
+        # Reconfigures the running Bitget handler; clients are rebuilt only if credentials changed
+        save_config(merged_config)
         
         flash('Settings updated successfully', 'success')
         return redirect(url_for('settings'))
@@ -498,6 +524,31 @@ def manage_users():
     
     return render_template('users.html', users=users)
 
+@app.route('/metrics')
+@login_required
+def metrics():
+    """Runtime counters of the trading system as JSON"""
+    data = {}
+    if bitget_handler:
+        data['endpoints'] = bitget_handler.endpoint_registry.stats()
+        data['price_cache'] = bitget_handler.price_cache.metrics()
+        data['leverage_cache'] = bitget_handler.leverage_cache.metrics()
+        data['candle_builder'] = bitget_handler.candle_builder.metrics()
+        data['notifier'] = bitget_handler.notifier.metrics()
+        data['alert_state'] = bitget_handler.alert_state.metrics()
+        data['trigger_index'] = bitget_handler.trigger_index.metrics()
+        data['poll_scheduler'] = bitget_handler.poll_scheduler.metrics()
+    data['signal_queue'] = signal_queue.metrics()
+    data['event_loop'] = get_loop().metrics()
+    data['trade_limits'] = trade_limits.metrics()
+    data['pretrade'] = pretrade.metrics()
+    if bitget_handler and bitget_handler.order_warmer:
+        data['order_warmer'] = bitget_handler.order_warmer.metrics()
+    if bitget_handler and bitget_handler.position_stream:
+        data['position_stream'] = dict(bitget_handler.position_stream.book.metrics(),
+                                       live=bitget_handler.position_stream.live())
+    return jsonify(data)
+
 @app.route('/webhook', methods=['POST'])
 def webhook():
     if not request.json:
@@ -591,27 +642,18 @@ def webhook():
             logger.error(f"Invalid action: {action}")
             return jsonify({"status": "error", "message": "Invalid action"}), 400
         
-        # Sinyali işle
         if not bitget_handler:
             logger.error("Bitget handler not initialized")
             return jsonify({"status": "error", "message": "Trading system not initialized"}), 500
         
-        logger.info(f"Processing signal: {symbol}/{direction}/{action}")
+        # Sinyali diske yaz ve hemen yanıt ver; işlem arka plan kuyruğunda yapılır
+        signal_id = signal_queue.enqueue(symbol, direction, action, payload=data)
         
-        # Sinyali işle - doğrudan işlem yapalım, thread kullanmayalım
-        try:
-            # Doğrudan process_signal fonksiyonunu çağır
-            process_signal(symbol, direction, action)
-            
-            return jsonify({
-                "status": "success",
-                "message": f"Signal received and processing: {symbol}/{direction}/{action}"
-            }), 200
-        except Exception as e:
-            logger.error(f"Error processing signal: {str(e)}")
-            import traceback
-            logger.error(f"Signal processing error details: {traceback.format_exc()}")
-            return jsonify({"status": "error", "message": f"Error processing signal: {str(e)}"}), 500
+        return jsonify({
+            "status": "accepted",
+            "id": signal_id,
+            "message": f"Signal queued for processing: {symbol}/{direction}/{action}"
+        }), 202
     
     except Exception as e:
         logger.error(f"Error processing webhook: {str(e)}")
@@ -619,6 +661,12 @@ def webhook():
         logger.error(f"Webhook error details: {traceback.format_exc()}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
+# Cross-symbol limits (max_open_positions, max_daily_trades) shared by all symbol actors
+trade_limits = TradeLimits()
+
+# Pre-trade reads (positions, balance, price, ATR) run concurrently under one deadline
+pretrade = PreTradeGatherer()
+
 def process_signal(symbol, direction, action):
     """Process trading signals"""
     logger.info(f"Starting to process signal: {symbol}/{direction}/{action}")
@@ -626,28 +674,50 @@ def process_signal(symbol, direction, action):
     if not bitget_handler:
         error_msg = "Bitget handler not initialized. Please configure API keys."
         logger.error(error_msg)
-        asyncio.run(send_telegram_notification(f"❌ {error_msg}"))
+        send_telegram_notification(f"❌ {error_msg}")
         return
     
+    reservation = None
     try:
         config = load_config()
         
-        # Günlük işlem limiti kontrolü
-        with open('data/positions.json', 'r') as f:
-            positions = json.load(f)
+        # Limit sayaçları bu andan sonraki açılışları "henüz görülmemiş" sayar
+        observed_at = time.monotonic()
         
+        # Günlük işlem limiti kontrolü
         today = datetime.now().strftime('%Y-%m-%d')
-        today_trades = sum(1 for pos in positions if pos.get('open_time', '').startswith(today))
+        today_trades = trade_ledger.count_opened_on(today)
         
         if action == 'open' and today_trades >= config.max_daily_trades:
             msg = f"Daily trade limit reached ({config.max_daily_trades}). Ignoring signal."
             logger.info(msg)
-            asyncio.run(send_telegram_notification(f"⚠️ {msg}"))
+            send_telegram_notification(f"⚠️ {msg}")
             return
         
         # Açık pozisyon kontrolü - API'den gerçek zamanlı veri alarak
-        logger.info("Checking open positions...")
-        current_positions = bitget_handler.get_open_positions()
+        # Açılışta pozisyonlar, bakiye, fiyat ve ATR aynı anda okunur (tek deadline)
+        snapshot = None
+        current_positions = []
+        if action == 'open':
+            # Isınmış durum (order warmer) tazeyse ağ çağrısı yapılmaz
+            if bitget_handler.order_warmer is not None:
+                snapshot = bitget_handler.order_warmer.snapshot(symbol)
+            if snapshot is not None:
+                logger.info(f"Using warm pre-trade snapshot for {symbol} ({snapshot.timings['warm_age']} ms old)")
+                observed_at = min(observed_at, snapshot.observed_at)
+            else:
+                logger.info("Taking pre-trade snapshot...")
+                snapshot = pretrade.gather(
+                    bitget_handler, symbol,
+                    atr_period=int(config.atr_period),
+                    deadline=float(bitget_handler.config.get('pretrade_deadline', pretrade.deadline))
+                )
+            if snapshot.positions is None:
+                msg = f"Could not read open positions for {symbol}: {snapshot.errors.get('positions')}. Ignoring signal."
+                logger.error(msg)
+                send_telegram_notification(f"❌ {msg}")
+                return
+            current_positions = snapshot.positions
         logger.info(f"Current positions from API: {current_positions}")
         
         # Açık pozisyonları analiz et
@@ -667,7 +737,7 @@ def process_signal(symbol, direction, action):
                         # Aynı yönde pozisyon zaten var
                         msg = f"Already have an open {direction.upper()} position for {symbol}. Ignoring signal."
                         logger.info(msg)
-                        asyncio.run(send_telegram_notification(f"⚠️ {msg}"))
+                        send_telegram_notification(f"⚠️ {msg}")
                         return
                     elif config.auto_position_switch:
                         # Ters yönde pozisyon var ve otomatik geçiş aktif
@@ -682,25 +752,36 @@ def process_signal(symbol, direction, action):
                             # Pozisyon kapatma başarılı, yeni pozisyon açılabilir
                             msg = f"Closed {pos_side.upper()} position to switch to {direction.upper()}"
                             logger.info(msg)
-                            asyncio.run(send_telegram_notification(f"🔄 {msg}"))
+                            # Kapanışla serbest kalan marjin için bakiye yeniden okunmalı
+                            snapshot.balance = None
+                            send_telegram_notification(f"🔄 {msg}")
                         else:
                             msg = f"Failed to close {pos_side.upper()} position. Cannot switch to {direction.upper()}"
                             logger.error(msg)
-                            asyncio.run(send_telegram_notification(f"❌ {msg}"))
+                            send_telegram_notification(f"❌ {msg}")
                             return
                     else:
                         # Otomatik geçiş kapalı, işlemi iptal et
                         msg = f"Have opposite position ({pos_side.upper()}) and auto-switch is disabled. Ignoring signal."
                         logger.info(msg)
-                        asyncio.run(send_telegram_notification(f"⚠️ {msg}"))
+                        send_telegram_notification(f"⚠️ {msg}")
                         return
         
-        # Yeni pozisyon açma limiti kontrolü
-        if action == 'open' and open_positions_count >= config.max_open_positions:
-            msg = f"Maximum open positions limit reached ({config.max_open_positions}). Ignoring signal."
-            logger.info(msg)
-            asyncio.run(send_telegram_notification(f"⚠️ {msg}"))
-            return
+        # Yeni pozisyon açma limiti kontrolü - diğer sembollerin o an açtığı pozisyonlar dahil
+        if action == 'open':
+            reservation, limit_hit = trade_limits.try_reserve(
+                observed_at,
+                open_positions_count, config.max_open_positions,
+                today_trades, config.max_daily_trades
+            )
+            if reservation is None:
+                if limit_hit == 'max_daily_trades':
+                    msg = f"Daily trade limit reached ({config.max_daily_trades}). Ignoring signal."
+                else:
+                    msg = f"Maximum open positions limit reached ({config.max_open_positions}). Ignoring signal."
+                logger.info(msg)
+                send_telegram_notification(f"⚠️ {msg}")
+                return
         
         # İşlemi gerçekleştir
         if action == 'open':
@@ -714,10 +795,13 @@ def process_signal(symbol, direction, action):
                 logger.warning(f"Symbol {symbol} doesn't end with USDT, this might cause issues")
             
             logger.info(f"Calling place_order with symbol={formatted_symbol}, side={side}")
-            order_result = bitget_handler.place_order(formatted_symbol, side)
+            order_started = time.perf_counter()
+            order_result = bitget_handler.place_order(formatted_symbol, side, snapshot=snapshot)
+            pretrade.record('order', time.perf_counter() - order_started)
             logger.info(f"Order result: {order_result}")
             
             if order_result and order_result.get('data', {}).get('orderId'):
+                reservation.commit()
                 order_data = order_result['data']
                 order_id = order_data['orderId']
                 
@@ -741,9 +825,7 @@ def process_signal(symbol, direction, action):
                     "closed": False
                 }
                 
-                positions.append(new_position)
-                with open('data/positions.json', 'w') as f:
-                    json.dump(positions, f)
+                trade_ledger.add_open(new_position)
                 
                 # Telegram bildirimi gönder
                 message = (
@@ -753,22 +835,17 @@ def process_signal(symbol, direction, action):
                     f"Size: {size}\n"
                     f"Order ID: {order_id}"
                 )
-                asyncio.run(send_telegram_notification(message))
+                send_telegram_notification(message)
                 logger.info(f"Successfully opened {direction} position for {symbol}")
             
         elif action == 'close':
             # Eşleşen açık pozisyonları bul
-            matching_positions = [
-                pos for pos in positions 
-                if pos['symbol'] == symbol and 
-                pos['direction'] == direction and 
-                not pos.get('closed', False)
-            ]
+            matching_positions = trade_ledger.open_positions(symbol, direction)
             
             if not matching_positions:
                 msg = f"No matching open {direction} positions found for {symbol}"
                 logger.info(msg)
-                asyncio.run(send_telegram_notification(f"⚠️ {msg}"))
+                send_telegram_notification(f"⚠️ {msg}")
                 return
             
             # Her eşleşen pozisyonu kapat
@@ -794,9 +871,8 @@ def process_signal(symbol, direction, action):
                     position['close_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                     position['exit_price'] = exit_price if float(exit_price) > 0 else avg_price
                     
-                    # Güncellenmiş pozisyonları kaydet
-                    with open('data/positions.json', 'w') as f:
-                        json.dump(positions, f)
+                    # Sadece bu pozisyonun satırını güncelle
+                    trade_ledger.close(position['id'], position['close_time'], position['exit_price'])
                     
                     # Kapatma nedeni
                     reason = "Automatic close via TradingView signal"
@@ -811,29 +887,66 @@ def process_signal(symbol, direction, action):
                         f"Order ID: {order_data['orderId']}\n"
                         f"Reason: {reason}"
                     )
-                    asyncio.run(send_telegram_notification(message))
+                    send_telegram_notification(message)
                     logger.info(f"Successfully closed {direction} position for {symbol}")
                     
     except Exception as e:
         error_msg = f"Error processing signal: {str(e)}"
         logger.error(error_msg)
-        asyncio.run(send_telegram_notification(f"❌ {error_msg}"))
+        send_telegram_notification(f"❌ {error_msg}")
+    finally:
+        # Açılamayan pozisyonun ayırdığı limit slotunu bırak
+        if reservation:
+            reservation.release()
+
+def execute_queued_signal(record):
+    """Signal queue worker entry point"""
+    with bitget_handler.request_budget.charge('webhook'):
+        process_signal(record['symbol'], record['direction'], record['action'])
 
 def start_position_monitor(bitget_handler):
     """Start position monitoring in a separate thread"""
     monitor_thread = Thread(target=bitget_handler.monitor_positions, daemon=True)
     monitor_thread.start()
 
-# Initialize BitgetHandler with config values
+# Initialize the BitgetHandler singleton with config values
 config = load_config()
-bitget_handler = BitgetHandler(
-    config.bitget_api_key,
-    config.bitget_secret_key,
-    config.bitget_passphrase,
-    config
-)
+
+# Pozisyonlar özel WebSocket kanallarından push ile güncellenir; akış kopukken monitör REST'e döner
+# (kimlik bilgileri sonradan girilir veya değişirse apply_config akışı yeniden başlatır)
+bitget_handler.start_position_stream()
+
 start_position_monitor(bitget_handler)
 
+# Balance, price, ATR, precision and leverage of the warm symbols are kept ready,
+# so an open signal only fills in a clientOid and sends one POST. The warmer only
+# runs with API credentials and configured warm_symbols (see load_config for later changes)
+bitget_handler.order_warmer = OrderWarmer(
+    bitget_handler,
+    interval=float(bitget_handler.config.get('warm_interval', 2)),
+    max_age=float(bitget_handler.config.get('warm_max_age', 5))
+)
+if bitget_handler.order_warmer.armed():
+    bitget_handler.order_warmer.start()
+
+# 15m mumları WebSocket'ten oluşturulur; ATR her mum kapanışında güncellenir, emir yolunda mum indirilmez
+if bitget_handler.config.get('candle_feed', True):
+    candle_feed = CandleFeed(
+        bitget_handler.candle_builder,
+        [symbol.replace('_UMCBL', '') for symbol in bitget_handler.order_warmer.symbols() or ['BTCUSDT']],
+        source=bitget_handler.config.get('candle_feed_source', 'candle')
+    ).start()
+
+# Webhook signals are persisted here and executed by per-symbol actors:
+# one symbol strictly in order, different symbols concurrently
+symbol_executor = SymbolExecutor(max_workers=config.signal_workers)
+signal_queue = SignalQueue(
+    os.path.join('data', 'signal_queue'),
+    execute_queued_signal,
+    symbol_executor,
+    max_age=float(config.signal_max_age)
+).start()
+
 # Add current year to all templates
 @app.context_processor
 def inject_now():
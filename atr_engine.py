@@ -0,0 +1,145 @@
+import logging
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Candle interval lengths in milliseconds
+INTERVAL_MS = {
+    '1m': 60 * 1000,
+    '3m': 3 * 60 * 1000,
+    '5m': 5 * 60 * 1000,
+    '15m': 15 * 60 * 1000,
+    '30m': 30 * 60 * 1000,
+    '1h': 60 * 60 * 1000,
+    '2h': 2 * 60 * 60 * 1000,
+    '4h': 4 * 60 * 60 * 1000,
+    '1d': 24 * 60 * 60 * 1000,
+}
+
+
+def true_range(high, low, close):
+    """Vectorized True Range
+
+    Args:
+        high, low, close (array-like): Candle series, oldest first
+
+    Returns:
+        numpy.ndarray: max(high - low, |high - prev_close|, |low - prev_close|);
+        the first bar has no previous close and uses high - low
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+
+    prev_close = np.empty_like(close)
+    prev_close[0] = np.nan
+    prev_close[1:] = close[:-1]
+
+    # fmax ignores the NaN of the first bar
+    return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+class WilderATR:
+    """Running Wilder ATR (RMA of True Range, alpha = 1 / period)
+
+    Seeded once from history; each closed candle afterwards is an O(1) update.
+    """
+
+    __slots__ = ('period', 'value', 'prev_close', 'last_close_time', 'bars')
+
+    def __init__(self, period):
+        self.period = int(period)
+        self.value = None
+        self.prev_close = None
+        self.last_close_time = 0
+        self.bars = 0
+
+    def seed(self, high, low, close, close_time):
+        """Initialise from closed candles (oldest first)"""
+        tr = true_range(high, low, close)
+        alpha = 1.0 / self.period
+        value = tr[0]
+        for x in tr[1:]:
+            value += alpha * (x - value)
+        self.value = float(value)
+        self.prev_close = float(close[-1])
+        self.last_close_time = int(close_time[-1])
+        self.bars = len(tr)
+
+    def update(self, high, low, close, close_time):
+        """Fold one closed candle into the running ATR
+
+        Returns:
+            bool: False if the candle was already applied
+        """
+        if close_time <= self.last_close_time:
+            return False
+        if self.prev_close is None:
+            tr = high - low
+        else:
+            tr = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        if self.value is None:
+            self.value = float(tr)
+        else:
+            self.value += (tr - self.value) / self.period
+        self.prev_close = float(close)
+        self.last_close_time = int(close_time)
+        self.bars += 1
+        return True
+
+
+class AtrEngine:
+    """Running ATR states keyed by (symbol, interval, period)
+
+    Candles are tuples/lists in Binance kline order:
+    (open_time, open, high, low, close, volume, close_time, ...), or records
+    of a CandleStore array. Only closed candles should be passed in.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states = {}
+
+    def get(self, symbol, interval, period):
+        """Current WilderATR state or None if never seeded"""
+        return self._states.get((symbol, interval, int(period)))
+
+    def value(self, symbol, interval, period):
+        state = self.get(symbol, interval, period)
+        return state.value if state else None
+
+    def seed(self, symbol, interval, period, candles):
+        """Seed (or re-seed) one state from closed candles, oldest first
+
+        Returns:
+            WilderATR: The seeded state
+        """
+        if len(candles) < 2:
+            raise ValueError(f"Not enough candles to seed ATR for {symbol} {interval}: {len(candles)}")
+        state = WilderATR(period)
+        if getattr(getattr(candles, 'dtype', None), 'names', None):
+            state.seed(candles['high'], candles['low'], candles['close'], candles['close_time'])
+        else:
+            data = np.asarray([row[:7] for row in candles], dtype=float)
+            state.seed(data[:, 2], data[:, 3], data[:, 4], data[:, 6])
+        with self._lock:
+            self._states[(symbol, interval, int(period))] = state
+        logger.info(f"ATR({period}) {symbol} {interval} seeded from {len(candles)} candles: {state.value}")
+        return state
+
+    def update(self, symbol, interval, candle):
+        """Apply one closed candle to every period tracked for symbol/interval
+
+        Returns:
+            int: Number of states updated
+        """
+        high, low, close, close_time = float(candle[2]), float(candle[3]), float(candle[4]), int(candle[6])
+        updated = 0
+        with self._lock:
+            for (state_symbol, state_interval, _), state in self._states.items():
+                if state_symbol == symbol and state_interval == interval:
+                    if state.update(high, low, close, close_time):
+                        updated += 1
+        return updated
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import threading
+import weakref
+
+from . import consts as c, utils
+from .client import Client, notify_request
+
+
+# aiohttp sessions are bound to their event loop; keyed weakly so closed loops go away
+_sessions = weakref.WeakKeyDictionary()
+_sessions_lock = threading.Lock()
+_session_options = {
+    'limit': c.POOL_CONNECTIONS * c.POOL_MAXSIZE,
+    'limit_per_host': c.POOL_MAXSIZE,
+    'keep_alive': c.KEEP_ALIVE,
+    'keepalive_timeout': c.KEEP_ALIVE_TIMEOUT,
+}
+
+
+def configure_async_session(limit=None, limit_per_host=None, keep_alive=None, keepalive_timeout=None):
+    """Configure the aiohttp sessions shared by every AsyncClient
+
+    Args:
+        limit (int): Maximum simultaneous connections
+        limit_per_host (int): Maximum simultaneous connections per host
+        keep_alive (bool): Reuse connections between requests
+        keepalive_timeout (float): Seconds an idle connection stays open
+
+    Only sessions created after the call use the new values.
+    """
+    requested = {
+        'limit': limit,
+        'limit_per_host': limit_per_host,
+        'keep_alive': keep_alive,
+        'keepalive_timeout': keepalive_timeout,
+    }
+    with _sessions_lock:
+        for key, value in requested.items():
+            if value is not None:
+                _session_options[key] = value
+
+
+async def get_async_session():
+    """Return the pooled aiohttp session of the running event loop
+
+    aiohttp sessions are bound to the loop that created them, so one session is
+    kept per loop and shared by every AsyncClient running on it.
+    """
+    loop = asyncio.get_running_loop()
+    with _sessions_lock:
+        session = _sessions.get(loop)
+        if session is None or session.closed:
+            import aiohttp
+
+            if _session_options['keep_alive']:
+                connector = aiohttp.TCPConnector(limit=_session_options['limit'],
+                                                 limit_per_host=_session_options['limit_per_host'],
+                                                 keepalive_timeout=_session_options['keepalive_timeout'])
+            else:
+                connector = aiohttp.TCPConnector(limit=_session_options['limit'],
+                                                 limit_per_host=_session_options['limit_per_host'],
+                                                 force_close=True)
+            session = aiohttp.ClientSession(connector=connector)
+            _sessions[loop] = session
+        return session
+
+
+async def close_async_session():
+    """Close the aiohttp session of the running event loop"""
+    loop = asyncio.get_running_loop()
+    with _sessions_lock:
+        session = _sessions.pop(loop, None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+class AsyncResponse(object):
+    """Buffered aiohttp response with the requests.Response attributes the SDK reads"""
+
+    def __init__(self, status_code, text, headers):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class AsyncClient(Client):
+    """Awaitable Client: ``_request`` is a coroutine, so every API method built on
+    ``_request_with_params`` returns an awaitable with the same signing and
+    error handling as the synchronous client."""
+
+    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, first=False):
+        Client.__init__(self, api_key, api_secret_key, passphrase, use_server_time, first)
+
+    async def _request(self, method, request_path, params, cursor=False):
+        timestamp = utils.get_timestamp()
+        if self.use_server_time:
+            timestamp = await self._get_timestamp()
+
+        url, body, header = self._sign_request(method, request_path, params, timestamp)
+
+        notify_request(method, request_path)
+        session = await get_async_session()
+        data = body if method == c.POST else None
+        async with session.request(method, url, data=data, headers=header) as resp:
+            text = await resp.text()
+            response = AsyncResponse(resp.status, text, resp.headers)
+
+        return self._parse_response(response, cursor)
+
+    async def _get_timestamp(self):
+        url = c.API_URL + c.SERVER_TIMESTAMP_URL
+        session = await get_async_session()
+        async with session.get(url) as resp:
+            if resp.status == 200:
+                return json.loads(await resp.text())['data']
+            return ""
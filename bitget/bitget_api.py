@@ -1,4 +1,5 @@
 #!/usr/bin/python
+from bitget.async_client import AsyncClient
 from bitget.client import Client
 from bitget.consts import GET, POST
 
@@ -12,3 +13,7 @@ class BitgetApi(Client):
 
     def get(self, request_path, params):
         return self._request_with_params(GET, request_path, params)
+
+
+class AsyncBitgetApi(AsyncClient, BitgetApi):
+    """Awaitable BitgetApi: every method returns a coroutine"""
@@ -1,8 +1,108 @@
 import requests
 import json
+import threading
+from requests.adapters import HTTPAdapter
 from . import consts as c, utils, exceptions
 
 
+_session = None
+_session_lock = threading.Lock()
+_session_options = {
+    'pool_connections': c.POOL_CONNECTIONS,
+    'pool_maxsize': c.POOL_MAXSIZE,
+    'pool_block': c.POOL_BLOCK,
+    'keep_alive': c.KEEP_ALIVE,
+}
+
+
+def configure_session(pool_connections=None, pool_maxsize=None, pool_block=None, keep_alive=None):
+    """Configure the HTTP session shared by every Client in this process
+
+    Args:
+        pool_connections (int): Number of per-host connection pools to keep
+        pool_maxsize (int): Maximum keep-alive connections per host
+        pool_block (bool): Wait for a free connection instead of opening extra ones
+        keep_alive (bool): Reuse connections between requests
+
+    The current session is only replaced when an option actually changes, so
+    calling this with the same values keeps the warm connections.
+    """
+    global _session
+    requested = {
+        'pool_connections': pool_connections,
+        'pool_maxsize': pool_maxsize,
+        'pool_block': pool_block,
+        'keep_alive': keep_alive,
+    }
+    with _session_lock:
+        changed = False
+        for key, value in requested.items():
+            if value is not None and _session_options[key] != value:
+                _session_options[key] = value
+                changed = True
+        if changed and _session is not None:
+            _session.close()
+            _session = None
+
+
+def get_session():
+    """Return the shared pooled HTTP session, creating it on first use"""
+    global _session
+    session = _session
+    if session is not None:
+        return session
+    with _session_lock:
+        if _session is None:
+            _session = _build_session()
+        return _session
+
+
+def close_session():
+    """Close the shared HTTP session and drop its pooled connections"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+_request_listeners = []
+
+
+def add_request_listener(listener):
+    """Call listener(method, request_path) before every REST request of every Client
+
+    Used to charge requests to a process-wide budget; listeners must be fast
+    and must not raise.
+    """
+    _request_listeners.append(listener)
+
+
+def remove_request_listener(listener):
+    if listener in _request_listeners:
+        _request_listeners.remove(listener)
+
+
+def notify_request(method, request_path):
+    for listener in _request_listeners:
+        try:
+            listener(method, request_path)
+        except Exception:
+            pass
+
+
+def _build_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=_session_options['pool_connections'],
+                          pool_maxsize=_session_options['pool_maxsize'],
+                          pool_block=_session_options['pool_block'])
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if not _session_options['keep_alive']:
+        session.headers['Connection'] = 'close'
+    return session
+
+
 class Client(object):
 
     def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, first=False):
@@ -14,11 +114,6 @@ class Client(object):
         self.first = first
 
     def _request(self, method, request_path, params, cursor=False):
-        if method == c.GET:
-            request_path = request_path + utils.parse_params_to_str(params)
-        # url
-        url = c.API_URL + request_path
-
         # 获取本地时间
         timestamp = utils.get_timestamp()
 
@@ -27,6 +122,32 @@ class Client(object):
             # 获取服务器时间接口
             timestamp = self._get_timestamp()
 
+        url, body, header = self._sign_request(method, request_path, params, timestamp)
+
+        # send request
+        notify_request(method, request_path)
+        response = None
+        session = get_session()
+        if method == c.GET:
+            response = session.get(url, headers=header)
+            print("response : ",response.text)
+        elif method == c.POST:
+            response = session.post(url, data=body, headers=header)
+            print("response : ",response.text)
+            #response = requests.post(url, json=body, headers=header)
+        elif method == c.DELETE:
+            response = session.delete(url, headers=header)
+
+        print("status:", response.status_code)
+        return self._parse_response(response, cursor)
+
+    def _sign_request(self, method, request_path, params, timestamp):
+        """Build url, body and signed headers; shared by the sync and async clients"""
+        if method == c.GET:
+            request_path = request_path + utils.parse_params_to_str(params)
+        # url
+        url = c.API_URL + request_path
+
         body = json.dumps(params) if method == c.POST else ""
         sign = utils.sign(utils.pre_hash(timestamp, method, request_path, str(body)), self.API_SECRET_KEY)
         if c.SIGN_TYPE == c.RSA:
@@ -41,22 +162,9 @@ class Client(object):
             # print("sign:", sign)
             self.first = False
 
+        return url, body, header
 
-
-
-        # send request
-        response = None
-        if method == c.GET:
-            response = requests.get(url, headers=header)
-            print("response : ",response.text)
-        elif method == c.POST:
-            response = requests.post(url, data=body, headers=header)
-            print("response : ",response.text)
-            #response = requests.post(url, json=body, headers=header)
-        elif method == c.DELETE:
-            response = requests.delete(url, headers=header)
-
-        print("status:", response.status_code)
+    def _parse_response(self, response, cursor=False):
         # exception handle
         if not str(response.status_code).startswith('2'):
             raise exceptions.BitgetAPIException(response)
@@ -84,8 +192,8 @@ class Client(object):
 
     def _get_timestamp(self):
         url = c.API_URL + c.SERVER_TIMESTAMP_URL
-        response = requests.get(url)
+        response = get_session().get(url)
         if response.status_code == 200:
-            return response.json()['timestamp']
+            return response.json()['data']
         else:
             return ""
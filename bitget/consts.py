@@ -1,5 +1,6 @@
 # Base Url
 API_URL = 'https://api.bitget.com'
+SERVER_TIMESTAMP_URL = '/api/spot/v1/public/time'
 CONTRACT_WS_URL = 'wss://ws.bitget.com/mix/v1/stream'
 
 # http header
@@ -25,3 +26,14 @@ SIGN_TYPE = SHA256
 
 # ws
 REQUEST_PATH = '/user/verify'
+
+# http connection pool
+# number of per-host connection pools kept alive
+POOL_CONNECTIONS = 4
+# maximum connections kept alive per host
+POOL_MAXSIZE = 16
+# block instead of opening extra connections once a host pool is full
+POOL_BLOCK = False
+KEEP_ALIVE = True
+# seconds an idle keep-alive connection stays open (async client)
+KEEP_ALIVE_TIMEOUT = 30
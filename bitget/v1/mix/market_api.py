@@ -1,4 +1,5 @@
 #!/usr/bin/python
+from bitget.async_client import AsyncClient
 from bitget.client import Client
 from bitget.consts import GET
 
@@ -24,3 +25,7 @@ class MarketApi(Client):
 
     def candles(self, params):
         return self._request_with_params(GET, '/api/mix/v1/market/candles', params)
+
+
+class AsyncMarketApi(AsyncClient, MarketApi):
+    """Awaitable MarketApi: every method returns a coroutine"""
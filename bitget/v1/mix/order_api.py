@@ -1,4 +1,5 @@
 #!/usr/bin/python
+from bitget.async_client import AsyncClient
 from bitget.client import Client
 from bitget.consts import GET, POST
 
@@ -57,3 +58,7 @@ class OrderApi(Client):
 
     def followerQueryHistoryOrders(self, params):
         return self._request_with_params(GET, '/api/mix/v1/trace/followerHistoryOrders', params)
+
+
+class AsyncOrderApi(AsyncClient, OrderApi):
+    """Awaitable OrderApi: every method returns a coroutine"""
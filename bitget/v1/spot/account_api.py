@@ -1,4 +1,5 @@
 #!/usr/bin/python
+from bitget.async_client import AsyncClient
 from bitget.client import Client
 from bitget.consts import GET, POST
 
@@ -18,3 +19,7 @@ class AccountApi(Client):
 
     def transferRecords(self, params):
         return self._request_with_params(GET, '/api/spot/v1/account/transferRecords', params)
+
+
+class AsyncAccountApi(AsyncClient, AccountApi):
+    """Awaitable AccountApi: every method returns a coroutine"""
@@ -1,4 +1,5 @@
 #!/usr/bin/python
+from bitget.async_client import AsyncClient
 from bitget.client import Client
 from bitget.consts import GET, POST
 
@@ -33,3 +34,7 @@ class AccountApi(Client):
 
     def allPosition(self, params):
         return self._request_with_params(GET, '/api/v2/mix/position/all-position', params)
+
+
+class AsyncAccountApi(AsyncClient, AccountApi):
+    """Awaitable AccountApi: every method returns a coroutine"""
@@ -1,4 +1,5 @@
 #!/usr/bin/python
+from bitget.async_client import AsyncClient
 from bitget.client import Client
 from bitget.consts import GET
 
@@ -21,3 +22,7 @@ class MarketApi(Client):
 
     def candles(self, params):
         return self._request_with_params(GET, '/api/v2/mix/market/candles', params)
+
+
+class AsyncMarketApi(AsyncClient, MarketApi):
+    """Awaitable MarketApi: every method returns a coroutine"""
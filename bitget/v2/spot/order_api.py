@@ -1,4 +1,5 @@
 #!/usr/bin/python
+from bitget.async_client import AsyncClient
 from bitget.client import Client
 from bitget.consts import GET, POST
 
@@ -51,3 +52,7 @@ class OrderApi(Client):
 
     def traderOrderHistoryTrack(self, params):
         return self._request_with_params(GET, '/api/v2/copy/spot-trader/order-history-track', params)
+
+
+class AsyncOrderApi(AsyncClient, OrderApi):
+    """Awaitable OrderApi: every method returns a coroutine"""
@@ -1,4 +1,5 @@
 #!/usr/bin/python
+from bitget.async_client import AsyncClient
 from bitget.client import Client
 from bitget.consts import GET, POST
 
@@ -21,3 +22,7 @@ class WalletApi(Client):
 
     def depositRecords(self, params):
         return self._request_with_params(GET, '/api/v2/spot/wallet/deposit-records', params)
+
+
+class AsyncWalletApi(AsyncClient, WalletApi):
+    """Awaitable WalletApi: every method returns a coroutine"""
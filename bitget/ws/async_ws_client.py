@@ -0,0 +1,379 @@
+#!/usr/bin/python
+import asyncio
+import json
+import logging
+import time
+
+import aiohttp
+
+from bitget.consts import GET
+from .bitget_ws_client import WS_OP_LOGIN, WS_OP_SUBSCRIBE, WS_OP_UNSUBSCRIBE, BaseWsReq, WsLoginReq, SubscribeReq, arg_key
+from .order_book import OrderBook
+from .. import consts as c, utils
+from ..async_client import get_async_session
+
+logger = logging.getLogger(__name__)
+
+DROP_OLDEST = 'drop_oldest'
+CONFLATE = 'conflate'
+OVERFLOW_POLICIES = (DROP_OLDEST, CONFLATE)
+
+
+def _encode(op, args):
+    return json.dumps(BaseWsReq(op, args), default=lambda o: o.to_dict() if hasattr(o, 'to_dict') else o.__dict__)
+
+
+async def _call(listener, message):
+    result = listener(message)
+    if asyncio.iscoroutine(result):
+        await result
+
+
+class Subscription:
+    """Bounded message queue and consumer task of one subscription
+
+    The reader task only enqueues; the consumer task runs the listener, so a
+    slow listener fills its own queue instead of stalling the socket. When the
+    queue is full, drop_oldest discards the oldest queued message and conflate
+    replaces everything queued with the latest message.
+    """
+
+    def __init__(self, req, listener, queue_size=1000, overflow=DROP_OLDEST):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}")
+        self.req = req
+        self.listener = listener
+        self.overflow = overflow
+        self.queue = asyncio.Queue(maxsize=max(1, int(queue_size)))
+        self.received = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self._task = None
+
+    def put(self, message):
+        self.received += 1
+        if self.queue.full():
+            if self.overflow == CONFLATE:
+                while not self.queue.empty():
+                    self.queue.get_nowait()
+                    self.dropped += 1
+            else:
+                self.queue.get_nowait()
+                self.dropped += 1
+        self.queue.put_nowait(message)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._consume())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _consume(self):
+        while True:
+            message = await self.queue.get()
+            try:
+                await _call(self.listener, message)
+                self.delivered += 1
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Listener of {self.req.key} failed: {str(e)}")
+
+    def metrics(self):
+        return {
+            'queued': self.queue.qsize(),
+            'received': self.received,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'overflow': self.overflow
+        }
+
+
+class AsyncBitgetWsClient:
+    """asyncio counterpart of BitgetWsClient
+
+    Same login signing, subscribe messages and books checksum handling, run on
+    the event loop: one task reads the socket, one task sends the ping every
+    ping_interval and reconnects when nothing (not even a pong) arrived for
+    two intervals, and each subscription delivers through its own bounded
+    queue (see Subscription). Reconnects back off exponentially, log in
+    again and restore every subscription.
+
+        client = AsyncBitgetWsClient(c.CONTRACT_WS_URL, need_login=True) \\
+            .api_key(key).api_secret_key(secret).passphrase(passphrase)
+        await client.start()
+        await client.subscribe([SubscribeReq('UMCBL', 'positions', 'default')], on_positions)
+    """
+
+    def __init__(self, url, need_login=False, queue_size=1000, overflow=DROP_OLDEST, ping_interval=25,
+                 batch_size=20, op_interval=0.1):
+        """
+        Args:
+            url (str): WebSocket URL
+            need_login (bool): Log in before subscribing (private channels)
+            queue_size (int): Default queue size of a subscription
+            overflow (str): Default overflow policy, 'drop_oldest' or 'conflate'
+            ping_interval (float): Seconds between pings
+            batch_size (int): Channels per subscribe/unsubscribe message
+            op_interval (float): Seconds between two subscribe/unsubscribe messages
+        """
+        utils.check_none(url, "url")
+        self.url = url
+        self.need_login = need_login
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.ping_interval = float(ping_interval)
+        self.batch_size = max(1, int(batch_size))
+        self.op_interval = float(op_interval)
+        self.__last_op = 0.0
+        self.__api_key = None
+        self.__api_secret_key = None
+        self.__passphrase = None
+        self.__listener = None
+        self.__error_listener = None
+        self.__reconnect_listener = None
+        self.__ws = None
+        self.__runner = None
+        self.__ready = None
+        self.__closed = False
+        self.__connected_once = False
+        self.__last_received = 0.0
+        self.__reconnects = 0
+        self.__subscriptions = {}
+        self.__books = {}
+
+    def api_key(self, api_key):
+        self.__api_key = api_key
+        return self
+
+    def api_secret_key(self, api_secret_key):
+        self.__api_secret_key = api_secret_key
+        return self
+
+    def passphrase(self, passphrase):
+        self.__passphrase = passphrase
+        return self
+
+    def listener(self, listener):
+        # Messages without a subscription listener (e.g. subscribe events)
+        self.__listener = listener
+        return self
+
+    def error_listener(self, error_listener):
+        self.__error_listener = error_listener
+        return self
+
+    def reconnect_listener(self, reconnect_listener):
+        # Called after a reconnection once login and resubscription are done
+        self.__reconnect_listener = reconnect_listener
+        return self
+
+    def has_connect(self):
+        return self.__ready is not None and self.__ready.is_set()
+
+    async def start(self, timeout=30):
+        """Connect (and log in) in the background and wait until the client is ready
+
+        Returns:
+            AsyncBitgetWsClient: self
+        """
+        if self.__runner is None:
+            self.__closed = False
+            self.__ready = asyncio.Event()
+            self.__runner = asyncio.create_task(self.__run())
+        await asyncio.wait_for(self.__ready.wait(), timeout)
+        return self
+
+    async def close(self):
+        self.__closed = True
+        if self.__ws is not None:
+            await self.__ws.close()
+        if self.__runner is not None:
+            self.__runner.cancel()
+            try:
+                await self.__runner
+            except asyncio.CancelledError:
+                pass
+            self.__runner = None
+        for subscription in self.__subscriptions.values():
+            if subscription is not None:
+                await subscription.stop()
+
+    async def subscribe(self, channels, listener=None, queue_size=None, overflow=None):
+        """Subscribe channels; each gets its own queue when a listener is given"""
+        for channel in channels:
+            subscription = self.__subscriptions.get(channel.key)
+            if listener and subscription is None:
+                subscription = Subscription(channel, listener,
+                                            queue_size or self.queue_size, overflow or self.overflow)
+                subscription.start()
+                self.__subscriptions[channel.key] = subscription
+            elif listener:
+                subscription.listener = listener
+            else:
+                self.__subscriptions.setdefault(channel.key, None)
+        await self.__send_batched(WS_OP_SUBSCRIBE, channels)
+
+    async def unsubscribe(self, channels):
+        for channel in channels:
+            subscription = self.__subscriptions.pop(channel.key, None)
+            if subscription is not None:
+                await subscription.stop()
+            self.__books.pop(channel.key, None)
+        await self.__send_batched(WS_OP_UNSUBSCRIBE, channels)
+
+    async def send_message(self, op, args):
+        if self.__ws is not None and not self.__ws.closed:
+            await self.__ws.send_str(_encode(op, args))
+
+    async def __send_batched(self, op, channels):
+        # Channels go out batch_size per message, op_interval apart (the exchange limits messages per second)
+        channels = list(channels)
+        for start in range(0, len(channels), self.batch_size):
+            wait = self.__last_op + self.op_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await self.send_message(op, channels[start:start + self.batch_size])
+            self.__last_op = time.monotonic()
+
+    def order_book(self, subscribe_req):
+        """Local OrderBook of a books subscription, None before its snapshot"""
+        return self.__books.get(subscribe_req.key)
+
+    async def __run(self):
+        delay = 1
+        while not self.__closed:
+            pinger = None
+            try:
+                session = await get_async_session()
+                async with session.ws_connect(self.url, autoping=True) as ws:
+                    self.__ws = ws
+                    self.__last_received = time.monotonic()
+                    delay = 1
+                    if self.need_login:
+                        await self.__send_login()
+                    else:
+                        await self.__restore()
+                    pinger = asyncio.create_task(self.__ping(ws))
+                    await self.__read(ws)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"WebSocket {self.url} failed: {str(e)}")
+            finally:
+                if pinger is not None:
+                    pinger.cancel()
+                self.__ws = None
+                self.__ready.clear()
+
+            if self.__closed:
+                break
+            self.__reconnects += 1
+            logger.warning(f"WebSocket {self.url} disconnected, reconnecting in {delay}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60)
+
+    async def __send_login(self):
+        utils.check_none(self.__api_key, "api key")
+        utils.check_none(self.__api_secret_key, "api secret key")
+        utils.check_none(self.__passphrase, "passphrase")
+        timestamp = int(round(time.time()))
+        sign = utils.sign(utils.pre_hash(timestamp, GET, c.REQUEST_PATH), self.__api_secret_key)
+        if c.SIGN_TYPE == c.RSA:
+            sign = utils.signByRSA(utils.pre_hash(timestamp, GET, c.REQUEST_PATH), self.__api_secret_key)
+        await self.send_message(WS_OP_LOGIN, [WsLoginReq(self.__api_key, self.__passphrase, str(timestamp), sign)])
+
+    async def __restore(self):
+        # Books are rebuilt from the snapshot that follows the subscribe
+        self.__books.clear()
+        if self.__subscriptions:
+            await self.__send_batched(WS_OP_SUBSCRIBE, [SubscribeReq(*key) for key in self.__subscriptions])
+        self.__ready.set()
+        if self.__connected_once and self.__reconnect_listener:
+            try:
+                result = self.__reconnect_listener()
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Reconnect listener failed: {str(e)}")
+        self.__connected_once = True
+
+    async def __ping(self, ws):
+        while not ws.closed:
+            await asyncio.sleep(self.ping_interval)
+            if time.monotonic() - self.__last_received > self.ping_interval * 2:
+                logger.warning(f"No message from {self.url} for {self.ping_interval * 2}s, reconnecting")
+                await ws.close()
+                return
+            await ws.send_str("ping")
+
+    async def __read(self, ws):
+        async for msg in ws:
+            self.__last_received = time.monotonic()
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                await self.__dispatch(msg.data)
+            elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                break
+
+    async def __dispatch(self, message):
+        if message == 'pong':
+            return
+        json_obj = json.loads(message)
+        if "code" in json_obj and json_obj.get("code") != 0:
+            if self.__error_listener:
+                await _call(self.__error_listener, json_obj)
+            return
+
+        if json_obj.get("event") == "login":
+            await self.__restore()
+            return
+
+        if "data" in json_obj and "arg" in json_obj:
+            key = arg_key(json_obj['arg'])
+            if key[1] == "books" and not await self.__check_sum(key, json_obj):
+                return
+            subscription = self.__subscriptions.get(key)
+            if subscription is not None:
+                subscription.put(json_obj)
+                return
+
+        if self.__listener:
+            await _call(self.__listener, json_obj)
+
+    async def __check_sum(self, key, json_obj):
+        action = json_obj.get('action')
+        data = json_obj['data'][0]
+        if action == "snapshot":
+            book = OrderBook()
+            book.snapshot(data['asks'], data['bids'], data.get('ts'))
+            self.__books[key] = book
+            return True
+        if action == "update":
+            book = self.__books.get(key)
+            if book is None:
+                return False
+            book.update(data['asks'], data['bids'], data.get('ts'))
+            if not book.verify(data['checksum']):
+                logger.warning(f"Checksum mismatch on {key}, resubscribing")
+                del self.__books[key]
+                req = SubscribeReq(*key)
+                await self.send_message(WS_OP_UNSUBSCRIBE, [req])
+                await self.send_message(WS_OP_SUBSCRIBE, [req])
+                return False
+        return True
+
+    def metrics(self):
+        return {
+            'connected': self.has_connect(),
+            'reconnects': self.__reconnects,
+            'subscriptions': {'/'.join(str(part) for part in key): subscription.metrics()
+                              for key, subscription in self.__subscriptions.items() if subscription is not None}
+        }
@@ -1,15 +1,14 @@
 #!/usr/bin/python
 import json
-import math
 import threading
 import time
 import traceback
 from threading import Timer
-from zlib import crc32
 
 import websocket
 
 from bitget.consts import GET
+from .order_book import OrderBook
 from .. import consts as c, utils
 
 WS_OP_LOGIN = 'login'
@@ -18,11 +17,16 @@ WS_OP_UNSUBSCRIBE = "unsubscribe"
 
 
 def handle(message):
-    print("default:" + message)
+    print("default:" + json.dumps(message))
 
 
 def handel_error(message):
-    print("default_error:" + message)
+    print("default_error:" + json.dumps(message))
+
+
+def arg_key(arg):
+    """Routing key of a message 'arg': (instType, channel, instId or coin)"""
+    return arg.get('instType'), arg.get('channel'), arg.get('instId', arg.get('coin'))
 
 
 class BitgetWsClient:
@@ -39,13 +43,16 @@ class BitgetWsClient:
         self.__all_suribe = set()
         self.__listener = handle
         self.__error_listener = handel_error
+        self.__reconnect_listener = None
         self.__url = url
         self.__scribe_map = {}
         self.__allbooks_map = {}
+        self.__closed = False
+        self.__reconnect_delay = 1
 
     def build(self):
         self.__ws_client = self.__init_client()
-        __thread = threading.Thread(target=self.connect)
+        __thread = threading.Thread(target=self.connect, daemon=True)
         __thread.start()
 
         while not self.has_connect():
@@ -79,6 +86,11 @@ class BitgetWsClient:
         self.__error_listener = error_listener
         return self
 
+    def reconnect_listener(self, reconnect_listener):
+        # Called after a reconnection once login and resubscription are done
+        self.__reconnect_listener = reconnect_listener
+        return self
+
     def has_connect(self):
         return self.__connection
 
@@ -94,6 +106,12 @@ class BitgetWsClient:
             print(ex)
 
     def __login(self):
+        self.__send_login()
+        print("logging in......")
+        while not self.__login_status:
+            time.sleep(1)
+
+    def __send_login(self):
         utils.check_none(self.__api_key, "api key")
         utils.check_none(self.__api_secret_key, "api secret key")
         utils.check_none(self.__passphrase, "passphrase")
@@ -103,15 +121,27 @@ class BitgetWsClient:
             sign = utils.signByRSA(utils.pre_hash(timestamp, GET, c.REQUEST_PATH), self.__api_secret_key)
         ws_login_req = WsLoginReq(self.__api_key, self.__passphrase, str(timestamp), sign)
         self.send_message(WS_OP_LOGIN, [ws_login_req])
-        print("logging in......")
-        while not self.__login_status:
-            time.sleep(1)
 
     def connect(self):
-        try:
-            self.__ws_client.run_forever(ping_timeout=10)
-        except Exception as ex:
-            print(ex)
+        # 重连: the same thread reconnects with exponential backoff, no recursion
+        while not self.__closed:
+            try:
+                self.__ws_client.run_forever(ping_timeout=10)
+            except Exception as ex:
+                print(ex)
+            if self.__closed:
+                break
+            self.__connection = False
+            self.__login_status = False
+            self.__reconnect_status = True
+            print("start reconnection in {}s ...".format(self.__reconnect_delay))
+            time.sleep(self.__reconnect_delay)
+            self.__reconnect_delay = min(self.__reconnect_delay * 2, 60)
+            self.__ws_client = self.__init_client()
+
+    def close(self):
+        self.__closed = True
+        self.__close()
 
     def __keep_connected(self, interval):
         try:
@@ -122,7 +152,7 @@ class BitgetWsClient:
             print(ex)
 
     def send_message(self, op, args):
-        message = json.dumps(BaseWsReq(op, args), default=lambda o: o.__dict__)
+        message = json.dumps(BaseWsReq(op, args), default=lambda o: o.to_dict() if hasattr(o, 'to_dict') else o.__dict__)
         print("send message:" + message)
         self.__ws_client.send(message)
 
@@ -131,7 +161,7 @@ class BitgetWsClient:
         if listener:
             for chanel in channels:
                 chanel.inst_type = str(chanel.inst_type)
-                self.__scribe_map[chanel] = listener
+                self.__scribe_map[chanel.key] = listener
 
         for channel in channels:
             self.__all_suribe.add(channel)
@@ -141,12 +171,10 @@ class BitgetWsClient:
     def unsubscribe(self, channels):
         try:
             for chanel in channels:
-                if chanel in self.__scribe_map:
-                    del self.__scribe_map[chanel]
+                self.__scribe_map.pop(chanel.key, None)
 
             for channel in channels:
-                if chanel in self.__all_suribe:
-                    self.__all_suribe.remove(channel)
+                self.__all_suribe.discard(channel)
 
             self.send_message(WS_OP_UNSUBSCRIBE, channels)
         except Exception as e:
@@ -155,171 +183,107 @@ class BitgetWsClient:
     def __on_open(self, ws):
         print('connection is success....')
         self.__connection = True
+        self.__reconnect_delay = 1
+        if self.__reconnect_status:
+            # Subscriptions are restored after login on private connections
+            if self.__need_login:
+                self.__send_login()
+            else:
+                self.__restore()
+
+    def __restore(self):
         self.__reconnect_status = False
+        if self.__all_suribe:
+            self.send_message(WS_OP_SUBSCRIBE, list(self.__all_suribe))
+        if self.__reconnect_listener:
+            self.__reconnect_listener()
 
     def __on_message(self, ws, message):
-
+        # Each frame is decoded once; listeners get the decoded dict
         if message == 'pong':
-            print("Keep connected:" + message)
             return
         json_obj = json.loads(message)
         if "code" in json_obj and json_obj.get("code") != 0:
             if self.__error_listener:
-                self.__error_listener(message)
+                self.__error_listener(json_obj)
                 return
 
-        if "event" in json_obj and json_obj.get("event") == "login":
+        if json_obj.get("event") == "login":
             print("login msg:" + message)
             self.__login_status = True
+            if self.__reconnect_status:
+                self.__restore()
             return
         listenner = None
-        if "data" in json_obj:
-            if not self.__check_sum(json_obj):
+        if "data" in json_obj and "arg" in json_obj:
+            key = arg_key(json_obj['arg'])
+            if key[1] == "books" and not self.__check_sum(key, json_obj):
                 return
 
-            listenner = self.get_listener(json_obj)
+            listenner = self.__scribe_map.get(key)
 
         if listenner:
-            listenner(message)
+            listenner(json_obj)
             return
 
-        self.__listener(message)
-
-    def __dict_books_info(self, dict):
-        return BooksInfo(dict['asks'], dict['bids'], dict['checksum'])
-
-    def __dict_to_subscribe_req(self, dict):
-        if "instId" in dict:
-            instId = dict['instId']
-        else:
-            instId = dict['coin']
-        return SubscribeReq(dict['instType'], dict['channel'], instId)
+        self.__listener(json_obj)
 
     def get_listener(self, json_obj):
-        try:
-            if json_obj.get('arg'):
-                json_str = str(json_obj.get('arg')).replace("\'", "\"")
-                subscribe_req = json.loads(json_str, object_hook=self.__dict_to_subscribe_req)
-                return self.__scribe_map.get(subscribe_req)
-        except Exception as e:
-            print(json_obj.get('arg'), e)
-            pass
+        arg = json_obj.get('arg')
+        return self.__scribe_map.get(arg_key(arg)) if arg else None
 
     def __on_error(self, ws, msg):
         print("error:", msg)
         self.__close()
-        if not self.__reconnect_status:
-            self.__re_connect()
 
     def __on_close(self, ws, close_status_code, close_msg):
+        # connect() reconnects once run_forever returns
         print("ws is closeing ......close_status:{},close_msg:{}".format(close_status_code, close_msg))
-        self.__close()
-        if not self.__reconnect_status:
-            self.__re_connect()
-
-    def __re_connect(self):
-        # 重连
-        self.__reconnect_status = True
-        print("start reconnection ...")
-        self.build()
-        for channel in self.__all_suribe :
-            self.subscribe([channel])
-        pass
+        self.__login_status = False
+        self.__connection = False
 
     def __close(self):
         self.__login_status = False
         self.__connection = False
         self.__ws_client.close()
 
-    def __check_sum(self, json_obj):
+    def __check_sum(self, key, json_obj):
         # noinspection PyBroadException
         try:
-            if "arg" not in json_obj or "action" not in json_obj:
-                return True
-            arg = str(json_obj.get('arg')).replace("\'", "\"")
-            action = str(json_obj.get('action')).replace("\'", "\"")
-            data = str(json_obj.get('data')).replace("\'", "\"")
-
-            subscribe_req = json.loads(arg, object_hook=self.__dict_to_subscribe_req)
-
-            if subscribe_req.channel != "books":
-                return True
-
-            books_info = json.loads(data, object_hook=self.__dict_books_info)[0]
-
+            action = json_obj.get('action')
+            data = json_obj['data'][0]
             if action == "snapshot":
-                self.__allbooks_map[subscribe_req] = books_info
+                book = OrderBook()
+                book.snapshot(data['asks'], data['bids'], data.get('ts'))
+                self.__allbooks_map[key] = book
                 return True
             if action == "update":
-                all_books = self.__allbooks_map[subscribe_req]
-                if all_books is None:
+                book = self.__allbooks_map.get(key)
+                if book is None:
                     return False
 
-                all_books = all_books.merge(books_info)
-                check_sum = all_books.check_sum(books_info.checksum)
-                if not check_sum:
-                    self.unsubscribe([subscribe_req])
-                    self.subscribe([subscribe_req])
+                book.update(data['asks'], data['bids'], data.get('ts'))
+                if not book.verify(data['checksum']):
+                    print("checksum mismatch, resubscribing {} {}".format(key[1], key[2]))
+                    self.__resync(SubscribeReq(*key))
                     return False
-                self.__allbooks_map[subscribe_req] = all_books
         except Exception as e:
             msg = traceback.format_exc()
             print(msg)
 
         return True
 
+    def __resync(self, subscribe_req):
+        # The exchange sends a fresh snapshot on subscribe; updates before it are dropped
+        self.__allbooks_map.pop(subscribe_req.key, None)
+        listener = self.__scribe_map.get(subscribe_req.key)
+        self.unsubscribe([subscribe_req])
+        self.subscribe([subscribe_req], listener)
 
-class BooksInfo:
-    def __init__(self, asks, bids, checksum):
-        self.asks = asks
-        self.bids = bids
-        self.checksum = checksum
-
-    def merge(self, book_info):
-        self.asks = self.innerMerge(self.asks, book_info.asks, False)
-        self.bids = self.innerMerge(self.bids, book_info.bids, True)
-        return self
-
-    def innerMerge(self, all_list, update_list, is_reverse):
-        price_and_value = {}
-        for v in all_list:
-            price_and_value[v[0]] = v
-
-        for v in update_list:
-            if v[1] == "0":
-                del price_and_value[v[0]]
-                continue
-            price_and_value[v[0]] = v
-
-        keys = sorted(price_and_value.keys(), reverse=is_reverse)
-
-        result = []
-
-        for i in keys:
-            result.append(price_and_value[i])
-
-        return result
-
-    def check_sum(self, new_check_sum):
-        crc32str = ''
-        for x in range(25):
-            if self.bids[x] is not None:
-                crc32str = crc32str + self.bids[x][0] + ":" + self.bids[x][1] + ":"
+    def order_book(self, subscribe_req):
+        """Local OrderBook of a books subscription, None before its snapshot"""
+        return self.__allbooks_map.get(subscribe_req.key)
 
-            if self.asks[x] is not None:
-                crc32str = crc32str + self.asks[x][0] + ":" + self.asks[x][1] + ":"
-
-        crc32str = crc32str[0:len(crc32str) - 1]
-        print(crc32str)
-        merge_num = crc32(bytes(crc32str, encoding="utf8"))
-        print("start checknum mergeVal:" + str(merge_num) + ",checkVal:" + str(new_check_sum)+",checkSin:"+str(self.__signed_int(merge_num)))
-        return self.__signed_int(merge_num) == new_check_sum
-
-    def __signed_int(self, checknum):
-        int_max = math.pow(2, 31) - 1
-        if checknum > int_max:
-            return checknum - int_max * 2 - 2
-        return checknum
 
 class SubscribeReq:
 
@@ -329,11 +293,19 @@ class SubscribeReq:
         self.inst_id = instId
         self.coin = instId
 
+    @property
+    def key(self):
+        # Same tuple as arg_key() of the pushes of this subscription
+        return self.inst_type, self.channel, self.inst_id
+
     def __eq__(self, other) -> bool:
-        return self.__dict__ == other.__dict__
+        return self.key == other.key
 
     def __hash__(self) -> int:
-        return hash(self.inst_type + self.channel + self.inst_id)
+        return hash(self.key)
+
+    def to_dict(self):
+        return {"instType": self.inst_type, "channel": self.channel, "instId": self.inst_id}
 
 
 class BaseWsReq:
@@ -350,3 +322,6 @@ class WsLoginReq:
         self.passphrase = passphrase
         self.timestamp = timestamp
         self.sign = sign
+
+    def to_dict(self):
+        return {"apiKey": self.api_key, "passphrase": self.passphrase, "timestamp": self.timestamp, "sign": self.sign}
@@ -0,0 +1,86 @@
+#!/usr/bin/python
+import operator
+from zlib import crc32
+
+from sortedcontainers import SortedDict
+
+CHECKSUM_DEPTH = 25
+
+
+class OrderBook:
+    """Incremental L2 book of one `books` subscription
+
+    Levels are keyed by numeric price in sorted dicts (bids descending, asks
+    ascending), so an update costs O(log n) per changed level instead of a
+    rebuild and re-sort of the whole side. Every level keeps the original
+    price/size strings joined as "price:size", the form the checksum is
+    computed over, so the checksum only joins the cached strings of the top
+    25 levels.
+    """
+
+    def __init__(self, checksum_depth=CHECKSUM_DEPTH):
+        self.checksum_depth = checksum_depth
+        self.bids = SortedDict(operator.neg)
+        self.asks = SortedDict()
+        self.ts = None
+
+    def snapshot(self, asks, bids, ts=None):
+        """Replace the book with a full snapshot"""
+        self.asks.clear()
+        self.bids.clear()
+        self.update(asks, bids, ts)
+
+    def update(self, asks, bids, ts=None):
+        """Apply changed levels; a level with size "0" is removed"""
+        self.__apply(self.asks, asks)
+        self.__apply(self.bids, bids)
+        if ts is not None:
+            self.ts = ts
+
+    @staticmethod
+    def __apply(side, levels):
+        for level in levels:
+            price, size = level[0], level[1]
+            if float(size) == 0:
+                side.pop(float(price), None)
+            else:
+                side[float(price)] = (price, size, price + ":" + size)
+
+    def best_bid(self):
+        """(price, size) strings of the best bid, None if the side is empty"""
+        return self.bids.peekitem(0)[1][:2] if self.bids else None
+
+    def best_ask(self):
+        """(price, size) strings of the best ask, None if the side is empty"""
+        return self.asks.peekitem(0)[1][:2] if self.asks else None
+
+    def top(self, depth=CHECKSUM_DEPTH):
+        """Best depth levels of each side as [price, size] string lists
+
+        Returns:
+            tuple: (asks, bids)
+        """
+        asks = [list(level[:2]) for level in self.asks.values()[:depth]]
+        bids = [list(level[:2]) for level in self.bids.values()[:depth]]
+        return asks, bids
+
+    def checksum(self):
+        """Signed CRC32 of the top levels: bid1:ask1:bid2:ask2..., a missing side is skipped"""
+        bids = self.bids.values()[:self.checksum_depth]
+        asks = self.asks.values()[:self.checksum_depth]
+        parts = [level[2] for pair in zip(bids, asks) for level in pair]
+        shorter = min(len(bids), len(asks))
+        parts.extend(level[2] for level in bids[shorter:] or asks[shorter:])
+        return signed_int(crc32(":".join(parts).encode("utf8")))
+
+    def verify(self, expected):
+        return self.checksum() == int(expected)
+
+    def __len__(self):
+        return len(self.bids) + len(self.asks)
+
+
+def signed_int(value):
+    """CRC32 as the signed 32-bit integer sent by the exchange"""
+    value &= 0xFFFFFFFF
+    return value - 0x100000000 if value >= 0x80000000 else value
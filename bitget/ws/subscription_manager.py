@@ -0,0 +1,216 @@
+#!/usr/bin/python
+import asyncio
+import logging
+
+from .async_ws_client import AsyncBitgetWsClient
+from .bitget_ws_client import arg_key
+
+logger = logging.getLogger(__name__)
+
+
+def _row_ts(row):
+    """Exchange timestamp (ms) of a REST snapshot row, None if it carries none"""
+    if not isinstance(row, dict):
+        return None
+    ts = row.get('ts', row.get('timestamp'))
+    try:
+        return int(ts) if ts is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class _Feed:
+    """Listener and gap tracking state of one channel"""
+
+    __slots__ = ('req', 'listener', 'shard', 'last_seq', 'last_ts', 'gaps', 'fills', 'stale', 'filling')
+
+    def __init__(self, req, listener, shard):
+        self.req = req
+        self.listener = listener
+        self.shard = shard
+        self.last_seq = None
+        self.last_ts = None
+        self.gaps = 0
+        self.fills = 0
+        self.stale = 0
+        self.filling = False
+
+
+class SubscriptionManager:
+    """Spreads subscriptions over several AsyncBitgetWsClient connections
+
+    Channels fill the first connection with room (max_channels per
+    connection); a new connection is opened when all are full and closed when
+    its last channel is unsubscribed. Each connection batches its
+    subscribe/unsubscribe messages and reconnects with backoff on its own.
+
+    Every push is checked for a gap before it reaches the listener: a 'seq'
+    that does not follow the previous one, or a 'ts' further than
+    max_ts_gap[channel] ms from the previous push. Pushes dropped by a full
+    queue show up as gaps too. On a gap, and for every channel of a
+    connection that reconnected, the snapshot fetcher of the channel (a
+    blocking REST call run in a worker thread) is called with the instId and
+    its result is delivered to the listener as an 'action': 'snapshot'
+    message with 'source': 'rest'. Pushes keep arriving while the fetcher
+    runs, so snapshot rows whose 'ts'/'timestamp' is older than the last push
+    already delivered for the channel are dropped.
+    """
+
+    def __init__(self, url, max_channels=50, need_login=False, credentials=None,
+                 snapshot_fetchers=None, max_ts_gap=None, **client_options):
+        """
+        Args:
+            url (str): WebSocket URL
+            max_channels (int): Channels per connection
+            need_login (bool): Log every connection in (private channels)
+            credentials (tuple, optional): (api_key, secret_key, passphrase)
+            snapshot_fetchers (dict, optional): channel -> callable(inst_id) returning REST data
+            max_ts_gap (dict, optional): channel -> largest ms between two pushes before it is a gap
+            **client_options: Passed to every AsyncBitgetWsClient (queue_size, overflow, batch_size...)
+        """
+        self.url = url
+        self.max_channels = max(1, int(max_channels))
+        self.need_login = need_login
+        self.credentials = credentials
+        self.snapshot_fetchers = snapshot_fetchers or {}
+        self.max_ts_gap = max_ts_gap or {}
+        self.client_options = client_options
+        self._shards = {}  # client -> keys of its channels
+        self._feeds = {}
+        self._lock = asyncio.Lock()
+
+    def _new_client(self):
+        client = AsyncBitgetWsClient(self.url, need_login=self.need_login, **self.client_options)
+        if self.credentials:
+            api_key, secret_key, passphrase = self.credentials
+            client.api_key(api_key).api_secret_key(secret_key).passphrase(passphrase)
+        client.reconnect_listener(lambda: self._on_reconnect(client))
+        return client
+
+    async def subscribe(self, channels, listener):
+        """Subscribe channels, opening connections as needed"""
+        async with self._lock:
+            groups = {}
+            for channel in channels:
+                if channel.key in self._feeds:
+                    self._feeds[channel.key].listener = listener
+                    continue
+                client = next((shard for shard, keys in self._shards.items()
+                               if len(keys) < self.max_channels), None)
+                if client is None:
+                    client = self._new_client()
+                    await client.start()
+                    self._shards[client] = set()
+                self._shards[client].add(channel.key)
+                self._feeds[channel.key] = _Feed(channel, listener, client)
+                groups.setdefault(client, []).append(channel)
+
+            for client, group in groups.items():
+                await client.subscribe(group, self._deliver)
+
+    async def unsubscribe(self, channels):
+        """Unsubscribe channels and close connections left without any"""
+        async with self._lock:
+            groups = {}
+            for channel in channels:
+                feed = self._feeds.pop(channel.key, None)
+                if feed is not None:
+                    self._shards[feed.shard].discard(channel.key)
+                    groups.setdefault(feed.shard, []).append(channel)
+
+            for client, group in groups.items():
+                await client.unsubscribe(group)
+                if not self._shards[client]:
+                    await client.close()
+                    del self._shards[client]
+
+    async def close(self):
+        async with self._lock:
+            for client in self._shards:
+                await client.close()
+            self._shards = {}
+            self._feeds = {}
+
+    async def _deliver(self, message):
+        feed = self._feeds.get(arg_key(message['arg']))
+        if feed is None:
+            return
+        if self._is_gap(feed, message):
+            feed.gaps += 1
+            logger.warning(f"Gap on {feed.req.key}, filling from REST")
+            self._schedule_fill(feed)
+        result = feed.listener(message)
+        if asyncio.iscoroutine(result):
+            await result
+
+    def _is_gap(self, feed, message):
+        data = message.get('data') or [{}]
+        last = data[-1] if isinstance(data[-1], dict) else {}
+        seq = last.get('seq', message.get('seq'))
+        ts = last.get('ts', message.get('ts'))
+        gap = False
+
+        if seq is not None:
+            first = data[0].get('seq', seq) if isinstance(data[0], dict) else seq
+            if feed.last_seq is not None and int(first) != feed.last_seq + 1 and message.get('action') != 'snapshot':
+                gap = True
+            feed.last_seq = int(seq)
+        if ts is not None:
+            limit = self.max_ts_gap.get(feed.req.channel)
+            if limit and feed.last_ts is not None and int(ts) - feed.last_ts > limit:
+                gap = True
+            feed.last_ts = int(ts)
+        return gap
+
+    def _schedule_fill(self, feed):
+        if feed.filling or feed.req.channel not in self.snapshot_fetchers:
+            return
+        feed.filling = True
+        asyncio.get_running_loop().create_task(self._fill(feed))
+
+    async def _fill(self, feed):
+        try:
+            fetcher = self.snapshot_fetchers[feed.req.channel]
+            data = await asyncio.to_thread(fetcher, feed.req.inst_id)
+            if data is None:
+                return
+            rows = data if isinstance(data, list) else [data]
+            if feed.last_ts is not None:
+                # REST çağrısı sürerken gelen push'lar snapshot'tan yeni olabilir; eski satırlar onları ezmesin
+                fresh = [row for row in rows if _row_ts(row) is None or _row_ts(row) >= feed.last_ts]
+                feed.stale += len(rows) - len(fresh)
+                rows = fresh
+                if not rows:
+                    logger.info(f"REST snapshot of {feed.req.key} is older than the last push, dropped")
+                    return
+            message = {
+                'action': 'snapshot',
+                'arg': feed.req.to_dict(),
+                'data': rows,
+                'source': 'rest'
+            }
+            feed.last_seq = None
+            feed.fills += 1
+            result = feed.listener(message)
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            logger.error(f"REST snapshot of {feed.req.key} failed: {str(e)}")
+        finally:
+            feed.filling = False
+
+    def _on_reconnect(self, client):
+        # Pushes sent while the connection was down are lost
+        for key in self._shards.get(client, ()):
+            self._schedule_fill(self._feeds[key])
+
+    def metrics(self):
+        return {
+            'connections': len(self._shards),
+            'channels': len(self._feeds),
+            'channels_per_connection': [len(keys) for keys in self._shards.values()],
+            'reconnects': sum(client.metrics()['reconnects'] for client in self._shards),
+            'gaps': sum(feed.gaps for feed in self._feeds.values()),
+            'fills': sum(feed.fills for feed in self._feeds.values()),
+            'stale_rows': sum(feed.stale for feed in self._feeds.values())
+        }
@@ -3,12 +3,23 @@ import bitget.v1.mix.account_api as account_api
 import bitget.v1.mix.market_api as market_api
 from bitget.exceptions import BitgetAPIException
 from bitget.bitget_api import BitgetApi
+from bitget.client import add_request_listener, remove_request_listener, configure_session
+from endpoint_registry import EndpointRegistry
+from atr_engine import AtrEngine, INTERVAL_MS
+from candle_store import CandleStore, fetch_bitget_candles
+from candle_builder import CandleBuilder
+from price_cache import PriceCache
+from leverage_cache import LeverageCache
+from contract_registry import ContractRegistry
+from position_stream import PositionStream, position_key
+from notifier import TelegramNotifier
+from alert_state import AlertState, TAKE_PROFIT
+from trigger_index import TriggerIndex
+from poll_scheduler import PollScheduler, RequestBudget
 import logging
+import os
 import time
 from datetime import datetime
-import asyncio
-import requests
-import pandas as pd
 
 logger = logging.getLogger(__name__)
 
@@ -37,17 +48,176 @@ class BitgetHandler:
         # Config değerlerini logla
         logger.info(f"Initialized with config: leverage={self.config.get('leverage', 'not set')}, order_size_percentage={self.config.get('order_size_percentage', 'not set')}")
         
+        # All API clients below share one pooled keep-alive HTTP session
+        self._configure_session()
+        
         # Initialize API clients
-        self.order_api = order_api.OrderApi(api_key, secret_key, passphrase)
-        self.account_api = account_api.AccountApi(api_key, secret_key, passphrase)
-        self.market_api = market_api.MarketApi(api_key, secret_key, passphrase)
-        self.base_api = BitgetApi(api_key, secret_key, passphrase)
+        self._init_api_clients()
+        
+        # Running Wilder ATR per (symbol, interval, period); market data, kept across credential changes
+        self.atr_engine = AtrEngine()
+        
+        # Closed OHLCV candles on disk; only candles newer than the stored ones are downloaded.
+        # History comes from Bitget futures like the live bars of the candle feed, kept apart
+        # from older Binance spot files in the same directory
+        self.candle_store = CandleStore(
+            os.path.join(self.config.get('candle_store_dir', 'data/candles'), 'bitget-umcbl'),
+            fetcher=lambda symbol, interval, start_time=None, limit=1000:
+                fetch_bitget_candles(self.market_api, symbol, interval, start_time, limit)
+        )
+        
+        # Bars built from WebSocket candle/trade pushes (fed by CandleFeed, see candle_builder.py);
+        # each closed bar is stored and folded into the running ATR as it closes
+        self.candle_builder = CandleBuilder(
+            self.atr_engine, self.candle_store,
+            close_delay_ms=int(self.config.get('candle_close_delay_ms', 2000))
+        )
+        
+        # TP/SL alert states of open positions (fire once per crossing, kept across restarts)
+        self.alert_state = AlertState(
+            self.config.get('alert_state_path', 'data/alert_state.json'),
+            rearm_ratio=float(self.config.get('alert_rearm_ratio', 0.001))
+        )
+        # TP/SL levels sorted per symbol so a price update only evaluates the crossed ones
+        self.trigger_index = TriggerIndex(self.alert_state)
+        
+        # REST requests of every path (monitor, dashboard, webhook) are charged to one budget;
+        # the monitor's poll interval follows position risk, errors and that budget
+        self.request_budget = RequestBudget(
+            rate=float(self.config.get('request_budget_rate', 10)),
+            burst=int(self.config.get('request_budget_burst', 20))
+        )
+        # Dinleyici süreç genelinde kayıtlı; handler bırakılırken close() ile kaldırılır
+        add_request_listener(self._on_request)
+        self.poll_scheduler = PollScheduler(
+            self.request_budget,
+            fast_interval=float(self.config.get('monitor_fast_interval', 1)),
+            normal_interval=float(self.config.get('monitor_interval', 5)),
+            idle_interval=float(self.config.get('monitor_idle_interval', 30)),
+            max_backoff=float(self.config.get('monitor_max_backoff', 120)),
+            near_atr=float(self.config.get('monitor_near_atr', 1))
+        )
+        
+        # Telegram messages go through one queued worker with a persistent bot (see notifier.py);
+        # credentials are read from the current config before every send
+        self.notifier = TelegramNotifier(
+            lambda: (self.config.get('telegram_bot_token'), self.config.get('telegram_chat_id')),
+            max_queue=int(self.config.get('telegram_max_queue', 1000))
+        )
+        
+        # Tick size, size step and minimum size per contract (cached in data/contracts.json)
+        self.contract_registry = ContractRegistry(
+            lambda: self.market_api.contracts({'productType': 'umcbl'}),
+            cache_path=self.config.get('contracts_cache_path', 'data/contracts.json'),
+            refresh_interval=float(self.config.get('contracts_refresh_interval', 3600)),
+            failure_ttl=float(self.config.get('contracts_failure_ttl', 30))
+        )
+        
+        # Last prices of every symbol from one bulk tickers call
+        self.price_cache = PriceCache(
+            lambda: self.market_api.tickers({'productType': 'umcbl'}),
+            fetch_ticker=lambda symbol: self.market_api.ticker({'symbol': symbol}),
+            max_age=float(self.config.get('price_max_age', 5)),
+            retry_after=float(self.config.get('price_retry_after', 1))
+        )
+        
+        # Prebuilt order templates of the warm symbols (set by the app, see order_warmer.py)
+        self.order_warmer = None
+        
+        # Push-driven position book from the private WebSocket (started by the app and on
+        # credential changes, see start_position_stream)
+        self.position_stream = None
         
         # Store last known position states
         self.last_position_states = {}
         
         logger.info("Bitget handler initialized")
     
+    def _configure_session(self):
+        configure_session(
+            pool_connections=self.config.get('http_pool_connections'),
+            pool_maxsize=self.config.get('http_pool_maxsize'),
+            pool_block=self.config.get('http_pool_block'),
+            keep_alive=self.config.get('http_keep_alive')
+        )
+    
+    def _init_api_clients(self):
+        self.order_api = order_api.OrderApi(self.api_key, self.secret_key, self.passphrase)
+        self.account_api = account_api.AccountApi(self.api_key, self.secret_key, self.passphrase)
+        self.market_api = market_api.MarketApi(self.api_key, self.secret_key, self.passphrase)
+        self.base_api = BitgetApi(self.api_key, self.secret_key, self.passphrase)
+        
+        # Known exchange leverage per (symbol, holdSide, marginMode) of this account
+        self.leverage_cache = LeverageCache(
+            lambda symbol: self.account_api.account({'symbol': symbol, 'marginCoin': 'USDT'}),
+            lambda symbol, hold_side, leverage: self.base_api.post("/api/mix/v1/account/setLeverage", {
+                "symbol": symbol,
+                "marginCoin": "USDT",
+                "leverage": str(leverage),
+                "holdSide": hold_side
+            })
+        )
+        
+        # Remembers which position/balance endpoints work for this account
+        self.endpoint_registry = EndpointRegistry(
+            negative_ttl=float(self.config.get('endpoint_negative_ttl', 600))
+        )
+    
+    def apply_config(self, config):
+        """Apply a changed configuration to the running handler
+        
+        API clients and account-specific state are rebuilt only when the
+        credentials change; any other change keeps the warmed-up state
+        (position states, endpoint registry, HTTP connections).
+        
+        Args:
+            config (dict): Configuration dictionary
+            
+        Returns:
+            bool: True if the API credentials changed
+        """
+        if hasattr(config, '__dict__'):
+            config = config.__dict__
+        
+        credentials = (
+            config.get('bitget_api_key', ''),
+            config.get('bitget_secret_key', ''),
+            config.get('bitget_passphrase', '')
+        )
+        credentials_changed = credentials != (self.api_key, self.secret_key, self.passphrase)
+        
+        self.config = config
+        self._configure_session()
+        self.price_cache.max_age = float(config.get('price_max_age', 5))
+        
+        if credentials_changed:
+            logger.info("Bitget credentials changed, rebuilding API clients")
+            self.api_key, self.secret_key, self.passphrase = credentials
+            self._init_api_clients()
+            self.last_position_states = {}
+            # Özel WebSocket akışı eski hesapla oturum açmıştı; yeni kimlik bilgileriyle yeniden başlat
+            self.start_position_stream()
+        else:
+            self.endpoint_registry.negative_ttl = float(config.get('endpoint_negative_ttl', 600))
+            logger.info("Configuration updated, keeping existing API clients and position states")
+        
+        return credentials_changed
+    
+    def start_position_stream(self):
+        """Start the private position stream, stopping the one already running
+        
+        Returns:
+            PositionStream: The new stream, or None without credentials or with
+                position_stream disabled (the monitor then polls REST)
+        """
+        if self.position_stream is not None:
+            self.position_stream.stop()
+            self.position_stream = None
+        if self.api_key and self.config.get('position_stream', True):
+            self.position_stream = PositionStream(self).start()
+            logger.info("Position stream started")
+        return self.position_stream
+    
     def get_account_balance(self, coin='USDT'):
         """Get account balance and details for specified coin
         
@@ -59,41 +229,43 @@ class BitgetHandler:
         """
         try:
             # Try to get account details using different endpoints
-            try:
-                # First try the account details endpoint
-                params = {
-                    "symbol": "BTCUSDT_UMCBL",
-                    "marginCoin": "USDT"
+            endpoints = [
+                {
+                    # First try the account details endpoint
+                    "path": "/api/mix/v1/account/account",
+                    "params": {"symbol": "BTCUSDT_UMCBL", "marginCoin": "USDT"}
+                },
+                {
+                    # If first attempt fails, try the simpler balance endpoint
+                    "path": "/api/mix/v1/account/accounts",
+                    "params": {"productType": "umcbl", "marginCoin": "USDT"}
                 }
-                response = self.base_api.get("/api/mix/v1/account/account", params)
-                logger.info(f"Account API response: {response}")
-                
-                if response and 'data' in response:
-                    data = response['data']
-                    available = float(data.get('available', '0'))
-                    equity = float(data.get('equity', '0'))
-                    unrealized_pnl = float(data.get('unrealizedPL', '0'))
-                    logger.info(f"Account details - Available: {available}, Equity: {equity}, Unrealized PnL: {unrealized_pnl}")
-                    return available, equity, unrealized_pnl
-            except Exception as e:
-                logger.error(f"Error getting account details: {str(e)}")
+            ]
             
-            # If first attempt fails, try the simpler balance endpoint
-            try:
-                params = {"productType": "umcbl", "marginCoin": "USDT"}
-                response = self.base_api.get("/api/mix/v1/account/accounts", params)
-                logger.info(f"Balance API response: {response}")
+            for endpoint in self.endpoint_registry.plan('balance', endpoints):
+                try:
+                    response = self.base_api.get(endpoint['path'], endpoint['params'])
+                    logger.info(f"Balance API response from {endpoint['path']}: {response}")
+                except Exception as e:
+                    self.endpoint_registry.record_failure('balance', endpoint['path'], e)
+                    logger.error(f"Error getting account balance from {endpoint['path']}: {str(e)}")
+                    continue
                 
-                if response and 'data' in response:
-                    for account in response['data']:
-                        if account.get('marginCoin') == coin:
-                            available = float(account.get('available', '0'))
-                            equity = float(account.get('equity', '0'))
-                            unrealized_pnl = float(account.get('unrealizedPL', '0'))
-                            logger.info(f"Account details - Available: {available}, Equity: {equity}, Unrealized PnL: {unrealized_pnl}")
-                            return available, equity, unrealized_pnl
-            except Exception as e:
-                logger.error(f"Error getting account balance: {str(e)}")
+                if not response or 'data' not in response:
+                    continue
+                
+                accounts = response['data']
+                if not isinstance(accounts, list):
+                    accounts = [accounts]
+                
+                for account in accounts:
+                    if account and account.get('marginCoin', coin) == coin:
+                        self.endpoint_registry.record_success('balance', endpoint['path'])
+                        available = float(account.get('available', '0'))
+                        equity = float(account.get('equity', '0'))
+                        unrealized_pnl = float(account.get('unrealizedPL', '0'))
+                        logger.info(f"Account details - Available: {available}, Equity: {equity}, Unrealized PnL: {unrealized_pnl}")
+                        return available, equity, unrealized_pnl
             
             # If both attempts fail, return zeros
             logger.warning("Could not get account details, returning zeros")
@@ -105,6 +277,23 @@ class BitgetHandler:
             logger.error(f"Traceback: {traceback.format_exc()}")
             return 0.0, 0.0, 0.0
     
+    def quote(self, symbol):
+        """Get the cached price of a symbol together with its age
+        
+        Args:
+            symbol (str): Trading pair symbol (e.g. 'BTCUSDT')
+            
+        Returns:
+            tuple: (price, age in seconds), or (None, None) if no price is available
+        """
+        # Format symbol to Bitget format if needed
+        if not symbol.endswith('_UMCBL'):
+            formatted_symbol = f"{symbol}_UMCBL"
+        else:
+            formatted_symbol = symbol
+        
+        return self.price_cache.quote(formatted_symbol)
+    
     def get_symbol_price(self, symbol):
         """Get current price for the symbol
         
@@ -112,57 +301,179 @@ class BitgetHandler:
             symbol (str): Trading pair symbol (e.g. 'BTCUSDT')
             
         Returns:
-            float: Current price
+            float: Current price, or 0.0 if no price younger than price_max_age is available
         """
         try:
-            # Format symbol to Bitget format if needed
-            if not symbol.endswith('_UMCBL'):
-                formatted_symbol = f"{symbol}_UMCBL"
-            else:
-                formatted_symbol = symbol
+            price, age = self.quote(symbol)
+            if price is None:
+                logger.error(f"No price available for {symbol}")
+                return 0.0
+            
+            max_age = self.price_cache.max_age
+            if age > max_age:
+                logger.error(f"Price for {symbol} is stale: {price} ({age:.1f}s old, limit {max_age}s)")
+                return 0.0
+            
+            logger.info(f"Current price for {symbol}: {price} ({age:.2f}s old)")
+            return price
+        except Exception as e:
+            logger.error(f"Failed to get symbol price: {str(e)}")
+            return 0.0
+    
+    def _configured_leverage(self):
+        leverage = self.config.get('leverage', 5)
+        if not isinstance(leverage, (int, float)):
+            try:
+                leverage = int(float(leverage))
+            except (TypeError, ValueError):
+                logger.warning(f"Invalid leverage value: {leverage}, using default 5x")
+                leverage = 5
+        return leverage
+    
+    def ensure_leverage(self, formatted_symbol, side):
+        """Set the configured leverage for an open order if the exchange has another one
+        
+        Args:
+            formatted_symbol (str): Bitget symbol (e.g. 'BTCUSDT_UMCBL')
+            side (str): open_long or open_short
+        """
+        # Kaldıraç sadece açılış emirlerinde gerekir; borsadaki değer zaten doğruysa istek atılmaz
+        try:
+            self.leverage_cache.ensure(formatted_symbol, side.replace("open_", ""), self._configured_leverage())
+        except Exception as le:
+            self.leverage_cache.invalidate(formatted_symbol)
+            logger.warning(f"Error setting leverage: {str(le)}")
+            logger.warning(f"Continuing without setting leverage. Will use the existing leverage setting.")
+    
+    def build_order_params(self, formatted_symbol, side, balance=None, price=None, atr=None, size=None,
+                           ensure_leverage=True):
+        """Build placeOrder parameters (without clientOid)
+        
+        Sizing, contract precision, leverage and ATR based TP/SL are resolved
+        here; no market or account data is fetched, so the same parameters can be
+        prebuilt by the order warmer or built right before sending.
+        
+        Args:
+            formatted_symbol (str): Bitget symbol (e.g. 'BTCUSDT_UMCBL')
+            side (str): Order side (open_long, open_short, close_long, close_short)
+            balance (float, optional): Available USDT, used when size is not given
+            price (float, optional): Current price, used for sizing and TP/SL
+            atr (float, optional): ATR for TP/SL of open orders
+            size (str, optional): Explicit order size (e.g. to close a position)
+            ensure_leverage (bool): Set the leverage of open orders now; False when
+                prebuilding, the order path then calls ensure_leverage() before sending
+            
+        Returns:
+            dict: placeOrder parameters
             
-            logger.info(f"Getting price for formatted symbol: {formatted_symbol}")
+        Raises:
+            ValueError: If no valid order can be built
+        """
+        leverage = self._configured_leverage()
+        
+        if size is None:
+            if not isinstance(balance, (int, float)) or balance <= 0:
+                # Bakiye okunamadıysa (0 veya yok) emir boyutu hesaplanamaz
+                raise ValueError(f"No available balance to size an order for {formatted_symbol}: {balance}")
+            
+            order_size_percentage = self.config.get('order_size_percentage', 10)
+            if not isinstance(order_size_percentage, (int, float)):
+                try:
+                    order_size_percentage = float(order_size_percentage)
+                except (TypeError, ValueError):
+                    logger.warning(f"Invalid order_size_percentage value: {order_size_percentage}, using default 10%")
+                    order_size_percentage = 10.0
             
-            # Doğru parametre formatı: dict olmalı, string değil
-            params = {"symbol": formatted_symbol}
+            # Calculate exact order amount (this is what user wants to trade)
+            order_amount = balance * (order_size_percentage / 100)
+            logger.info(f"Order calculation:")
+            logger.info(f"Balance: ${balance} USDT")
+            logger.info(f"Order Size: {order_size_percentage}%")
+            logger.info(f"Order Amount: ${order_amount} USDT")
             
+            if not price or price <= 0:
+                # Bilinmeyen/eski fiyatla emir boyutu hesaplanamaz
+                raise ValueError(f"No fresh price available for {formatted_symbol}")
+            
+            # Apply leverage to order amount
+            leveraged_amount = order_amount * leverage
+            logger.info(f"Leveraged amount (with {leverage}x): ${leveraged_amount} USDT")
+            
+            # Calculate size in BTC (or other coin) with leveraged amount
+            size = leveraged_amount / price
+            logger.info(f"Final size for {formatted_symbol}: {size} (${leveraged_amount} USDT with {leverage}x leverage)")
+        
+        # Miktarı kontratın adımına ve minimumuna göre ayarla (emir ilk gönderimde geçerli olsun)
+        spec = self.contract_registry.get(formatted_symbol)
+        if spec:
+            order_size = spec.quantize_size(size)
+            if order_size == '0':
+                raise ValueError(f"Order size {size} is below the minimum trade size {spec.min_size} for {formatted_symbol}")
+            size = order_size
+        else:
+            logger.warning(f"No contract spec for {formatted_symbol}, sending size unquantized")
+        
+        if side.startswith("open_") and ensure_leverage:
+            self.ensure_leverage(formatted_symbol, side)
+        
+        # Ana emir parametreleri
+        params = {
+            "symbol": formatted_symbol,
+            "marginCoin": "USDT",
+            "size": str(size),
+            "orderType": "market",  # Market emri
+            "timeInForceValue": "normal",  # Normal zaman aşımı
+            "reduceOnly": False,  # Sadece azaltma değil
+            "postOnly": False,  # Sadece maker değil
+            "triggerPrice": "",  # Tetikleme fiyatı (boş)
+            "triggerType": "market_price"  # Piyasa fiyatı tetikleme
+        }
+        
+        # Add side parameter based on the action
+        if side == "open_long":
+            params["side"] = "open_long"
+        elif side == "open_short":
+            params["side"] = "open_short"
+        elif side == "close_long":
+            params["side"] = "close_long"
+        elif side == "close_short":
+            params["side"] = "close_short"
+        
+        # TP/SL değerlerini ana emirde ekle (sadece pozisyon açma emirleri için)
+        if side.startswith("open_"):
             try:
-                # Ticker metodunu kullanalım
-                response = self.market_api.ticker(params)
-                logger.debug(f"Ticker response: {response}")
+                atr_tp_multiplier = float(self.config.get('atr_tp_multiplier', 2.5))
+                atr_sl_multiplier = float(self.config.get('atr_sl_multiplier', 3.0))
+                if side == "open_long":
+                    tp_price = price + (atr * atr_tp_multiplier)
+                    sl_price = price - (atr * atr_sl_multiplier)
+                else:  # open_short
+                    tp_price = price - (atr * atr_tp_multiplier)
+                    sl_price = price + (atr * atr_sl_multiplier)
                 
-                if response and 'data' in response:
-                    price = float(response['data'].get('last', 0))
-                    logger.info(f"Current price for {formatted_symbol}: {price}")
-                    return price
+                # Fiyatları kontratın fiyat adımına yuvarla
+                if spec:
+                    tp_price = spec.quantize_price(tp_price)
+                    sl_price = spec.quantize_price(sl_price)
                 else:
-                    # Fiyat alınamadıysa, alternatif bir endpoint deneyelim
-                    try:
-                        logger.info(f"Trying alternative endpoint for price")
-                        alt_params = {"symbol": formatted_symbol}
-                        alt_response = self.base_api.get("/api/mix/v1/market/ticker", alt_params)
-                        logger.debug(f"Alternative ticker response: {alt_response}")
-                        
-                        if alt_response and 'data' in alt_response:
-                            price = float(alt_response['data'].get('last', 0))
-                            logger.info(f"Alternative price for {formatted_symbol}: {price}")
-                            return price
-                    except Exception as alt_e:
-                        logger.error(f"Alternative price endpoint failed: {str(alt_e)}")
-                    
-                    # Yine başarısız olursa sabit değer kullan
-                    logger.warning(f"Using fixed price for {formatted_symbol}: 45000")
-                    return 45000.0
+                    tp_price = round(tp_price * 10) / 10
+                    sl_price = round(sl_price * 10) / 10
+                
+                logger.info(f"ATR tabanlı TP/SL: TP={tp_price}, SL={sl_price}, ATR={atr}")
+                
+                # Bitget API'sine uygun TP/SL parametreleri
+                params["presetTakeProfitPrice"] = str(tp_price)
+                params["presetStopLossPrice"] = str(sl_price)
+                
+                logger.info(f"TP/SL parametreleri eklendi: {params}")
             except Exception as e:
-                logger.error(f"Failed to get ticker: {str(e)}")
-                logger.warning(f"Using fixed price for {symbol}: 45000")
-                return 45000.0  # Test için sabit bir değer
-        except Exception as e:
-            logger.error(f"Failed to get symbol price: {str(e)}")
-            logger.warning(f"Using fixed price for {symbol}: 45000")
-            return 45000.0  # Test için sabit bir değer
+                logger.error(f"ATR tabanlı TP/SL hesaplanamadı: {str(e)}")
+                import traceback
+                logger.error(f"TP/SL hata detayları: {traceback.format_exc()}")
+        
+        return params
     
-    def place_order(self, symbol, side, order_type="market", close_size=None):
+    def place_order(self, symbol, side, order_type="market", close_size=None, snapshot=None):
         """Place an order on Bitget
         
         Args:
@@ -170,6 +481,8 @@ class BitgetHandler:
             side (str): Order side (open_long, open_short, close_long, close_short)
             order_type (str): Order type (market, limit)
             close_size (str, optional): Specific size to close, used for closing positions
+            snapshot (PreTradeSnapshot, optional): Balance, price and ATR read just before the
+                order; missing values are fetched here
         """
         try:
             # Format symbol to Bitget format if needed
@@ -180,131 +493,52 @@ class BitgetHandler:
             
             logger.info(f"Placing order with formatted symbol: {formatted_symbol}")
             
+            # Isınmış emir şablonu varsa sadece clientOid doldurulup tek POST gönderilir
+            template = None
+            if side.startswith("open_") and self.order_warmer is not None:
+                template = self.order_warmer.template(formatted_symbol, side)
+            
+            if template is not None:
+                params = dict(template.params)
+                current_price = template.price
+                logger.info(f"Using warm order template for {formatted_symbol} {side} ({template.age() * 1000:.0f} ms old)")
+                # Şablonlar kaldıraç ayarlamadan hazırlanır; bilinen kaldıraç doğruysa istek atılmaz
+                self.ensure_leverage(formatted_symbol, side)
             # If this is a close order and we have a specific size, use it
-            if side.startswith("close_") and close_size:
-                size = close_size
-                logger.info(f"Using provided size for closing position: {size}")
+            elif side.startswith("close_") and close_size:
+                logger.info(f"Using provided size for closing position: {close_size}")
+                params = self.build_order_params(formatted_symbol, side, size=close_size)
             else:
                 # Her işlem öncesi bakiyeyi yeniden al - önbelleklenmiş değer kullanma
                 # Önce mevcut pozisyonları temizle
                 self.last_position_states = {}
                 
-                # Bakiyeyi yeniden al
-                balance, _, _ = self.get_account_balance('USDT')
-                logger.info(f"Fresh account balance: {balance} USDT")
-                
-                if isinstance(balance, (int, float)) and balance <= 0:
-                    logger.warning("Using dummy balance for testing: 1000 USDT")
-                    balance = 1000.0
-                
-                order_size_percentage = self.config.get('order_size_percentage', 10)
-                if not isinstance(order_size_percentage, (int, float)):
-                    try:
-                        order_size_percentage = float(order_size_percentage)
-                    except (TypeError, ValueError):
-                        logger.warning(f"Invalid order_size_percentage value: {order_size_percentage}, using default 10%")
-                        order_size_percentage = 10.0
-                
-                # Calculate exact order amount (this is what user wants to trade)
-                order_amount = balance * (order_size_percentage / 100)
-                logger.info(f"Order calculation:")
-                logger.info(f"Balance: ${balance} USDT")
-                logger.info(f"Order Size: {order_size_percentage}%")
-                logger.info(f"Order Amount: ${order_amount} USDT")
+                # Bakiyeyi yeniden al (sinyal için alınan pre-trade snapshot'ta varsa onu kullan)
+                if snapshot is not None and snapshot.balance is not None:
+                    balance = snapshot.balance
+                    logger.info(f"Snapshot account balance: {balance} USDT")
+                else:
+                    balance, _, _ = self.get_account_balance('USDT')
+                    logger.info(f"Fresh account balance: {balance} USDT")
                 
                 # Get current price
-                current_price = self.get_symbol_price(symbol)
+                if snapshot is not None and snapshot.price:
+                    current_price = snapshot.price
+                else:
+                    current_price = self.get_symbol_price(symbol)
                 logger.info(f"Current price for {symbol}: {current_price}")
                 
-                if current_price <= 0:
-                    logger.warning("Using dummy price for BTC: 45000")
-                    current_price = 45000.0
-                    
-                # Set leverage
-                leverage = self.config.get('leverage', 5)
-                if not isinstance(leverage, (int, float)):
-                    try:
-                        leverage = int(float(leverage))
-                    except (TypeError, ValueError):
-                        logger.warning(f"Invalid leverage value: {leverage}, using default 5x")
-                        leverage = 5
-                
-                # Apply leverage to order amount
-                leveraged_amount = order_amount * leverage
-                logger.info(f"Leveraged amount (with {leverage}x): ${leveraged_amount} USDT")
+                atr = None
+                if side.startswith("open_"):
+                    if snapshot is not None and snapshot.atr is not None:
+                        atr = snapshot.atr
+                    else:
+                        atr = self.get_atr(formatted_symbol, int(self.config.get('atr_period', 14)))
                 
-                # Calculate size in BTC (or other coin) with leveraged amount
-                size = leveraged_amount / current_price
-                logger.info(f"Final size for {symbol}: {size} (${leveraged_amount} USDT with {leverage}x leverage)")
+                params = self.build_order_params(formatted_symbol, side, balance=balance, price=current_price, atr=atr)
             
-            # Set leverage
-            try:
-                for hold_side in ['long', 'short']:
-                    leverage_params = {
-                        "symbol": formatted_symbol,
-                        "marginCoin": "USDT",
-                        "leverage": str(leverage),
-                        "holdSide": hold_side
-                    }
-                    leverage_response = self.base_api.post("/api/mix/v1/account/setLeverage", leverage_params)
-                    logger.info(f"Leverage {leverage}x set for {hold_side} side: {leverage_response}")
-            except Exception as le:
-                logger.warning(f"Error setting leverage: {str(le)}")
-                logger.warning(f"Continuing without setting leverage. Will use the existing leverage setting.")
-            
-            # Ana emir parametreleri
-            params = {
-                "symbol": formatted_symbol,
-                "marginCoin": "USDT",
-                "size": str(size),
-                "orderType": "market",  # Market emri
-                "timeInForceValue": "normal",  # Normal zaman aşımı
-                "reduceOnly": False,  # Sadece azaltma değil
-                "postOnly": False,  # Sadece maker değil
-                "triggerPrice": "",  # Tetikleme fiyatı (boş)
-                "triggerType": "market_price",  # Piyasa fiyatı tetikleme
-                "clientOid": str(int(time.time() * 1000))  # Benzersiz emir ID'si
-            }
-            
-            # Add side parameter based on the action
-            if side == "open_long":
-                params["side"] = "open_long"
-            elif side == "open_short":
-                params["side"] = "open_short"
-            elif side == "close_long":
-                params["side"] = "close_long"
-            elif side == "close_short":
-                params["side"] = "close_short"
-            
-            # TP/SL değerlerini ana emirde ekle (sadece pozisyon açma emirleri için)
-            if side.startswith("open_"):
-                try:
-                    atr_period = int(self.config.get('atr_period', 14))
-                    atr_tp_multiplier = float(self.config.get('atr_tp_multiplier', 2.5))
-                    atr_sl_multiplier = float(self.config.get('atr_sl_multiplier', 3.0))
-                    atr = self.get_atr(formatted_symbol, atr_period)
-                    if side == "open_long":
-                        tp_price = current_price + (atr * atr_tp_multiplier)
-                        sl_price = current_price - (atr * atr_sl_multiplier)
-                    else:  # open_short
-                        tp_price = current_price - (atr * atr_tp_multiplier)
-                        sl_price = current_price + (atr * atr_sl_multiplier)
-                    
-                    # Fiyatları 0.1'in katı olacak şekilde yuvarla
-                    tp_price = round(tp_price * 10) / 10
-                    sl_price = round(sl_price * 10) / 10
-                    
-                    logger.info(f"ATR tabanlı TP/SL: TP={tp_price}, SL={sl_price}, ATR={atr}")
-                    
-                    # Bitget API'sine uygun TP/SL parametreleri
-                    params["presetTakeProfitPrice"] = str(tp_price)
-                    params["presetStopLossPrice"] = str(sl_price)
-                    
-                    logger.info(f"TP/SL parametreleri eklendi: {params}")
-                except Exception as e:
-                    logger.error(f"ATR tabanlı TP/SL hesaplanamadı: {str(e)}")
-                    import traceback
-                    logger.error(f"TP/SL hata detayları: {traceback.format_exc()}")
+            params["clientOid"] = str(int(time.time() * 1000))  # Benzersiz emir ID'si
+            size = params["size"]
             
             logger.info(f"Placing {side} order for {formatted_symbol}, size: {size}, params: {params}")
             
@@ -313,6 +547,10 @@ class BitgetHandler:
                 response = self.base_api.post("/api/mix/v1/order/placeOrder", params)
                 logger.info(f"Main order placed successfully: {response}")
                 
+                # Bakiye ve pozisyonlar değişti: ısınmış şablonlar yeniden hazırlanmalı
+                if self.order_warmer is not None:
+                    self.order_warmer.invalidate()
+                
                 # Telegram bildirimi için mesaj oluştur
                 if side.startswith("open_"):
                     # Response'dan size bilgisini al, yoksa params'dan kullan
@@ -349,11 +587,15 @@ class BitgetHandler:
                             )
 
                     # Tek bildirim gönder
-                    asyncio.run(self.send_telegram_notification(message))
+                    self.send_telegram_notification(message)
 
                 return response
             except BitgetAPIException as be:
                 logger.error(f"Bitget API error: {str(be)}")
+                # Borsadaki kaldıraç durumu değişmiş olabilir, sonraki emirde yeniden okunur
+                self.leverage_cache.invalidate(formatted_symbol)
+                if self.order_warmer is not None:
+                    self.order_warmer.invalidate()
                 # API hata kodlarını kontrol et
                 if hasattr(be, 'code') and be.code:
                     logger.error(f"Bitget error code: {be.code}")
@@ -377,9 +619,13 @@ class BitgetHandler:
                 
                 # Telegram ile hata bildir
                 error_message = f"❌ Bitget API error: {str(be)}"
-                asyncio.run(self.send_telegram_notification(error_message))
+                self.send_telegram_notification(error_message)
                 return {"error": str(be)}
             
+        except ValueError as ve:
+            # Geçerli emir oluşturulamadı (bakiye veya fiyat yok, minimum miktarın altında...)
+            logger.error(f"Order aborted: {str(ve)}")
+            return {"error": str(ve)}
         except Exception as e:
             logger.error(f"Failed to place order: {str(e)}")
             import traceback
@@ -387,14 +633,24 @@ class BitgetHandler:
             # Telegram ile hata bildir
             error_message = f"❌ Order error: {str(e)}"
             try:
-                asyncio.run(self.send_telegram_notification(error_message))
+                self.send_telegram_notification(error_message)
             except:
                 pass
             return {"error": str(e)}
     
-    def get_open_positions(self):
+    def get_open_positions(self, raise_errors=False):
         """Get all open positions
         
+        allPosition is the only endpoint returning every position; the others
+        are fallbacks with a narrower scope (singlePosition covers BTCUSDT only).
+        They are always tried in this order, an endpoint is skipped only after
+        it answered "not supported" (40404), and a fallback never becomes the
+        preferred endpoint.
+        
+        Args:
+            raise_errors (bool): Raise instead of returning an empty or partial list when
+                allPosition did not answer (callers that need the full list)
+        
         Returns:
             list: List of open positions
         """
@@ -403,101 +659,185 @@ class BitgetHandler:
             endpoints = [
                 {
                     "path": "/api/mix/v1/position/allPosition",
-                    "params": {"productType": "umcbl", "marginCoin": "USDT"}
+                    "params": {"productType": "umcbl", "marginCoin": "USDT"},
+                    "complete": True
                 },
                 {
                     "path": "/api/mix/v1/position/singlePosition",
-                    "params": {"symbol": "BTCUSDT_UMCBL", "marginCoin": "USDT"}
+                    "params": {"symbol": "BTCUSDT_UMCBL", "marginCoin": "USDT"},
+                    "complete": False
                 },
                 {
                     "path": "/api/mix/v1/position/holds",
-                    "params": {"productType": "umcbl", "marginCoin": "USDT"}
+                    "params": {"productType": "umcbl", "marginCoin": "USDT"},
+                    "complete": False
                 }
             ]
             
-            for endpoint in endpoints:
+            for endpoint in self.endpoint_registry.plan('positions', endpoints, sticky=False):
                 try:
                     logger.info(f"Trying endpoint: {endpoint['path']} with params: {endpoint['params']}")
                     response = self.base_api.get(endpoint['path'], endpoint['params'])
                     logger.info(f"Raw position API response from {endpoint['path']}: {response}")
-                    
-                    if response and 'data' in response and response['data']:
-                        # Convert single position response to list if needed
-                        positions_data = response['data']
-                        if not isinstance(positions_data, list):
-                            positions_data = [positions_data]
-                        
-                        # Filter out positions with zero size and log details
-                        positions = []
-                        for pos in positions_data:
-                            total_size = float(pos.get('total', '0'))
-                            logger.info(f"Processing position: Symbol={pos.get('symbol')}, Size={total_size}, Side={pos.get('holdSide')}")
-                            if total_size > 0:
-                                positions.append(pos)
-                        
-                        if positions:
-                            logger.info(f"Found {len(positions)} active positions using endpoint {endpoint['path']}")
-                            return positions
-                        else:
-                            logger.info(f"No active positions found using endpoint {endpoint['path']}")
-                    
                 except Exception as e:
+                    self.endpoint_registry.record_failure('positions', endpoint['path'], e)
                     logger.error(f"Error with endpoint {endpoint['path']}: {str(e)}")
                     continue
+                
+                if not response or 'data' not in response:
+                    continue
+                
+                self.endpoint_registry.record_success('positions', endpoint['path'], sticky=False)
+                
+                # Convert single position response to list if needed
+                positions_data = response['data'] or []
+                if not isinstance(positions_data, list):
+                    positions_data = [positions_data]
+                
+                # Filter out positions with zero size and log details
+                positions = []
+                for pos in positions_data:
+                    total_size = float(pos.get('total', '0'))
+                    logger.info(f"Processing position: Symbol={pos.get('symbol')}, Size={total_size}, Side={pos.get('holdSide')}")
+                    if total_size > 0:
+                        positions.append(pos)
+                        self.leverage_cache.observe_position(pos)
+                
+                if not endpoint['complete']:
+                    # Yedek uç noktanın sonucu tam pozisyon listesi değildir
+                    logger.warning(f"Only the fallback {endpoint['path']} answered; "
+                                   f"{len(positions)} positions is not the full list")
+                    if raise_errors:
+                        raise RuntimeError(f"allPosition did not answer (only {endpoint['path']})")
+                    return positions
+                
+                # allPosition answered: its result is authoritative, even when empty
+                if positions:
+                    logger.info(f"Found {len(positions)} active positions using endpoint {endpoint['path']}")
+                else:
+                    logger.info(f"No active positions found using endpoint {endpoint['path']}")
+                return positions
             
             logger.warning("No positions found using any endpoint")
+            if raise_errors:
+                raise RuntimeError("No position endpoint answered")
             return []
             
         except Exception as e:
+            if raise_errors:
+                raise
             logger.error(f"Failed to get open positions: {str(e)}")
             import traceback
             logger.error(f"Traceback: {traceback.format_exc()}")
             return []
 
-    async def send_telegram_notification(self, message):
-        """Send notification to Telegram
+    def send_telegram_notification(self, message):
+        """Queue a notification to Telegram; returns without waiting for the send
         
         Args:
             message (str): Message to send
         """
         if self.config.get('telegram_bot_token') and self.config.get('telegram_chat_id'):
-            try:
-                from telegram import Bot
-                bot = Bot(token=self.config['telegram_bot_token'])
-                
-                # Format chat_id
-                chat_id = self.config['telegram_chat_id']
-                
-                # If chat_id is numeric
-                if chat_id.isdigit():
-                    # Group IDs need to be negative
-                    if chat_id.startswith("100"):
-                        chat_id = "-" + chat_id
-                        logger.info(f"Converting group ID to negative: {chat_id}")
-                
-                logger.info(f"Sending telegram notification with chat_id: {chat_id}")
-                await bot.send_message(chat_id=chat_id, text=message)
-                logger.info(f"Telegram notification sent: {message}")
-            except Exception as e:
-                logger.error(f"Failed to send Telegram notification: {str(e)}")
-                import traceback
-                logger.error(f"Telegram error details: {traceback.format_exc()}")
-                logger.error(f"Please check your Telegram settings. Bot token: {self.config['telegram_bot_token'][:5]}... and Chat ID: {self.config['telegram_chat_id']}")
-                logger.error("Make sure you have messaged your bot once or added it to your group.")
+            self.notifier.notify(message)
+
+    def _on_request(self, method, request_path):
+        self.request_budget.spend()
+    
+    def close(self):
+        """Release what this handler registered outside itself
+        
+        The request listener is process-wide, so a handler that is replaced
+        (tests, benchmarks) would otherwise keep being charged for every
+        REST request of every later handler.
+        """
+        remove_request_listener(self._on_request)
+        if self.position_stream is not None:
+            self.position_stream.stop()
+            self.position_stream = None
+
+    def _cached_atr(self, symbol):
+        """ATR of symbol from memory only (None if it was never computed); used by the poll scheduler"""
+        return self.atr_engine.value(symbol.replace('_UMCBL', ''), '15m', int(self.config.get('atr_period', 14)))
+
+    def _trigger_price(self, symbol, market_price):
+        """Price TP/SL levels of a symbol are checked against
+        
+        In streaming mode a position's marketPrice only changes when the position itself is
+        pushed, so the ticker price from the price cache is preferred.
+        
+        Args:
+            symbol (str): Bitget symbol (e.g. 'BTCUSDT_UMCBL')
+            market_price: marketPrice of the position, used when no fresh quote is available
+            
+        Returns:
+            Price to check the levels against
+        """
+        try:
+            price, age = self.quote(symbol)
+        except Exception as e:
+            logger.error(f"Failed to quote {symbol} for TP/SL check: {str(e)}")
+            return market_price
+        if price is None or age > self.price_cache.max_age:
+            return market_price
+        return price
+
+    @staticmethod
+    def _trigger_message(pos, kind):
+        """Telegram message of a crossed TP or SL level"""
+        symbol = pos.get('symbol', '').replace('_UMCBL', '')
+        side = pos.get('holdSide', '').lower()
+        entry_price = float(pos.get('averageOpenPrice', '0'))
+        unrealized_pnl = float(pos.get('unrealizedPL', '0'))
+        size = float(pos.get('total', '0'))
+        
+        if kind == TAKE_PROFIT:
+            tp_price = float(pos.get('presetTakeProfitPrice', '0'))
+            # Kar yüzdesini hesapla
+            profit_percentage = abs(tp_price - entry_price) / entry_price * 100 if entry_price else 0.0
+            return (
+                f"🎯 Take Profit Triggered!\n"
+                f"Symbol: {symbol}\n"
+                f"Direction: {side.upper()}\n"
+                f"Entry Price: ${entry_price:.2f}\n"
+                f"TP Price: ${tp_price:.2f}\n"
+                f"Profit: ${unrealized_pnl:.2f} (+{profit_percentage:.2f}%)\n"
+                f"Size: {size:.4f}\n"
+                f"Reason: Automatic Take Profit"
+            )
+        
+        sl_price = float(pos.get('presetStopLossPrice', '0'))
+        # Zarar yüzdesini hesapla
+        loss_percentage = abs(entry_price - sl_price) / entry_price * 100 if entry_price else 0.0
+        return (
+            f"🛑 Stop Loss Triggered!\n"
+            f"Symbol: {symbol}\n"
+            f"Direction: {side.upper()}\n"
+            f"Entry Price: ${entry_price:.2f}\n"
+            f"SL Price: ${sl_price:.2f}\n"
+            f"Loss: ${unrealized_pnl:.2f} (-{loss_percentage:.2f}%)\n"
+            f"Size: {size:.4f}\n"
+            f"Reason: Automatic Stop Loss"
+        )
 
     def monitor_positions(self):
         """Continuously monitor open positions and update dashboard"""
+        # Bu thread'in REST istekleri istek bütçesinde monitöre yazılır
+        self.request_budget.set_source('monitor')
+        
         # İlk çalıştırmada pozisyonları yükle
+        alerts_pruned = False
         try:
-            initial_positions = self.get_open_positions()
+            initial_positions = self.get_open_positions(raise_errors=True)
             for pos in initial_positions:
-                pos_id = pos.get('positionId')
-                if pos_id:
-                    self.last_position_states[pos_id] = pos
+                self.last_position_states[position_key(pos)] = pos
+            # Uygulama kapalıyken kapanan pozisyonların alarm durumlarını temizle (açık pozisyon yoksa hepsini)
+            self.alert_state.prune(self.last_position_states)
+            alerts_pruned = True
             logger.info(f"Initialized position monitor with {len(initial_positions)} positions")
         except Exception as e:
             logger.error(f"Error initializing position monitor: {str(e)}")
         
+        book_version = None
         while True:
             try:
                 # Önceki pozisyonları sakla
@@ -505,19 +845,27 @@ class BitgetHandler:
                 for pos_id, pos in self.last_position_states.items():
                     previous_positions[pos_id] = pos
                 
-                # Güncel pozisyonları al
-                current_positions = self.get_open_positions()
+                # Güncel pozisyonları al: WebSocket akışı canlıysa bellekteki defterden, değilse REST'ten
+                stream = self.position_stream
+                streaming = stream is not None and stream.live()
+                if streaming:
+                    current_positions = stream.book.positions()
+                else:
+                    current_positions = self.get_open_positions(raise_errors=True)
                 
                 # Güncel pozisyon ID'lerini topla
                 current_position_ids = set()
                 current_symbols = set()
                 for pos in current_positions:
-                    pos_id = pos.get('positionId')
+                    pos_id = position_key(pos)
                     symbol = pos.get('symbol', '')
-                    if pos_id:
-                        current_position_ids.add(pos_id)
-                        current_symbols.add(symbol)
-                        self.last_position_states[pos_id] = pos
+                    current_position_ids.add(pos_id)
+                    current_symbols.add(symbol)
+                    self.last_position_states[pos_id] = pos
+                if not alerts_pruned:
+                    # İlk okuma başarısız olduysa temizlik ilk başarılı okumada yapılır
+                    self.alert_state.prune(current_position_ids)
+                    alerts_pruned = True
                 
                 # Kapanan pozisyonları kontrol et (önceki pozisyonlarda var ama güncel pozisyonlarda yok)
                 for pos_id, pos in previous_positions.items():
@@ -555,117 +903,40 @@ class BitgetHandler:
                             f"Position ID: {pos_id}"
                         )
                         logger.info(f"Position closed: {symbol} {side} {size}")
-                        asyncio.run(self.send_telegram_notification(message))
+                        self.send_telegram_notification(message)
                         
                         # Kapanan pozisyonu son durumlardan kaldır
                         if pos_id in self.last_position_states:
                             del self.last_position_states[pos_id]
+                        self.trigger_index.remove(pos_id)
+                        self.alert_state.close(pos_id)
                 
-                # Check for TP/SL triggers by comparing with last known states
+                # TP/SL alerts: each symbol's price is bisected against its sorted levels, only
+                # crossed levels are evaluated; each fires once per crossing and re-arms after a reversal
+                symbol_prices = {}
                 for pos in current_positions:
-                    pos_id = pos.get('positionId')
-                    symbol = pos.get('symbol', '').replace('_UMCBL', '')
-                    current_price = float(pos.get('marketPrice', '0'))
-                    side = pos.get('holdSide', '').lower()
-                    
-                    # Get last known state
-                    last_state = previous_positions.get(pos_id, {})
-                    last_price = float(last_state.get('marketPrice', '0'))
-                    
-                    if last_price > 0 and current_price > 0:
-                        # Check if TP was hit
-                        if side == 'long' and current_price >= float(pos.get('presetTakeProfitPrice', '0')) > 0:
-                            entry_price = float(pos.get('averageOpenPrice', '0'))
-                            tp_price = float(pos.get('presetTakeProfitPrice', '0'))
-                            unrealized_pnl = float(pos.get('unrealizedPL', '0'))
-                            size = float(pos.get('total', '0'))
-                            
-                            # Kar yüzdesini hesapla
-                            profit_percentage = ((tp_price - entry_price) / entry_price) * 100
-                            
-                            message = (
-                                f"🎯 Take Profit Triggered!\n"
-                                f"Symbol: {symbol}\n"
-                                f"Direction: {side.upper()}\n"
-                                f"Entry Price: ${entry_price:.2f}\n"
-                                f"TP Price: ${tp_price:.2f}\n"
-                                f"Profit: ${unrealized_pnl:.2f} (+{profit_percentage:.2f}%)\n"
-                                f"Size: {size:.4f}\n"
-                                f"Reason: Automatic Take Profit"
-                            )
-                            asyncio.run(self.send_telegram_notification(message))
-                            
-                        elif side == 'short' and current_price <= float(pos.get('presetTakeProfitPrice', '0')) > 0:
-                            entry_price = float(pos.get('averageOpenPrice', '0'))
-                            tp_price = float(pos.get('presetTakeProfitPrice', '0'))
-                            unrealized_pnl = float(pos.get('unrealizedPL', '0'))
-                            size = float(pos.get('total', '0'))
-                            
-                            # Kar yüzdesini hesapla
-                            profit_percentage = ((entry_price - tp_price) / entry_price) * 100
-                            
-                            message = (
-                                f"🎯 Take Profit Triggered!\n"
-                                f"Symbol: {symbol}\n"
-                                f"Direction: {side.upper()}\n"
-                                f"Entry Price: ${entry_price:.2f}\n"
-                                f"TP Price: ${tp_price:.2f}\n"
-                                f"Profit: ${unrealized_pnl:.2f} (+{profit_percentage:.2f}%)\n"
-                                f"Size: {size:.4f}\n"
-                                f"Reason: Automatic Take Profit"
-                            )
-                            asyncio.run(self.send_telegram_notification(message))
-                            
-                        # Check if SL was hit
-                        if side == 'long' and current_price <= float(pos.get('presetStopLossPrice', '0')) > 0:
-                            entry_price = float(pos.get('averageOpenPrice', '0'))
-                            sl_price = float(pos.get('presetStopLossPrice', '0'))
-                            unrealized_pnl = float(pos.get('unrealizedPL', '0'))
-                            size = float(pos.get('total', '0'))
-                            
-                            # Zarar yüzdesini hesapla
-                            loss_percentage = ((entry_price - sl_price) / entry_price) * 100
-                            
-                            message = (
-                                f"🛑 Stop Loss Triggered!\n"
-                                f"Symbol: {symbol}\n"
-                                f"Direction: {side.upper()}\n"
-                                f"Entry Price: ${entry_price:.2f}\n"
-                                f"SL Price: ${sl_price:.2f}\n"
-                                f"Loss: ${unrealized_pnl:.2f} (-{loss_percentage:.2f}%)\n"
-                                f"Size: {size:.4f}\n"
-                                f"Reason: Automatic Stop Loss"
-                            )
-                            asyncio.run(self.send_telegram_notification(message))
-                            
-                        elif side == 'short' and current_price >= float(pos.get('presetStopLossPrice', '0')) > 0:
-                            entry_price = float(pos.get('averageOpenPrice', '0'))
-                            sl_price = float(pos.get('presetStopLossPrice', '0'))
-                            unrealized_pnl = float(pos.get('unrealizedPL', '0'))
-                            size = float(pos.get('total', '0'))
-                            
-                            # Zarar yüzdesini hesapla
-                            loss_percentage = ((sl_price - entry_price) / entry_price) * 100
-                            
-                            message = (
-                                f"🛑 Stop Loss Triggered!\n"
-                                f"Symbol: {symbol}\n"
-                                f"Direction: {side.upper()}\n"
-                                f"Entry Price: ${entry_price:.2f}\n"
-                                f"SL Price: ${sl_price:.2f}\n"
-                                f"Loss: ${unrealized_pnl:.2f} (-{loss_percentage:.2f}%)\n"
-                                f"Size: {size:.4f}\n"
-                                f"Reason: Automatic Stop Loss"
-                            )
-                            asyncio.run(self.send_telegram_notification(message))
-                    
+                    self.trigger_index.update(position_key(pos), pos)
+                    symbol_prices[pos.get('symbol', '')] = pos.get('marketPrice', '0')
+                for symbol, price in symbol_prices.items():
+                    # Ticker fiyatı tercih edilir; yoksa pozisyonun marketPrice'ı kullanılır
+                    price = self._trigger_price(symbol, price)
+                    for pos_id, kind, pos in self.trigger_index.on_price(symbol, price):
+                        self.send_telegram_notification(self._trigger_message(pos, kind))
+                
                 # Update positions in database or state management
                 self.update_dashboard_positions(current_positions)
-                time.sleep(5)  # Check every 5 seconds
+                
+                # Sonraki kontrol: seviyeye yakın pozisyon varken sık, pozisyon yokken seyrek
+                interval = self.poll_scheduler.on_success(current_positions, self._cached_atr)
+                if streaming:
+                    # Bir push gelene kadar bekle (en fazla interval saniye)
+                    book_version = stream.book.wait_for_change(book_version, timeout=interval)
+                else:
+                    time.sleep(interval)
                 
             except Exception as e:
                 logger.error(f"Error in position monitoring: {e}")
-                time.sleep(5)  # Wait before retrying
+                time.sleep(self.poll_scheduler.on_error())  # Exponential backoff with jitter
 
     def update_dashboard_positions(self, positions):
         """Update dashboard with current position information"""
@@ -715,7 +986,7 @@ class BitgetHandler:
                     
                     # Format position data
                     formatted_pos = {
-                        'id': pos.get('positionId', ''),
+                        'id': position_key(pos),
                         'symbol': pos.get('symbol', '').replace('_UMCBL', ''),
                         'size': f"{size:.4f}",
                         'entry_price': f"${entry_price:.2f}",
@@ -754,70 +1025,57 @@ class BitgetHandler:
             logger.error(f"Traceback: {traceback.format_exc()}")
             return []
 
-    def get_atr(self, symbol, period=14):
-        """Belirtilen sembol için ATR (Average True Range) hesaplar
+    def get_atr(self, symbol, period=14, interval='15m'):
+        """Belirtilen sembol için ATR (Average True Range) döndürür
+        
+        Wilder ATR her (sembol, interval, periyot) için hafızada tutulur. Yeni bir
+        mum kapanmadıysa değer doğrudan hafızadan okunur; kapandıysa sadece yeni
+        Bitget vadeli mumları yerel mum deposuna (data/candles/bitget-umcbl) eklenip ATR O(1) güncellenir. İlk
+        çağrıda depodaki geçmiş mumlardan başlatılır. WebSocket mum akışı (CandleFeed)
+        çalışırken kapanan mumlar zaten akıştan işlendiği için indirme yapılmaz.
         
         Args:
             symbol (str): İşlem çifti (örn. 'BTCUSDT_UMCBL')
             period (int): ATR periyodu (varsayılan: 14)
+            interval (str): Mum aralığı (varsayılan: '15m')
             
         Returns:
             float: Hesaplanan ATR değeri
         """
         try:
-            # Sembolü düzelt
-            binance_symbol = symbol.replace('_UMCBL', '')
-            logger.info(f"ATR hesaplama başlatılıyor. Sembol: {binance_symbol}, Periyot: {period}")
+            # Mum deposu ve WebSocket akışı ürün ekisiz sembol kullanır
+            candle_symbol = symbol.replace('_UMCBL', '')
+            interval_ms = INTERVAL_MS[interval]
+            now_ms = int(time.time() * 1000)
             
-            # Binance API'den mum verileri al
-            url = f'https://api.binance.com/api/v3/klines'
-            params = {
-                'symbol': binance_symbol,
-                'interval': '15m',
-                'limit': period + 50  # Daha fazla veri alalım
-            }
+            state = self.atr_engine.get(candle_symbol, interval, period)
+            if state is not None and now_ms > state.last_close_time + interval_ms:
+                # Canlı mum akışı kapanan mumu depoya ve ATR'a işlemiş olabilir
+                self.candle_builder.flush(now_ms)
+            if state is not None and now_ms <= state.last_close_time + interval_ms:
+                # Son kapanan mumdan sonra yeni mum kapanmadı: hafızadan oku
+                return state.value
+            if state is not None and self.candle_builder.tracks(candle_symbol, interval, now_ms) \
+                    and now_ms <= state.last_close_time + interval_ms + self.candle_builder.close_delay_ms:
+                # Mum yeni kapandı, akıştan gelen kapanış bekleniyor: indirmek yerine bir önceki değeri kullan
+                return state.value
             
-            logger.info(f"Binance API'den veri alınıyor: {url} params: {params}")
-            response = requests.get(url, params=params)
-            data = response.json()
+            # Yerel mum deposunu güncelle (sadece son kayıtlı mumdan sonrakiler indirilir)
+            self.candle_store.sync(candle_symbol, interval, now_ms=now_ms)
             
-            # Veri kontrolü
-            if len(data) < period + 1:
-                logger.warning(f"ATR hesaplaması için yeterli veri yok. İhtiyaç: {period+1}, Mevcut: {len(data)}")
-                return 0.0
-            
-            # Pandas DataFrame'e dönüştür
-            df = pd.DataFrame(data, columns=[
-                'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_asset_volume', 'number_of_trades',
-                'taker_buy_base_vol', 'taker_buy_quote_vol', 'ignore'
-            ])
-            
-            # Sadece gerekli sütunları al
-            df = df[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
-            
-            # Veri tiplerini dönüştür
-            df[['open', 'high', 'low', 'close', 'volume']] = df[['open', 'high', 'low', 'close', 'volume']].astype(float)
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            
-            # ATR hesaplama
-            df['previous_close'] = df['close'].shift(1)
-            df['tr'] = df[['high', 'low', 'previous_close']].apply(
-                lambda x: max(
-                    x['high'] - x['low'],
-                    abs(x['high'] - x['previous_close']),
-                    abs(x['low'] - x['previous_close'])
-                ), axis=1
-            )
-            
-            # Wilder's ATR (EMA with alpha=1/period)
-            df['ATR'] = df['tr'].ewm(alpha=1/period, adjust=False).mean()
-            
-            # Son ATR değerini al
-            atr_value = df['ATR'].iloc[-1]
+            if state is None:
+                candles = self.candle_store.tail(candle_symbol, interval, period + 50)
+                # Veri kontrolü
+                if len(candles) < period + 1:
+                    logger.warning(f"ATR hesaplaması için yeterli veri yok. İhtiyaç: {period+1}, Mevcut: {len(candles)}")
+                    return 0.0
+                state = self.atr_engine.seed(candle_symbol, interval, period, candles)
+            else:
+                for candle in self.candle_store.since(candle_symbol, interval, state.last_close_time):
+                    self.atr_engine.update(candle_symbol, interval, candle)
             
-            logger.info(f"Hesaplanan ATR ({period}) değeri: {atr_value}")
-            return atr_value
+            logger.info(f"Hesaplanan ATR ({period}) değeri: {state.value}")
+            return state.value
                 
         except Exception as e:
             logger.error(f"ATR hesaplaması başarısız oldu: {str(e)}")
@@ -0,0 +1,273 @@
+import json
+import logging
+import threading
+import time
+
+from atr_engine import INTERVAL_MS
+from bitget import consts as c
+from bitget.ws.bitget_ws_client import BitgetWsClient, SubscribeReq
+
+logger = logging.getLogger(__name__)
+
+# Bitget public candle channel of each interval
+CANDLE_CHANNELS = {
+    '1m': 'candle1m',
+    '5m': 'candle5m',
+    '15m': 'candle15m',
+    '30m': 'candle30m',
+    '1h': 'candle1H',
+    '4h': 'candle4H',
+    '1d': 'candle1D',
+}
+CHANNEL_INTERVALS = {channel: interval for interval, channel in CANDLE_CHANNELS.items()}
+
+
+class Bar:
+    """Forming candle of one symbol/interval"""
+
+    __slots__ = ('open_time', 'open', 'high', 'low', 'close', 'volume', 'complete')
+
+    def __init__(self, open_time, open_, high, low, close, volume, complete):
+        self.open_time = open_time
+        self.open = open_
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        # False when the builder did not see the bar from its start (first bar, reconnect)
+        self.complete = complete
+
+    def row(self, interval_ms):
+        """Kline row in Binance order (open_time, open, high, low, close, volume, close_time)"""
+        return [self.open_time, self.open, self.high, self.low, self.close, self.volume,
+                self.open_time + interval_ms - 1]
+
+
+class CandleBuilder:
+    """Builds candles from WebSocket trade or candle pushes
+
+    Trades are folded into the forming bar of every interval; a bar closes
+    when a trade reaches the next interval (intervals without trades in
+    between close as flat bars) or when flush() runs close_delay_ms after the
+    interval ended. Candle channel pushes replace the forming bar and close it
+    when the next bar starts.
+
+    A closed bar is appended to the CandleStore and folded into the running
+    ATR of the AtrEngine only when it is complete and directly follows the
+    last stored candle; otherwise (the partial first bar, a gap, a reconnect)
+    it is left to the REST sync in BitgetHandler.get_atr. With the feed
+    running, get_atr finds the ATR already up to date and never downloads
+    candles on the order path.
+    """
+
+    def __init__(self, atr_engine, store, intervals=('15m',), close_delay_ms=2000):
+        """
+        Args:
+            atr_engine (AtrEngine): Running ATR states to update on bar close
+            store (CandleStore): Store the closed bars are appended to
+            intervals (tuple): Intervals built from trades
+            close_delay_ms (int): Time after an interval ends before flush() closes its bar
+        """
+        self.atr_engine = atr_engine
+        self.store = store
+        self.intervals = tuple(intervals)
+        self.close_delay_ms = int(close_delay_ms)
+        self._lock = threading.Lock()
+        self._forming = {}
+        self._next_open = {}
+        self._trades = 0
+        self._closed = 0
+        self._stored = 0
+        self._deferred = 0
+
+    def forming(self, symbol, interval):
+        """Forming bar of symbol/interval as a kline row, None if there is none"""
+        with self._lock:
+            bar = self._forming.get((symbol, interval))
+            return bar.row(INTERVAL_MS[interval]) if bar else None
+
+    def tracks(self, symbol, interval, now_ms=None):
+        """True if the forming bar of symbol/interval is current (or ended less than close_delay_ms ago)"""
+        now_ms = int(time.time() * 1000) if now_ms is None else int(now_ms)
+        with self._lock:
+            bar = self._forming.get((symbol, interval))
+            return bar is not None and now_ms < bar.open_time + INTERVAL_MS[interval] + self.close_delay_ms
+
+    def reset(self):
+        """Forget the forming bars (the feed reconnected and may have missed pushes)"""
+        with self._lock:
+            self._forming = {}
+            self._next_open = {}
+
+    def on_trade(self, symbol, price, size, ts):
+        """Fold one trade into the forming bars of every interval"""
+        price, size, ts = float(price), float(size), int(ts)
+        closed = []
+        with self._lock:
+            self._trades += 1
+            for interval in self.intervals:
+                key = (symbol, interval)
+                interval_ms = INTERVAL_MS[interval]
+                open_time = ts - ts % interval_ms
+                bar = self._forming.get(key)
+                if bar is not None and open_time < bar.open_time:
+                    continue  # late trade of an already closed bar
+                if bar is not None and open_time > bar.open_time:
+                    closed.extend(self._roll(symbol, interval, bar, open_time))
+                    bar = None
+                if bar is None:
+                    complete = self._next_open.get(key) == open_time or ts == open_time
+                    self._forming[key] = Bar(open_time, price, price, price, price, size, complete)
+                else:
+                    bar.high = max(bar.high, price)
+                    bar.low = min(bar.low, price)
+                    bar.close = price
+                    bar.volume += size
+        self._store(closed)
+
+    def on_candle(self, symbol, interval, row):
+        """Apply one candle channel row [open_time, open, high, low, close, volume]"""
+        key = (symbol, interval)
+        open_time = int(row[0])
+        bar = Bar(open_time, float(row[1]), float(row[2]), float(row[3]), float(row[4]), float(row[5]), True)
+        closed = []
+        with self._lock:
+            current = self._forming.get(key)
+            if current is not None and open_time < current.open_time:
+                return
+            if current is not None and open_time > current.open_time:
+                closed.append((symbol, interval, current))
+            self._forming[key] = bar
+        self._store(closed)
+
+    def flush(self, now_ms=None):
+        """Close the forming bars whose interval ended more than close_delay_ms ago
+
+        Only the forming bar itself is closed; unlike a trade rolling over, a
+        silent feed is not turned into flat candles.
+
+        Returns:
+            int: Number of bars closed
+        """
+        now_ms = int(time.time() * 1000) if now_ms is None else int(now_ms)
+        closed = []
+        with self._lock:
+            for key, bar in list(self._forming.items()):
+                interval_ms = INTERVAL_MS[key[1]]
+                end = bar.open_time + interval_ms
+                if now_ms >= end + self.close_delay_ms:
+                    closed.append((key[0], key[1], bar))
+                    del self._forming[key]
+                    self._next_open[key] = end
+        self._store(closed)
+        return len(closed)
+
+    def _roll(self, symbol, interval, bar, open_time):
+        """Closed bars from bar up to (excluding) the bar opening at open_time"""
+        interval_ms = INTERVAL_MS[interval]
+        closed = [(symbol, interval, bar)]
+        # Intervals without trades close as flat bars at the last price
+        for gap_open in range(bar.open_time + interval_ms, open_time, interval_ms):
+            closed.append((symbol, interval, Bar(gap_open, bar.close, bar.close, bar.close, bar.close, 0.0,
+                                                 bar.complete)))
+        self._next_open[(symbol, interval)] = open_time
+        return closed
+
+    def _store(self, closed):
+        for symbol, interval, bar in closed:
+            row = bar.row(INTERVAL_MS[interval])
+            last = self.store.last_close_time(symbol, interval)
+            stored = bar.complete and last is not None and bar.open_time == last + 1 \
+                and len(self.store.append(symbol, interval, [row])) > 0
+            with self._lock:
+                self._closed += 1
+                if stored:
+                    self._stored += 1
+                else:
+                    self._deferred += 1
+            if stored:
+                self.atr_engine.update(symbol, interval, row)
+
+    def handle_message(self, message):
+        """BitgetWsClient listener for the public trade and candle channels"""
+        arg = message.get('arg') or {}
+        channel = arg.get('channel')
+        symbol = arg.get('instId')
+        if channel == 'trade':
+            for ts, price, size, _side in sorted(message.get('data') or [], key=lambda trade: int(trade[0])):
+                self.on_trade(symbol, price, size, ts)
+        elif channel in CHANNEL_INTERVALS:
+            for row in sorted(message.get('data') or [], key=lambda row: int(row[0])):
+                self.on_candle(symbol, CHANNEL_INTERVALS[channel], row)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'forming': len(self._forming),
+                'trades': self._trades,
+                'closed': self._closed,
+                'stored': self._stored,
+                'deferred': self._deferred
+            }
+
+
+def replay_trades(path, builder):
+    """Feed a recorded trade/candle message file (one raw frame per line) into a builder
+
+    Returns:
+        int: Number of frames applied
+    """
+    applied = 0
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line == 'pong':
+                continue
+            message = json.loads(line)
+            if 'data' in message:
+                builder.handle_message(message)
+                applied += 1
+    return applied
+
+
+class CandleFeed:
+    """Public trade or candle subscription of the given symbols feeding a CandleBuilder"""
+
+    def __init__(self, builder, symbols, source='candle', url=c.CONTRACT_WS_URL, inst_type='mc'):
+        """
+        Args:
+            builder (CandleBuilder): Builder fed by the pushes
+            symbols (list): Symbols in WebSocket format (e.g. 'BTCUSDT')
+            source (str): 'candle' (candle channel of each interval) or 'trade'
+            url (str): Public WebSocket URL
+            inst_type (str): Instrument type of the subscriptions
+        """
+        self.builder = builder
+        if source == 'trade':
+            channels = ['trade']
+        else:
+            channels = [CANDLE_CHANNELS[interval] for interval in builder.intervals]
+        self.channels = [SubscribeReq(inst_type, channel, symbol) for symbol in symbols for channel in channels]
+        self.url = url
+        self._client = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._connect, name="candle-feed", daemon=True)
+            self._thread.start()
+        return self
+
+    def _connect(self):
+        try:
+            self._client = BitgetWsClient(self.url) \
+                .reconnect_listener(self.builder.reset) \
+                .build()
+            self._client.subscribe(self.channels, self.builder.handle_message)
+            logger.info(f"Candle feed subscribed to {len(self.channels)} channels")
+        except Exception as e:
+            logger.error(f"Candle feed could not start: {str(e)}")
+
+    def stop(self):
+        if self._client:
+            self._client.close()
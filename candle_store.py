@@ -0,0 +1,208 @@
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from atr_engine import INTERVAL_MS
+from bitget.client import get_session
+
+logger = logging.getLogger(__name__)
+
+BINANCE_KLINES_URL = 'https://api.binance.com/api/v3/klines'
+
+# One fixed-size record per candle; files are plain arrays of these records
+CANDLE_DTYPE = np.dtype([
+    ('open_time', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+    ('close_time', '<i8'),
+])
+
+
+def fetch_binance_klines(symbol, interval, start_time=None, limit=1000):
+    """Download klines from Binance (oldest first)
+
+    Args:
+        symbol (str): Binance symbol (e.g. 'BTCUSDT')
+        interval (str): Kline interval (e.g. '15m')
+        start_time (int, optional): Only klines opening at or after this time (ms)
+        limit (int): Maximum number of klines (Binance caps it at 1000)
+
+    Returns:
+        list: Raw kline rows
+    """
+    params = {'symbol': symbol, 'interval': interval, 'limit': limit}
+    if start_time is not None:
+        params['startTime'] = int(start_time)
+    logger.info(f"Binance API'den veri alınıyor: {BINANCE_KLINES_URL} params: {params}")
+    response = get_session().get(BINANCE_KLINES_URL, params=params)
+    response.raise_for_status()
+    return response.json()
+
+
+# Bitget mix v1 candle granularity of each interval
+BITGET_GRANULARITY = {
+    '1m': '1m',
+    '3m': '3m',
+    '5m': '5m',
+    '15m': '15m',
+    '30m': '30m',
+    '1h': '1H',
+    '2h': '2H',
+    '4h': '4H',
+    '1d': '1D',
+}
+
+
+def fetch_bitget_candles(market_api, symbol, interval, start_time=None, limit=1000):
+    """Download USDT-M futures candles from Bitget in Binance kline order (oldest first)
+
+    The same market the WebSocket candle feed and the orders use, so stored
+    history and live bars can be chained into one ATR.
+
+    Args:
+        market_api (MarketApi): Bitget mix v1 market client
+        symbol (str): Symbol without product suffix (e.g. 'BTCUSDT')
+        interval (str): Kline interval (e.g. '15m')
+        start_time (int, optional): Only candles opening at or after this time (ms)
+        limit (int): Maximum number of candles (Bitget caps it at 1000)
+
+    Returns:
+        list: Rows (open_time, open, high, low, close, volume, close_time)
+    """
+    interval_ms = INTERVAL_MS[interval]
+    now_ms = int(time.time() * 1000)
+    if start_time is None:
+        start_time = now_ms - now_ms % interval_ms - (limit - 1) * interval_ms
+    params = {
+        'symbol': symbol if symbol.endswith('_UMCBL') else f"{symbol}_UMCBL",
+        'granularity': BITGET_GRANULARITY[interval],
+        'startTime': int(start_time),
+        'endTime': min(now_ms, int(start_time) + limit * interval_ms),
+        'limit': limit
+    }
+    response = market_api.candles(params)
+    # v1 mum ucu çıplak liste döndürür; sarılı (code/data) cevap da kabul edilir
+    rows = response.get('data') if isinstance(response, dict) else response
+    return [[int(row[0]), row[1], row[2], row[3], row[4], row[5], int(row[0]) + interval_ms - 1]
+            for row in sorted(rows or [], key=lambda row: int(row[0]))]
+
+
+class CandleStore:
+    """Append-only local OHLCV store, one memory-mapped file per symbol/interval
+
+    Only closed candles are stored. sync() downloads the candles newer than the
+    last stored close time, so identical history is never fetched twice. With
+    fetcher=None the store is read-only and works fully offline from its files.
+    """
+
+    def __init__(self, directory, fetcher=fetch_binance_klines, history=500, page_size=1000):
+        """
+        Args:
+            directory (str): Directory holding the candle files
+            fetcher (callable, optional): fetcher(symbol, interval, start_time, limit) -> kline rows
+            history (int): Candles downloaded when a symbol/interval is first synced
+            page_size (int): Candles requested per delta download
+        """
+        self.directory = directory
+        self.fetcher = fetcher
+        self.history = history
+        self.page_size = page_size
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, symbol, interval):
+        return os.path.join(self.directory, f"{symbol}_{interval}.bin")
+
+    def _lock(self, symbol, interval):
+        with self._locks_lock:
+            return self._locks.setdefault((symbol, interval), threading.Lock())
+
+    def read(self, symbol, interval):
+        """All stored candles as a read-only structured array (memory-mapped)"""
+        path = self.path(symbol, interval)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=CANDLE_DTYPE)
+        # A torn final record (crash mid-append) is ignored
+        count = os.path.getsize(path) // CANDLE_DTYPE.itemsize
+        if count == 0:
+            return np.empty(0, dtype=CANDLE_DTYPE)
+        return np.memmap(path, dtype=CANDLE_DTYPE, mode='r', shape=(count,))
+
+    def tail(self, symbol, interval, count):
+        """Last count candles (copied out of the memory map)"""
+        return np.array(self.read(symbol, interval)[-count:])
+
+    def since(self, symbol, interval, close_time):
+        """Candles that closed after close_time (ms)"""
+        candles = self.read(symbol, interval)
+        start = np.searchsorted(candles['close_time'], close_time, side='right')
+        return np.array(candles[start:])
+
+    def last_close_time(self, symbol, interval):
+        candles = self.read(symbol, interval)
+        return int(candles[-1]['close_time']) if len(candles) else None
+
+    def append(self, symbol, interval, rows):
+        """Append closed kline rows newer than the last stored candle
+
+        Args:
+            rows (list): Kline rows (open_time, open, high, low, close, volume, close_time, ...)
+
+        Returns:
+            numpy.ndarray: The records actually appended
+        """
+        with self._lock(symbol, interval):
+            last = self.last_close_time(symbol, interval)
+            records = np.array(
+                [tuple(row[:7]) for row in rows if last is None or int(row[6]) > last],
+                dtype=CANDLE_DTYPE
+            )
+            if len(records):
+                path = self.path(symbol, interval)
+                size = os.path.getsize(path) if os.path.exists(path) else 0
+                with open(path, 'ab') as f:
+                    # Drop a torn record left by an interrupted append
+                    f.truncate(size - size % CANDLE_DTYPE.itemsize)
+                    f.write(records.tobytes())
+            return records
+
+    def sync(self, symbol, interval, now_ms=None):
+        """Download and store the candles closed since the last stored one
+
+        Returns:
+            numpy.ndarray: Newly stored candles (empty when offline or up to date)
+        """
+        if self.fetcher is None:
+            return np.empty(0, dtype=CANDLE_DTYPE)
+
+        if now_ms is None:
+            now_ms = int(time.time() * 1000)
+        last = self.last_close_time(symbol, interval)
+        if last is not None and now_ms <= last + INTERVAL_MS[interval]:
+            return np.empty(0, dtype=CANDLE_DTYPE)
+
+        appended = []
+        if last is None:
+            rows = self.fetcher(symbol, interval, None, self.history)
+            appended.append(self.append(symbol, interval, [row for row in rows if int(row[6]) < now_ms]))
+        else:
+            start_time = last + 1
+            while True:
+                rows = self.fetcher(symbol, interval, start_time, self.page_size)
+                closed = [row for row in rows if int(row[6]) < now_ms]
+                appended.append(self.append(symbol, interval, closed))
+                if len(rows) < self.page_size or not closed:
+                    break
+                start_time = int(closed[-1][6]) + 1
+
+        new = np.concatenate(appended) if appended else np.empty(0, dtype=CANDLE_DTYPE)
+        if len(new):
+            logger.info(f"Stored {len(new)} new {interval} candles for {symbol}")
+        return new
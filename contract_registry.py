@@ -0,0 +1,159 @@
+import json
+import logging
+import os
+import threading
+import time
+from decimal import Decimal, ROUND_DOWN, ROUND_HALF_UP
+
+logger = logging.getLogger(__name__)
+
+
+class ContractSpec:
+    """Trading rules of one futures contract"""
+
+    __slots__ = ('symbol', 'tick_size', 'size_step', 'min_size')
+
+    def __init__(self, symbol, tick_size, size_step, min_size):
+        self.symbol = symbol
+        self.tick_size = tick_size
+        self.size_step = size_step
+        self.min_size = min_size
+
+    @classmethod
+    def from_contract(cls, contract):
+        """Build from a MarketApi.contracts entry
+
+        The price tick is priceEndStep * 10^-pricePlace; sizes are multiples of
+        sizeMultiplier (volumePlace decimals) and at least minTradeNum.
+        """
+        price_place = int(contract.get('pricePlace', 0))
+        price_end_step = Decimal(str(contract.get('priceEndStep', 1)))
+        size_step = Decimal(str(contract.get('sizeMultiplier') or 0))
+        if size_step <= 0:
+            size_step = Decimal(1).scaleb(-int(contract.get('volumePlace', 0)))
+        return cls(
+            contract['symbol'],
+            price_end_step.scaleb(-price_place),
+            size_step,
+            Decimal(str(contract.get('minTradeNum') or 0))
+        )
+
+    def quantize_price(self, price, rounding=ROUND_HALF_UP):
+        """Round price to a multiple of the tick size
+
+        Returns:
+            str: Price as sent to the API
+        """
+        ticks = (Decimal(str(price)) / self.tick_size).to_integral_value(rounding=rounding)
+        return str((ticks * self.tick_size).quantize(self.tick_size))
+
+    def quantize_size(self, size):
+        """Floor size to a multiple of the size step
+
+        Returns:
+            str: Size as sent to the API ('0' if it is below the minimum trade size)
+        """
+        steps = (Decimal(str(size)) / self.size_step).to_integral_value(rounding=ROUND_DOWN)
+        quantized = (steps * self.size_step).quantize(self.size_step)
+        if quantized < self.min_size or quantized <= 0:
+            return '0'
+        return str(quantized)
+
+
+class ContractRegistry:
+    """Contract specs by symbol, cached on disk and refreshed periodically
+
+    Specs are loaded from the disk cache when it is younger than
+    refresh_interval, otherwise from the exchange. If the exchange cannot be
+    reached, a stale cache is still used; with no cache at all the failure is
+    remembered for failure_ttl seconds, so lookups in the meantime return None
+    instead of each fetching the contract list again.
+    """
+
+    def __init__(self, fetch_contracts, cache_path='data/contracts.json', refresh_interval=3600,
+                 failure_ttl=30):
+        """
+        Args:
+            fetch_contracts (callable): Returns the MarketApi.contracts response
+            cache_path (str): JSON file the raw contract list is cached in
+            refresh_interval (float): Seconds after which the contract list is reloaded
+            failure_ttl (float): Seconds a failed load without any cached specs is not retried
+        """
+        self.fetch_contracts = fetch_contracts
+        self.cache_path = cache_path
+        self.refresh_interval = float(refresh_interval)
+        self.failure_ttl = float(failure_ttl)
+        self._lock = threading.Lock()
+        self._specs = {}
+        self._loaded_at = 0.0
+        self._failed_at = None
+
+    def _failing(self):
+        return not self._specs and self._failed_at is not None \
+            and time.monotonic() - self._failed_at < self.failure_ttl
+
+    def _build(self, contracts):
+        specs = {}
+        for contract in contracts:
+            try:
+                specs[contract['symbol']] = ContractSpec.from_contract(contract)
+            except (KeyError, TypeError, ValueError, ArithmeticError) as e:
+                logger.warning(f"Skipping contract {contract.get('symbol')}: {str(e)}")
+        return specs
+
+    def _read_cache(self):
+        try:
+            with open(self.cache_path, 'r') as f:
+                return json.load(f), os.path.getmtime(self.cache_path)
+        except (OSError, ValueError):
+            return None, 0.0
+
+    def _write_cache(self, contracts):
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(contracts, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def refresh(self, force=False):
+        """Load the contract list from the disk cache or the exchange
+
+        Returns:
+            int: Number of known contracts
+        """
+        with self._lock:
+            if not force and self._specs and time.time() - self._loaded_at < self.refresh_interval:
+                return len(self._specs)
+            if not force and self._failing():
+                # Bekleyen diğer çağıranlar aynı başarısız isteği tekrarlamasın
+                return 0
+
+            contracts, cached_at = self._read_cache()
+            if not force and contracts and time.time() - cached_at < self.refresh_interval:
+                self._specs = self._build(contracts)
+                self._loaded_at = cached_at
+                return len(self._specs)
+
+            try:
+                fetched = self.fetch_contracts().get('data') or []
+                if fetched:
+                    contracts = fetched
+                    self._write_cache(contracts)
+                    logger.info(f"Loaded {len(contracts)} contracts from the exchange")
+            except Exception as e:
+                logger.error(f"Contract list refresh failed: {str(e)}")
+
+            if contracts:
+                self._specs = self._build(contracts)
+                # A failed refresh on a stale cache is retried after refresh_interval, not on every lookup
+                self._loaded_at = time.time()
+                self._failed_at = None
+            elif not self._specs:
+                self._failed_at = time.monotonic()
+                logger.warning(f"No contract specs available, retrying in {self.failure_ttl:.0f}s")
+            return len(self._specs)
+
+    def get(self, symbol):
+        """Spec of symbol (e.g. 'BTCUSDT_UMCBL'), None if unknown"""
+        if (not self._specs or time.time() - self._loaded_at >= self.refresh_interval) and not self._failing():
+            self.refresh()
+        return self._specs.get(symbol)
@@ -0,0 +1,119 @@
+import logging
+import threading
+import time
+
+from bitget.exceptions import BitgetAPIException
+
+logger = logging.getLogger(__name__)
+
+# Bitget codes meaning "this endpoint does not exist / is not available for this account"
+UNSUPPORTED_ENDPOINT_CODES = {'40404'}
+
+
+class EndpointRegistry:
+    """Learns which endpoint works for a capability and skips known-bad ones
+
+    Handler methods that try several endpoints in sequence (positions, balance)
+    ask the registry for a plan: the endpoint that last answered comes first and
+    endpoints that reported "not found" are skipped until their TTL expires.
+    Transient errors (network, rate limit, 5xx) never mark an endpoint as bad.
+    """
+
+    def __init__(self, negative_ttl=600):
+        """
+        Args:
+            negative_ttl (float): Seconds a failed endpoint is skipped
+        """
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._preferred = {}
+        self._bad_until = {}
+        self._counters = {}
+
+    def _counter(self, capability):
+        counter = self._counters.get(capability)
+        if counter is None:
+            counter = {'polls': 0, 'requests': 0, 'hits': 0, 'misses': 0, 'skipped': 0, 'failures': 0}
+            self._counters[capability] = counter
+        return counter
+
+    def plan(self, capability, endpoints, sticky=True):
+        """Order endpoints for one lookup
+
+        Args:
+            capability (str): What the endpoints provide (e.g. 'positions')
+            endpoints (list): Candidate dicts with at least a 'path' key, in fallback order
+            sticky (bool): Try the endpoint that last answered first; False keeps the
+                fallback order (for fallbacks with a narrower scope than the first endpoint)
+
+        Returns:
+            list: Endpoints to try, known-good first, known-bad removed
+        """
+        now = time.monotonic()
+        with self._lock:
+            counter = self._counter(capability)
+            counter['polls'] += 1
+            preferred = self._preferred.get(capability) if sticky else endpoints[0]['path']
+
+            plan = []
+            for endpoint in sorted(endpoints, key=lambda e: e['path'] != preferred):
+                bad_until = self._bad_until.get(endpoint['path'])
+                if bad_until is not None:
+                    if bad_until > now:
+                        counter['skipped'] += 1
+                        continue
+                    del self._bad_until[endpoint['path']]
+                plan.append(endpoint)
+
+            if plan and plan[0]['path'] == preferred:
+                counter['hits'] += 1
+            else:
+                counter['misses'] += 1
+            return plan
+
+    def record_success(self, capability, path, sticky=True):
+        """Remember that path answered for capability (as the preferred endpoint if sticky)"""
+        with self._lock:
+            self._counter(capability)['requests'] += 1
+            if sticky:
+                self._preferred[capability] = path
+            self._bad_until.pop(path, None)
+
+    def record_failure(self, capability, path, error):
+        """Count a failed request; mark path bad if the exchange says it is unsupported"""
+        with self._lock:
+            counter = self._counter(capability)
+            counter['requests'] += 1
+            counter['failures'] += 1
+            if not self.is_unsupported(error):
+                return
+            self._bad_until[path] = time.monotonic() + self.negative_ttl
+            if self._preferred.get(capability) == path:
+                del self._preferred[capability]
+        logger.info(f"Endpoint {path} marked unavailable for {capability} for {self.negative_ttl}s")
+
+    @staticmethod
+    def is_unsupported(error):
+        if not isinstance(error, BitgetAPIException):
+            return False
+        return str(error.code) in UNSUPPORTED_ENDPOINT_CODES or error.status_code == 404
+
+    def stats(self):
+        """Counters per capability plus the current preferred and skipped endpoints"""
+        now = time.monotonic()
+        with self._lock:
+            capabilities = {}
+            for capability, counter in self._counters.items():
+                polls = counter['polls']
+                capabilities[capability] = dict(
+                    counter,
+                    preferred=self._preferred.get(capability),
+                    requests_per_poll=round(counter['requests'] / polls, 3) if polls else 0.0
+                )
+            return {
+                'capabilities': capabilities,
+                'unavailable': {
+                    path: round(until - now, 1)
+                    for path, until in self._bad_until.items() if until > now
+                }
+            }
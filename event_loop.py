@@ -0,0 +1,166 @@
+import asyncio
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundLoop:
+    """One asyncio event loop running in a dedicated daemon thread
+
+    Coroutines are scheduled from any thread with submit(), which returns a
+    concurrent.futures.Future, so callers pay no loop setup per call and
+    never run a loop inside a Flask request or monitor thread. stop() runs
+    the shutdown hooks (newest first), cancels what is still pending, closes
+    the loop's aiohttp session and ends the thread; it is registered with
+    atexit when the loop starts.
+    """
+
+    def __init__(self, name="async-loop"):
+        """
+        Args:
+            name (str): Name of the loop thread
+        """
+        self.name = name
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._hooks = []
+        self._closing = False
+        self._stopping = False
+        self._counts = {'submitted': 0, 'completed': 0, 'failed': 0, 'cancelled': 0}
+
+    @property
+    def loop(self):
+        """The running asyncio loop (started on first use)"""
+        if self._thread is None:
+            self.start()
+        return self._loop
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return self
+            ready = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(ready,), name=self.name, daemon=True)
+            self._thread.start()
+        ready.wait()
+        atexit.register(self.stop)
+        logger.info(f"Background event loop '{self.name}' started")
+        return self
+
+    def _run(self, ready):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(ready.set)
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    def in_loop_thread(self):
+        """True when called from the loop thread itself"""
+        return threading.current_thread() is self._thread
+
+    def submit(self, coro):
+        """Schedule a coroutine on the loop from any thread
+
+        Returns:
+            concurrent.futures.Future: Result of the coroutine
+
+        Raises:
+            RuntimeError: If the loop was stopped
+        """
+        loop = self.loop
+        if self._stopping:
+            coro.close()
+            raise RuntimeError(f"Event loop '{self.name}' is stopped")
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        with self._lock:
+            self._counts['submitted'] += 1
+        future.add_done_callback(self._done)
+        return future
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the loop and wait for its result (not from the loop thread)"""
+        if self.in_loop_thread():
+            coro.close()
+            raise RuntimeError("BackgroundLoop.run() would block its own loop; await the coroutine instead")
+        return self.submit(coro).result(timeout)
+
+    def call_soon(self, callback, *args):
+        """Call a plain function on the loop thread (thread-safe)"""
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def add_shutdown_hook(self, hook):
+        """Register a callable run by stop(); it may return an awaitable that is awaited on the loop"""
+        with self._lock:
+            self._hooks.append(hook)
+
+    def _done(self, future):
+        with self._lock:
+            if future.cancelled():
+                self._counts['cancelled'] += 1
+            elif future.exception() is not None:
+                self._counts['failed'] += 1
+            else:
+                self._counts['completed'] += 1
+
+    def stop(self, timeout=10.0):
+        """Run the shutdown hooks, cancel pending tasks and stop the loop thread"""
+        with self._lock:
+            if self._thread is None or self._closing:
+                return
+            self._closing = True
+            hooks = list(reversed(self._hooks))
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(hooks), self._loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"Event loop '{self.name}' shutdown incomplete: {str(e)}")
+        self._stopping = True
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        logger.info(f"Background event loop '{self.name}' stopped")
+
+    async def _shutdown(self, hooks):
+        for hook in hooks:
+            try:
+                result = hook()
+                if asyncio.iscoroutine(result) or isinstance(result, asyncio.Future):
+                    await result
+            except Exception as e:
+                logger.error(f"Shutdown hook failed: {str(e)}")
+        current = asyncio.current_task()
+        pending = [task for task in asyncio.all_tasks() if task is not current and not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        from bitget.async_client import close_async_session
+        await close_async_session()
+
+    def metrics(self):
+        with self._lock:
+            counts = dict(self._counts)
+        counts['pending'] = counts['submitted'] - counts['completed'] - counts['failed'] - counts['cancelled']
+        counts['running'] = self._thread is not None and self._thread.is_alive() and not self._stopping
+        return counts
+
+
+_default_loop = None
+_default_lock = threading.Lock()
+
+
+def get_loop():
+    """Shared BackgroundLoop of the application (started on first use)"""
+    global _default_loop
+    with _default_lock:
+        if _default_loop is None:
+            _default_loop = BackgroundLoop()
+        return _default_loop
+
+
+def submit(coro):
+    """Schedule a coroutine on the shared loop; returns a concurrent.futures.Future"""
+    return get_loop().submit(coro)
@@ -0,0 +1,141 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def _to_leverage(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class LeverageCache:
+    """Exchange leverage known per (symbol, holdSide, marginMode)
+
+    The state is seeded from account data and kept up to date from setLeverage
+    responses and position reports. ensure() only calls setLeverage when the
+    wanted leverage differs from the known one, so in the steady state placing
+    an order needs no leverage request at all.
+    """
+
+    def __init__(self, fetch_account, set_leverage):
+        """
+        Args:
+            fetch_account (callable): fetch_account(symbol) -> account/account response
+            set_leverage (callable): set_leverage(symbol, hold_side, leverage) -> setLeverage response
+        """
+        self.fetch_account = fetch_account
+        self.set_leverage = set_leverage
+        self._lock = threading.Lock()
+        self._leverage = {}
+        self._margin_mode = {}
+        self._hits = 0
+        self._sets = 0
+        self._seeds = 0
+
+    def _record(self, symbol, hold_side, margin_mode, leverage):
+        leverage = _to_leverage(leverage)
+        if leverage is None:
+            return
+        with self._lock:
+            self._margin_mode[symbol] = margin_mode
+            self._leverage[(symbol, hold_side, margin_mode)] = leverage
+
+    def get(self, symbol, hold_side):
+        """Known leverage of symbol/hold_side in its current margin mode, or None"""
+        with self._lock:
+            margin_mode = self._margin_mode.get(symbol)
+            return self._leverage.get((symbol, hold_side, margin_mode))
+
+    def seed(self, symbol):
+        """Load margin mode and leverage of symbol from the account endpoint
+
+        Returns:
+            str: Margin mode ('crossed' or 'fixed'), None if the account could not be read
+        """
+        try:
+            data = self.fetch_account(symbol).get('data') or {}
+        except Exception as e:
+            logger.error(f"Could not seed leverage for {symbol}: {str(e)}")
+            return None
+
+        margin_mode = data.get('marginMode', 'crossed')
+        if margin_mode == 'crossed':
+            self._record(symbol, 'long', margin_mode, data.get('crossMarginLeverage'))
+            self._record(symbol, 'short', margin_mode, data.get('crossMarginLeverage'))
+        else:
+            self._record(symbol, 'long', margin_mode, data.get('fixedLongLeverage'))
+            self._record(symbol, 'short', margin_mode, data.get('fixedShortLeverage'))
+        with self._lock:
+            self._margin_mode[symbol] = margin_mode
+            self._seeds += 1
+        logger.info(f"Leverage seeded for {symbol} ({margin_mode}): "
+                    f"long={self.get(symbol, 'long')}, short={self.get(symbol, 'short')}")
+        return margin_mode
+
+    def prime(self, symbol):
+        """Seed symbol unless its state is known; reads the account, never sets leverage"""
+        if symbol not in self._margin_mode:
+            self.seed(symbol)
+
+    def observe_position(self, position):
+        """Take leverage and margin mode reported for an open position"""
+        symbol = position.get('symbol')
+        hold_side = position.get('holdSide')
+        if not symbol or hold_side not in ('long', 'short'):
+            return
+        margin_mode = position.get('marginMode') or self._margin_mode.get(symbol, 'crossed')
+        leverage = _to_leverage(position.get('leverage'))
+        if leverage is not None and leverage != self.get(symbol, hold_side):
+            logger.info(f"Exchange reports {leverage}x for {symbol} {hold_side} ({margin_mode})")
+        self._record(symbol, hold_side, margin_mode, leverage)
+
+    def ensure(self, symbol, hold_side, leverage):
+        """Make sure symbol/hold_side trades at leverage
+
+        Returns:
+            bool: True if setLeverage was called
+        """
+        leverage = int(leverage)
+        if symbol not in self._margin_mode:
+            self.seed(symbol)
+
+        if self.get(symbol, hold_side) == leverage:
+            with self._lock:
+                self._hits += 1
+            return False
+
+        response = self.set_leverage(symbol, hold_side, leverage)
+        data = (response or {}).get('data') or {}
+        margin_mode = data.get('marginMode') or self._margin_mode.get(symbol, 'crossed')
+        if 'longLeverage' in data or 'shortLeverage' in data:
+            self._record(symbol, 'long', margin_mode, data.get('longLeverage'))
+            self._record(symbol, 'short', margin_mode, data.get('shortLeverage'))
+        else:
+            self._record(symbol, hold_side, margin_mode, leverage)
+        with self._lock:
+            self._sets += 1
+        logger.info(f"Leverage {leverage}x set for {symbol} {hold_side}: {response}")
+        return True
+
+    def invalidate(self, symbol=None):
+        """Forget the state of one symbol (or all); the next ensure() re-seeds it"""
+        with self._lock:
+            if symbol is None:
+                self._leverage.clear()
+                self._margin_mode.clear()
+            else:
+                self._margin_mode.pop(symbol, None)
+                for key in [key for key in self._leverage if key[0] == symbol]:
+                    del self._leverage[key]
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'symbols': len(self._margin_mode),
+                'hits': self._hits,
+                'sets': self._sets,
+                'seeds': self._seeds
+            }
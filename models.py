@@ -23,6 +23,8 @@ class Config:
         self.atr_tp_multiplier = kwargs.get('atr_tp_multiplier', 2.5)
         self.atr_sl_multiplier = kwargs.get('atr_sl_multiplier', 3.0)
         self.auto_position_switch = kwargs.get('auto_position_switch', True)
+        self.signal_workers = kwargs.get('signal_workers', 2)
+        self.signal_max_age = kwargs.get('signal_max_age', 300)
 
     def to_dict(self):
         return {
@@ -40,7 +42,9 @@ class Config:
             'atr_period': self.atr_period,
             'atr_tp_multiplier': self.atr_tp_multiplier,
             'atr_sl_multiplier': self.atr_sl_multiplier,
-            'auto_position_switch': self.auto_position_switch
+            'auto_position_switch': self.auto_position_switch,
+            'signal_workers': self.signal_workers,
+            'signal_max_age': self.signal_max_age
         }
         
     @staticmethod
@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+
+from event_loop import get_loop
+
+logger = logging.getLogger(__name__)
+
+# Telegram allows about one message per second to a chat and 20 per minute to a group
+PRIVATE_CHAT_INTERVAL = 1.0
+GROUP_CHAT_INTERVAL = 3.0
+MAX_MESSAGE_LENGTH = 4096
+
+
+def normalize_chat_id(chat_id):
+    """Group IDs starting with 100 must be sent as negative numbers"""
+    chat_id = str(chat_id).strip()
+    if chat_id.isdigit() and chat_id.startswith("100"):
+        return "-" + chat_id
+    return chat_id
+
+
+def split_text(text, limit=MAX_MESSAGE_LENGTH):
+    """Split text into chunks under the Telegram message limit, on line breaks where possible"""
+    chunks = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit)
+        if cut <= 0:
+            cut = limit
+        chunks.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+    if text:
+        chunks.append(text)
+    return chunks
+
+
+class TelegramNotifier:
+    """Queued Telegram sender with one persistent bot session
+
+    notify() only appends to an in-memory queue and returns; a worker task
+    on the shared background loop (event_loop.py) keeps one initialized
+    telegram.Bot and sends at most one message per chat interval
+    (PRIVATE_CHAT_INTERVAL, or GROUP_CHAT_INTERVAL for group chats). Messages queued while it waits are
+    coalesced into one digest message (split at the 4096 character limit).
+    A RetryAfter from Telegram pauses the worker for the requested time
+    and the batch is retried.
+    """
+
+    def __init__(self, credentials, max_queue=1000, max_batch=20, max_attempts=3, sender=None, loop=None):
+        """
+        Args:
+            credentials (callable): Returns (bot_token, chat_id); read before every send
+            max_queue (int): Queued messages kept; the oldest are dropped beyond it
+            max_batch (int): Messages coalesced into one digest at most
+            max_attempts (int): Send attempts of a batch before it is dropped
+            sender (callable, optional): async sender(token, chat_id, text) replacing the bot (tests)
+            loop (BackgroundLoop, optional): Loop the worker runs on (default: the shared loop)
+        """
+        self.credentials = credentials
+        self.max_batch = max(1, int(max_batch))
+        self.max_attempts = max(1, int(max_attempts))
+        self._sender = sender
+        self._queue = deque()
+        self._max_queue = max(1, int(max_queue))
+        self._lock = threading.Lock()
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._wakeup_pending = False
+        self._worker_future = None
+        self._stopping = False
+        self._bot = None
+        self._bot_token = None
+        self._next_send = 0.0
+        self._counts = {'queued': 0, 'sent': 0, 'messages_sent': 0, 'digests': 0,
+                        'dropped': 0, 'errors': 0, 'retry_after': 0}
+
+    def start(self):
+        """Start the worker on the background loop (also done by the first notify())"""
+        with self._lock:
+            if self._worker_future is not None:
+                return self
+            if self._loop is None:
+                self._loop = get_loop()
+            self._worker_future = self._loop.submit(self._worker())
+        # Uygulama kapanırken kuyrukta kalanlar döngü durmadan önce gönderilir
+        self._loop.add_shutdown_hook(self._drain)
+        return self
+
+    def notify(self, message):
+        """Queue a message; never waits on Telegram
+
+        Returns:
+            bool: False if the message was not queued (notifier stopped)
+        """
+        if self._worker_future is None:
+            self.start()
+        with self._lock:
+            if self._stopping:
+                return False
+            if len(self._queue) >= self._max_queue:
+                self._queue.popleft()
+                self._counts['dropped'] += 1
+            self._queue.append(str(message))
+            self._counts['queued'] += 1
+            wake = not self._wakeup_pending
+            self._wakeup_pending = True
+        if wake:
+            self._loop.call_soon(self._wakeup.set)
+        return True
+
+    def stop(self, timeout=5.0):
+        """Send what is queued (waiting at most timeout seconds) and stop the worker"""
+        with self._lock:
+            if self._worker_future is None or self._stopping:
+                return
+            self._stopping = True
+        self._loop.call_soon(self._wakeup.set)
+        try:
+            self._worker_future.result(timeout)
+        except Exception as e:
+            logger.warning(f"Telegram notifier did not finish sending: {str(e)}")
+
+    async def _drain(self, timeout=5.0):
+        with self._lock:
+            self._stopping = True
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(asyncio.wrap_future(self._worker_future), timeout)
+        except Exception as e:
+            logger.warning(f"Telegram notifier did not finish sending: {str(e)}")
+
+    def _take_batch(self):
+        with self._lock:
+            batch = [self._queue.popleft() for _ in range(min(self.max_batch, len(self._queue)))]
+            if not self._queue:
+                self._wakeup_pending = False
+                self._wakeup.clear()
+            return batch
+
+    async def _worker(self):
+        while True:
+            await self._wakeup.wait()
+            with self._lock:
+                if self._stopping and not self._queue:
+                    break
+            # Tempo: bir sonraki gönderim zamanına kadar bekle, bu sırada gelenler özet olarak birleşir
+            delay = self._next_send - time.monotonic()
+            if delay > 0 and not self._stopping:
+                await asyncio.sleep(delay)
+            batch = self._take_batch()
+            if batch:
+                await self._send_batch(batch)
+        await self._close_bot()
+
+    async def _send_batch(self, batch):
+        token, chat_id = self.credentials()
+        if not token or not chat_id:
+            with self._lock:
+                self._counts['dropped'] += len(batch)
+            return
+        chat_id = normalize_chat_id(chat_id)
+        interval = GROUP_CHAT_INTERVAL if chat_id.startswith("-") else PRIVATE_CHAT_INTERVAL
+        if len(batch) == 1:
+            text = batch[0]
+        else:
+            text = f"📋 {len(batch)} notifications\n\n" + "\n\n".join(batch)
+
+        for index, chunk in enumerate(split_text(text)):
+            if index:
+                await asyncio.sleep(interval)
+            if not await self._send_chunk(token, chat_id, chunk, interval):
+                with self._lock:
+                    self._counts['dropped'] += len(batch)
+                return
+
+        with self._lock:
+            self._counts['messages_sent'] += len(batch)
+            if len(batch) > 1:
+                self._counts['digests'] += 1
+        logger.info(f"Telegram notification sent ({len(batch)} message{'s' if len(batch) > 1 else ''})")
+
+    async def _send_chunk(self, token, chat_id, text, interval):
+        """Send one message, retrying after errors and RetryAfter
+
+        Returns:
+            bool: True if it was sent
+        """
+        attempt = 0
+        while attempt < self.max_attempts:
+            try:
+                await self._send(token, chat_id, text)
+                with self._lock:
+                    self._counts['sent'] += 1
+                return True
+            except Exception as e:
+                retry_after = getattr(e, 'retry_after', None)
+                if retry_after is not None:
+                    # Telegram'ın istediği kadar bekle; bu bir deneme sayılmaz
+                    seconds = retry_after.total_seconds() if hasattr(retry_after, 'total_seconds') else float(retry_after)
+                    with self._lock:
+                        self._counts['retry_after'] += 1
+                    logger.warning(f"Telegram rate limit, retrying in {seconds}s")
+                    await asyncio.sleep(seconds)
+                    continue
+                attempt += 1
+                with self._lock:
+                    self._counts['errors'] += 1
+                logger.error(f"Failed to send Telegram notification (attempt {attempt}): {str(e)}")
+                if attempt < self.max_attempts:
+                    await asyncio.sleep(interval)
+            finally:
+                self._next_send = time.monotonic() + interval
+        logger.error(f"Telegram bilgilerinizi kontrol edin. Bot token: {token[:5]}... ve Chat ID: {chat_id}")
+        return False
+
+    async def _send(self, token, chat_id, text):
+        if self._sender is not None:
+            await self._sender(token, chat_id, text)
+            return
+        if self._bot is None or self._bot_token != token:
+            await self._close_bot()
+            from telegram import Bot
+            self._bot = Bot(token=token)
+            await self._bot.initialize()
+            self._bot_token = token
+        await self._bot.send_message(chat_id=chat_id, text=text)
+
+    async def _close_bot(self):
+        if self._bot is not None:
+            try:
+                await self._bot.shutdown()
+            except Exception as e:
+                logger.warning(f"Telegram bot shutdown failed: {str(e)}")
+            self._bot = None
+            self._bot_token = None
+
+    def metrics(self):
+        with self._lock:
+            return dict(self._counts, pending=len(self._queue))
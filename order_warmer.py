@@ -0,0 +1,227 @@
+import logging
+import threading
+import time
+
+from pretrade import PreTradeSnapshot
+
+logger = logging.getLogger(__name__)
+
+OPEN_SIDES = ('open_long', 'open_short')
+
+
+class OrderTemplate:
+    """Prebuilt placeOrder parameters of one symbol/side (without clientOid)"""
+
+    __slots__ = ('symbol', 'side', 'params', 'price', 'built_at', 'config_key')
+
+    def __init__(self, symbol, side, params, price, built_at, config_key):
+        self.symbol = symbol
+        self.side = side
+        self.params = params
+        self.price = price
+        self.built_at = built_at
+        self.config_key = config_key
+
+    def age(self):
+        return time.monotonic() - self.built_at
+
+
+class OrderWarmer:
+    """Keeps the order path of the warm symbols ready in the background
+
+    Every interval the warmer reads what a cold order needs (open positions,
+    balance, price, ATR, contract precision, leverage state) and prebuilds the
+    open_long/open_short parameters of every warm symbol through
+    BitgetHandler.build_order_params. A signal then only fills in a clientOid
+    and sends one signed POST, and the polling keeps the HTTP connection warm.
+    Placing any order changes balance and positions, so it invalidates all
+    templates and wakes the warmer.
+
+    Warming only reads: leverage is never set (the order path does that with
+    BitgetHandler.ensure_leverage), and a failed position, balance or price
+    read leaves no template or snapshot behind instead of building one from
+    placeholder values. Nothing is read while armed() is False.
+    """
+
+    def __init__(self, handler, interval=2.0, max_age=5.0):
+        """
+        Args:
+            handler (BitgetHandler): Handler used for reads and order building
+            interval (float): Seconds between refreshes
+            max_age (float): Seconds a template or warm snapshot stays usable
+        """
+        self.handler = handler
+        self.interval = float(interval)
+        self.max_age = float(max_age)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._generation = 0
+        self._templates = {}
+        self._state = {}
+        self._positions = None
+        self._hits = 0
+        self._misses = 0
+        self._refreshes = 0
+        self._errors = 0
+        self._last_refresh_ms = None
+
+    def symbols(self):
+        """Warm symbols in Bitget format (config 'warm_symbols', none by default)"""
+        symbols = self.handler.config.get('warm_symbols') or []
+        if isinstance(symbols, str):
+            symbols = [symbol.strip() for symbol in symbols.split(',') if symbol.strip()]
+        return [symbol if symbol.endswith('_UMCBL') else f"{symbol}_UMCBL" for symbol in symbols]
+
+    def armed(self):
+        """True if API credentials are set and at least one warm symbol is configured"""
+        return bool(self.handler.api_key and self.handler.secret_key and self.handler.passphrase) \
+            and bool(self.symbols())
+
+    def _config_key(self):
+        config = self.handler.config
+        return (
+            config.get('leverage'), config.get('order_size_percentage'), config.get('atr_period'),
+            config.get('atr_tp_multiplier'), config.get('atr_sl_multiplier')
+        )
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="order-warmer", daemon=True)
+            self._thread.start()
+            logger.info(f"Order warmer started for {self.symbols()} (every {self.interval}s)")
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                with self._lock:
+                    self._errors += 1
+                logger.error(f"Order warmer refresh failed: {str(e)}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _clear(self):
+        with self._lock:
+            self._templates = {}
+            self._state = {}
+            self._positions = None
+
+    def refresh(self):
+        """Re-read account and market state and rebuild every template
+
+        Returns:
+            bool: True if the templates were replaced
+        """
+        if not self.armed():
+            self._clear()
+            return False
+
+        started = time.monotonic()
+        with self._lock:
+            generation = self._generation
+        config_key = self._config_key()
+        atr_period = int(self.handler.config.get('atr_period', 14))
+
+        try:
+            positions = self.handler.get_open_positions(raise_errors=True)
+        except Exception:
+            # Eksik pozisyon listesiyle ısınmış snapshot sunulmamalı
+            self._clear()
+            raise
+        balance, _, _ = self.handler.get_account_balance('USDT')
+        if balance <= 0:
+            # Okunamayan bakiye 0 döner; sahte bakiyeyle şablon hazırlanmaz
+            self._clear()
+            logger.warning("Order warmer could not read the balance, no warm templates")
+            return False
+
+        templates = {}
+        state = {}
+        for symbol in self.symbols():
+            price = self.handler.get_symbol_price(symbol)
+            if price <= 0:
+                continue
+            atr = self.handler.get_atr(symbol, atr_period)
+            if atr <= 0:
+                continue
+            state[symbol] = (price, atr)
+            self.handler.leverage_cache.prime(symbol)
+            for side in OPEN_SIDES:
+                try:
+                    params = self.handler.build_order_params(symbol, side, balance=balance, price=price, atr=atr,
+                                                             ensure_leverage=False)
+                except ValueError as e:
+                    logger.warning(f"No warm {side} template for {symbol}: {str(e)}")
+                    continue
+                templates[(symbol, side)] = OrderTemplate(symbol, side, params, price, started, config_key)
+
+        with self._lock:
+            # An order placed while this refresh was running made its reads stale
+            if generation != self._generation:
+                return False
+            self._templates = templates
+            self._state = {symbol: (price, atr, balance) for symbol, (price, atr) in state.items()}
+            self._positions = (positions, started)
+            self._refreshes += 1
+            self._last_refresh_ms = round((time.monotonic() - started) * 1000, 2)
+        return True
+
+    def invalidate(self):
+        """Drop all templates (an order was placed) and refresh as soon as possible"""
+        with self._lock:
+            self._generation += 1
+            self._templates = {}
+            self._state = {}
+            self._positions = None
+        self._wake.set()
+
+    def template(self, symbol, side):
+        """Fresh template for symbol/side, None if there is none"""
+        with self._lock:
+            template = self._templates.get((symbol, side))
+            if template is None or template.age() > self.max_age or template.config_key != self._config_key():
+                self._misses += 1
+                return None
+            self._hits += 1
+            return template
+
+    def snapshot(self, symbol):
+        """Pre-trade snapshot served from the warm state, None if it is not fresh
+
+        Returns:
+            PreTradeSnapshot: Positions, balance, price and ATR with observed_at set to
+            the time they were read
+        """
+        formatted_symbol = symbol if symbol.endswith('_UMCBL') else f"{symbol}_UMCBL"
+        with self._lock:
+            if self._positions is None or formatted_symbol not in self._state:
+                return None
+            positions, observed_at = self._positions
+            age = time.monotonic() - observed_at
+            if age > self.max_age:
+                return None
+            price, atr, balance = self._state[formatted_symbol]
+        return PreTradeSnapshot(
+            symbol=symbol, positions=list(positions), balance=balance, price=price, atr=atr,
+            timings={'warm_age': round(age * 1000, 2)}, observed_at=observed_at
+        )
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'symbols': self.symbols(),
+                'templates': len(self._templates),
+                'hits': self._hits,
+                'misses': self._misses,
+                'refreshes': self._refreshes,
+                'errors': self._errors,
+                'last_refresh_ms': self._last_refresh_ms
+            }
@@ -0,0 +1,213 @@
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+FAST = 'fast'
+NORMAL = 'normal'
+IDLE = 'idle'
+BACKOFF = 'backoff'
+
+
+class RequestBudget:
+    """Token bucket of exchange REST requests shared by every caller in the process
+
+    Every request made through the Bitget client is charged to the bucket
+    (see bitget.client.add_request_listener), attributed to the source set
+    by charge() or set_source() on the calling thread: 'monitor', 'dashboard', 'webhook' or
+    'other'. Order and dashboard requests are never held back; they only
+    spend tokens (the balance can go negative), and the position monitor,
+    the one caller that can wait, delays its polls until the bucket refills.
+    """
+
+    def __init__(self, rate=10.0, burst=20):
+        """
+        Args:
+            rate (float): Requests per second the bucket refills with
+            burst (int): Tokens the bucket holds at most
+        """
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._spent = {}
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def set_source(self, source):
+        """Attribute the following requests of this thread to source (None: 'other')"""
+        self._local.source = source
+
+    @contextmanager
+    def charge(self, source):
+        """Attribute the requests made by this thread inside the block to source"""
+        previous = getattr(self._local, 'source', None)
+        self._local.source = source
+        try:
+            yield self
+        finally:
+            self._local.source = previous
+
+    def spend(self, count=1, source=None):
+        """Record requests that were made (never blocks)"""
+        source = source or getattr(self._local, 'source', None) or 'other'
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= count
+            self._spent[source] = self._spent.get(source, 0) + count
+
+    def delay(self, count=1):
+        """Seconds until count tokens are available (0 if they are now)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            missing = count - self._tokens
+        return max(0.0, missing / self.rate) if self.rate > 0 else 0.0
+
+    def metrics(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                'rate': self.rate,
+                'burst': self.burst,
+                'tokens': round(self._tokens, 2),
+                'spent': dict(self._spent),
+                'spent_total': sum(self._spent.values())
+            }
+
+
+class PollScheduler:
+    """Poll interval of the position monitor chosen by risk, errors and the request budget
+
+    With no open position the monitor polls every idle_interval seconds;
+    when any position's price is within near_atr ATRs of its TP, SL or
+    liquidation price it polls every fast_interval, otherwise every
+    normal_interval. After consecutive errors the interval doubles from
+    normal_interval up to max_backoff. Every interval gets +/- jitter and is
+    stretched until the shared RequestBudget has the tokens for the next poll.
+    """
+
+    def __init__(self, budget=None, fast_interval=1.0, normal_interval=5.0, idle_interval=30.0,
+                 max_backoff=120.0, near_atr=1.0, near_ratio=0.005, jitter=0.1, requests_per_poll=1):
+        """
+        Args:
+            budget (RequestBudget, optional): Shared request budget the polls are paced by
+            fast_interval (float): Seconds between polls when a position is near a level
+            normal_interval (float): Seconds between polls with open positions
+            idle_interval (float): Seconds between polls without open positions
+            max_backoff (float): Longest interval after consecutive errors
+            near_atr (float): ATRs from a level counted as near
+            near_ratio (float): Fraction of the price counted as near when the ATR is unknown
+            jitter (float): Random +/- fraction applied to every interval
+            requests_per_poll (int): REST requests one poll is expected to make
+        """
+        self.budget = budget
+        self.fast_interval = float(fast_interval)
+        self.normal_interval = float(normal_interval)
+        self.idle_interval = float(idle_interval)
+        self.max_backoff = float(max_backoff)
+        self.near_atr = float(near_atr)
+        self.near_ratio = float(near_ratio)
+        self.jitter = float(jitter)
+        self.requests_per_poll = requests_per_poll
+        self._lock = threading.Lock()
+        self._mode = IDLE
+        self._errors = 0
+        self._interval = self.idle_interval
+        self._polls = 0
+        self._budget_waits = 0
+
+    @staticmethod
+    def _levels(position):
+        levels = []
+        for field in ('presetTakeProfitPrice', 'presetStopLossPrice', 'liquidationPrice'):
+            try:
+                level = float(position.get(field) or 0)
+            except (TypeError, ValueError):
+                continue
+            if level > 0:
+                levels.append(level)
+        return levels
+
+    def risk_mode(self, positions, atr_of=None):
+        """FAST if a position is near a TP/SL/liquidation level, NORMAL with open positions, else IDLE
+
+        Args:
+            positions (list): Open positions as returned by the API
+            atr_of (callable, optional): atr_of(symbol) -> ATR or None, read without network calls
+        """
+        if not positions:
+            return IDLE
+        for pos in positions:
+            try:
+                price = float(pos.get('marketPrice') or 0)
+            except (TypeError, ValueError):
+                continue
+            if price <= 0:
+                continue
+            atr = atr_of(pos.get('symbol', '')) if atr_of else None
+            near = self.near_atr * atr if atr else self.near_ratio * price
+            if any(abs(price - level) <= near for level in self._levels(pos)):
+                return FAST
+        return NORMAL
+
+    def _jittered(self, interval):
+        return interval * (1 + self.jitter * (2 * random.random() - 1))
+
+    def on_success(self, positions, atr_of=None):
+        """Interval until the next poll after a successful one
+
+        Returns:
+            float: Seconds to wait
+        """
+        mode = self.risk_mode(positions, atr_of)
+        base = {FAST: self.fast_interval, NORMAL: self.normal_interval, IDLE: self.idle_interval}[mode]
+        with self._lock:
+            self._errors = 0
+            self._mode = mode
+        return self._schedule(base)
+
+    def on_error(self):
+        """Interval until the next poll after a failed one (exponential backoff)
+
+        Returns:
+            float: Seconds to wait
+        """
+        with self._lock:
+            self._errors += 1
+            self._mode = BACKOFF
+            errors = self._errors
+        return self._schedule(min(self.max_backoff, self.normal_interval * 2 ** (errors - 1)))
+
+    def _schedule(self, base):
+        interval = self._jittered(base)
+        if self.budget is not None:
+            # Bütçe boşsa dashboard ve webhook isteklerine yer açmak için bekle
+            wait = self.budget.delay(self.requests_per_poll)
+            if wait > interval:
+                interval = wait
+                with self._lock:
+                    self._budget_waits += 1
+        with self._lock:
+            self._polls += 1
+            self._interval = interval
+        return interval
+
+    def metrics(self):
+        with self._lock:
+            data = {
+                'mode': self._mode,
+                'interval': round(self._interval, 3),
+                'errors': self._errors,
+                'polls': self._polls,
+                'budget_waits': self._budget_waits
+            }
+        if self.budget is not None:
+            data['budget'] = self.budget.metrics()
+        return data
@@ -0,0 +1,289 @@
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+from bitget import consts as c
+from bitget.ws.bitget_ws_client import BitgetWsClient, SubscribeReq
+
+logger = logging.getLogger(__name__)
+
+# Private WebSocket position fields -> REST allPosition field names
+WS_POSITION_FIELDS = {
+    'posId': 'positionId',
+    'instId': 'symbol',
+    'upl': 'unrealizedPL',
+    'markPrice': 'marketPrice',
+    'liqPx': 'liquidationPrice',
+}
+
+PRIVATE_CHANNELS = ('positions', 'orders', 'account')
+
+
+def normalize_position(position):
+    """Rename WebSocket position fields to the REST names used across the app"""
+    return {WS_POSITION_FIELDS.get(key, key): value for key, value in position.items()}
+
+
+def position_key(position):
+    """Stable key of a position: symbol:holdSide
+
+    REST allPosition rows carry no positionId while WebSocket pushes do, so the
+    id cannot key a position read from both; an account holds at most one
+    position per symbol and side.
+    """
+    return f"{position.get('symbol', '')}:{(position.get('holdSide') or '').lower()}"
+
+
+class PositionBook:
+    """In-memory open positions, orders and account state fed by private pushes
+
+    Position pushes are merged into the entries they update, so fields only
+    REST returns (the preset TP/SL prices) survive later pushes; a REST
+    reconcile replaces the whole book (used on connect and reconnect, when
+    pushes may have been missed). Readers can block in wait_for_change()
+    instead of polling.
+    """
+
+    def __init__(self, order_history=100):
+        """
+        Args:
+            order_history (int): Number of recent order pushes kept
+        """
+        self._cond = threading.Condition()
+        self._positions = {}
+        self._accounts = {}
+        self._orders = deque(maxlen=order_history)
+        self._version = 0
+        self._pushes = {channel: 0 for channel in PRIVATE_CHANNELS}
+        self._last_push = None
+        self._reconciles = 0
+        self._reconciled_at = None
+
+    @property
+    def version(self):
+        return self._version
+
+    def _changed(self):
+        self._version += 1
+        self._cond.notify_all()
+
+    def apply(self, message):
+        """Apply one decoded private push
+
+        Args:
+            message (dict): Frame with 'arg', 'action' and 'data'
+
+        Returns:
+            bool: True if the message was a private channel push
+        """
+        arg = message.get('arg') or {}
+        channel = arg.get('channel')
+        if channel not in PRIVATE_CHANNELS or 'data' not in message:
+            return False
+        data = message.get('data') or []
+
+        with self._cond:
+            self._pushes[channel] += 1
+            self._last_push = time.time()
+
+            if channel == 'positions':
+                positions = [normalize_position(position) for position in data]
+                previous = self._positions
+                if message.get('action') == 'snapshot':
+                    # A snapshot lists every open position: the ones it leaves out are closed
+                    self._positions = {}
+                for position in positions:
+                    key = position_key(position)
+                    if float(position.get('total') or 0) > 0:
+                        # Push'larda REST'e özgü alanlar (presetTakeProfitPrice, presetStopLossPrice) yok;
+                        # kayıt üzerine yazılmaz, birleştirilir
+                        self._positions[key] = {**previous.get(key, {}), **position}
+                    else:
+                        self._positions.pop(key, None)
+            elif channel == 'account':
+                for account in data:
+                    self._accounts[account.get('marginCoin', 'USDT')] = account
+            else:
+                self._orders.extend(data)
+
+            self._changed()
+        return True
+
+    def reconcile(self, positions):
+        """Replace the book with positions read from REST"""
+        with self._cond:
+            self._positions = {position_key(position): dict(position) for position in positions
+                               if float(position.get('total') or 0) > 0}
+            self._reconciles += 1
+            self._reconciled_at = time.time()
+            self._changed()
+
+    def positions(self):
+        with self._cond:
+            return [dict(position) for position in self._positions.values()]
+
+    def account(self, margin_coin='USDT'):
+        with self._cond:
+            account = self._accounts.get(margin_coin)
+            return dict(account) if account else None
+
+    def recent_orders(self):
+        with self._cond:
+            return list(self._orders)
+
+    def wait_for_change(self, version, timeout=None):
+        """Block until the book is newer than version (or timeout)
+
+        Returns:
+            int: Current version
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._version != version, timeout=timeout)
+            return self._version
+
+    def metrics(self):
+        with self._cond:
+            return {
+                'positions': len(self._positions),
+                'version': self._version,
+                'pushes': dict(self._pushes),
+                'last_push_age': round(time.time() - self._last_push, 1) if self._last_push else None,
+                'reconciles': self._reconciles,
+                'last_reconcile_age': round(time.time() - self._reconciled_at, 1) if self._reconciled_at else None
+            }
+
+
+def replay(path, book):
+    """Feed a recorded message file (one raw frame per line) into a PositionBook
+
+    Returns:
+        int: Number of frames applied to the book
+    """
+    applied = 0
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line == 'pong':
+                continue
+            if book.apply(json.loads(line)):
+                applied += 1
+    return applied
+
+
+class PositionStream:
+    """Private positions/orders/account subscription keeping a PositionBook live
+
+    The book is reconciled from REST once the first connection is up and after
+    every reconnect, since pushes sent while disconnected are lost. The stream
+    only counts as live once a reconcile succeeded; a failed REST read keeps
+    the current book and is retried with backoff.
+    """
+
+    def __init__(self, handler, book=None, url=c.CONTRACT_WS_URL, inst_type='UMCBL',
+                 retry_interval=5.0, max_retry_interval=60.0):
+        """
+        Args:
+            handler (BitgetHandler): Credentials and REST reconciliation
+            book (PositionBook, optional): Book to feed, a new one by default
+            url (str): Private WebSocket URL
+            inst_type (str): Product type of the subscriptions
+            retry_interval (float): Seconds before a failed reconcile is retried (doubles per failure)
+            max_retry_interval (float): Longest wait between reconcile retries
+        """
+        self.handler = handler
+        self.book = book or PositionBook()
+        self.url = url
+        self.channels = [SubscribeReq(inst_type, channel, 'default') for channel in PRIVATE_CHANNELS]
+        self.retry_interval = float(retry_interval)
+        self.max_retry_interval = float(max_retry_interval)
+        self._client = None
+        self._live = threading.Event()
+        self._reconciled = threading.Event()
+        self._reconcile_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Connect and subscribe in the background"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._connect, name="position-stream", daemon=True)
+            self._thread.start()
+        return self
+
+    def _connect(self):
+        try:
+            self._client = BitgetWsClient(self.url, need_login=True) \
+                .api_key(self.handler.api_key) \
+                .api_secret_key(self.handler.secret_key) \
+                .passphrase(self.handler.passphrase) \
+                .error_listener(self._on_error) \
+                .reconnect_listener(self._on_reconnect) \
+                .build()
+            if self._stopped.is_set():
+                # Bağlanırken durduruldu (ör. kimlik bilgileri değişti): eski oturumu kapat
+                self._client.close()
+                return
+            self._client.subscribe(self.channels, self._on_message)
+            self._live.set()
+            self._reconcile_until_done()
+            logger.info("Position stream subscribed to private positions/orders/account channels")
+        except Exception as e:
+            logger.error(f"Position stream could not start: {str(e)}")
+
+    def live(self):
+        """True while the stream is connected and reconciled"""
+        return self._live.is_set() and self._reconciled.is_set() \
+            and self._client is not None and self._client.has_connect()
+
+    def reconcile(self):
+        """Replace the book with the REST position list
+
+        Returns:
+            bool: False if the REST read failed (the book is left as it was)
+        """
+        try:
+            positions = self.handler.get_open_positions(raise_errors=True)
+        except Exception as e:
+            logger.error(f"Position book reconcile failed, keeping the current book: {str(e)}")
+            return False
+        self.book.reconcile(positions)
+        self._reconciled.set()
+        logger.info(f"Position book reconciled from REST: {len(positions)} positions")
+        return True
+
+    def _reconcile_until_done(self):
+        # Tek seferde bir uzlaştırma döngüsü; başarısız REST okuması artan aralıklarla tekrarlanır
+        if not self._reconcile_lock.acquire(blocking=False):
+            return
+        try:
+            delay = self.retry_interval
+            while self._live.is_set() and not self.reconcile():
+                time.sleep(delay)
+                delay = min(self.max_retry_interval, delay * 2)
+        finally:
+            self._reconcile_lock.release()
+
+    def _on_message(self, message):
+        try:
+            if self.book.apply(message) and message['arg'].get('channel') == 'positions':
+                for position in message.get('data') or []:
+                    self.handler.leverage_cache.observe_position(normalize_position(position))
+        except Exception as e:
+            logger.error(f"Invalid position stream message: {str(e)}")
+
+    def _on_error(self, message):
+        logger.error(f"Position stream error: {message}")
+
+    def _on_reconnect(self):
+        # Called on the socket thread; REST reconcile runs beside it. Until it succeeds the
+        # book may have missed pushes, so the monitor falls back to REST polling.
+        self._reconciled.clear()
+        threading.Thread(target=self._reconcile_until_done, name="position-reconcile", daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+        self._live.clear()
+        if self._client:
+            self._client.close()
@@ -0,0 +1,136 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PreTradeSnapshot:
+    """Market and account state read right before an order
+
+    A field is None when its stage failed or missed the deadline.
+    """
+    symbol: str
+    positions: Optional[List[dict]] = None
+    balance: Optional[float] = None
+    price: Optional[float] = None
+    atr: Optional[float] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    total_ms: float = 0.0
+    observed_at: float = 0.0  # time.monotonic() when the reads started
+
+    def complete(self):
+        """True if every stage returned in time"""
+        return not self.errors
+
+
+class PreTradeGatherer:
+    """Reads positions, balance, price and ATR concurrently under one deadline
+
+    The reads are independent, so the snapshot costs as much as the slowest
+    of them instead of their sum. Per-stage latencies of recent signals are
+    kept to show what dominates signal-to-order time.
+    """
+
+    def __init__(self, max_workers=8, deadline=5.0, latency_window=200):
+        """
+        Args:
+            max_workers (int): Threads shared by all concurrent snapshots
+            deadline (float): Seconds a snapshot may take in total
+            latency_window (int): Number of recent samples kept per stage
+        """
+        self.deadline = float(deadline)
+        self.latency_window = latency_window
+        self._pool = ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix='pretrade')
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._timeouts = {}
+        self._errors = {}
+
+    def gather(self, handler, symbol, atr_period=14, deadline=None):
+        """Take a pre-trade snapshot of symbol
+
+        Args:
+            handler (BitgetHandler): Handler the reads go through
+            symbol (str): Trading pair (e.g. 'BTCUSDT')
+            atr_period (int): ATR period
+            deadline (float, optional): Overrides the default deadline (seconds)
+
+        Returns:
+            PreTradeSnapshot: Snapshot with per-stage timings
+        """
+        deadline = self.deadline if deadline is None else float(deadline)
+        formatted_symbol = symbol if symbol.endswith('_UMCBL') else f"{symbol}_UMCBL"
+        readers = {
+            'positions': lambda: handler.get_open_positions(raise_errors=True),
+            'balance': lambda: handler.get_account_balance('USDT')[0],
+            'price': lambda: handler.get_symbol_price(formatted_symbol),
+            'atr': lambda: handler.get_atr(formatted_symbol, atr_period)
+        }
+
+        snapshot = PreTradeSnapshot(symbol=symbol, observed_at=time.monotonic())
+        started = time.perf_counter()
+        futures = {self._pool.submit(self._timed, reader): stage for stage, reader in readers.items()}
+        done, not_done = wait(futures, timeout=deadline)
+
+        for future, stage in futures.items():
+            if future in not_done:
+                snapshot.errors[stage] = f"deadline of {deadline}s exceeded"
+                snapshot.timings[stage] = round(deadline * 1000, 2)
+                self._count(self._timeouts, stage)
+                continue
+            try:
+                value, elapsed = future.result()
+                setattr(snapshot, stage, value)
+                snapshot.timings[stage] = round(elapsed * 1000, 2)
+                self.record(stage, elapsed)
+            except Exception as e:
+                snapshot.errors[stage] = str(e)
+                self._count(self._errors, stage)
+
+        snapshot.total_ms = round((time.perf_counter() - started) * 1000, 2)
+        self.record('snapshot', snapshot.total_ms / 1000)
+        logger.info(f"Pre-trade snapshot for {symbol} in {snapshot.total_ms} ms: {snapshot.timings}"
+                    + (f", errors: {snapshot.errors}" if snapshot.errors else ""))
+        return snapshot
+
+    @staticmethod
+    def _timed(reader):
+        started = time.perf_counter()
+        value = reader()
+        return value, time.perf_counter() - started
+
+    def _count(self, counters, stage):
+        with self._lock:
+            counters[stage] = counters.get(stage, 0) + 1
+
+    def record(self, stage, seconds):
+        """Add a latency sample for a stage (also used for stages after the snapshot, e.g. 'order')"""
+        with self._lock:
+            self._samples.setdefault(stage, deque(maxlen=self.latency_window)).append(seconds)
+
+    @staticmethod
+    def _summary(samples):
+        ordered = sorted(samples)
+        count = len(ordered)
+        return {
+            'count': count,
+            'avg_ms': round(sum(ordered) / count * 1000, 2),
+            'p50_ms': round(ordered[count // 2] * 1000, 2),
+            'p95_ms': round(ordered[min(count - 1, int(count * 0.95))] * 1000, 2),
+            'max_ms': round(ordered[-1] * 1000, 2)
+        }
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'deadline': self.deadline,
+                'stages': {stage: self._summary(samples) for stage, samples in self._samples.items() if samples},
+                'timeouts': dict(self._timeouts),
+                'errors': dict(self._errors)
+            }
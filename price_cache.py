@@ -0,0 +1,152 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PriceCache:
+    """Process-wide last prices of all futures symbols from one bulk tickers call
+
+    A quote older than max_age triggers a refresh of the whole table. Refreshes
+    are single-flight: concurrent readers wait for the refresh in progress
+    instead of issuing their own request. A failed refresh (bulk or single
+    symbol) is not retried for retry_after seconds, so the readers that waited
+    for it do not repeat it one after another. Readers always get the price
+    together with its age so they can decide whether it is fresh enough.
+    """
+
+    def __init__(self, fetch_tickers, fetch_ticker=None, max_age=5.0, retry_after=1.0):
+        """
+        Args:
+            fetch_tickers (callable): Returns the bulk tickers response ({'data': [ticker, ...]})
+            fetch_ticker (callable, optional): fetch_ticker(symbol) -> single ticker response,
+                used for symbols missing from the bulk response
+            max_age (float): Seconds after which a quote is refreshed
+            retry_after (float): Seconds a failed refresh is not retried
+        """
+        self.fetch_tickers = fetch_tickers
+        self.fetch_ticker = fetch_ticker
+        self.max_age = float(max_age)
+        self.retry_after = float(retry_after)
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._symbol_locks = {}
+        self._prices = {}
+        self._refreshed_at = 0.0
+        self._failed_at = None
+        self._symbol_failed_at = {}
+        self._refreshes = 0
+        self._hits = 0
+        self._errors = 0
+        self._skipped = 0
+
+    def _recently_failed(self, failed_at):
+        if failed_at is not None and time.monotonic() - failed_at < self.retry_after:
+            with self._lock:
+                self._skipped += 1
+            return True
+        return False
+
+    def quote(self, symbol):
+        """Last price of symbol and its age
+
+        Args:
+            symbol (str): Bitget symbol (e.g. 'BTCUSDT_UMCBL')
+
+        Returns:
+            tuple: (price, age in seconds), or (None, None) if no price is known
+        """
+        entry = self._prices.get(symbol)
+        if entry is None or time.monotonic() - entry[1] > self.max_age:
+            self.refresh()
+            entry = self._prices.get(symbol)
+            if self.fetch_ticker and (entry is None or time.monotonic() - entry[1] > self.max_age):
+                # Not in the bulk response (or the bulk refresh failed)
+                entry = self._refresh_symbol(symbol)
+        else:
+            with self._lock:
+                self._hits += 1
+
+        if entry is None:
+            return None, None
+        return entry[0], time.monotonic() - entry[1]
+
+    def refresh(self, force=False):
+        """Reload every price from the bulk tickers endpoint
+
+        Args:
+            force (bool): Refresh even if the table is younger than max_age (e.g. refreshed
+                by another thread while this one was waiting)
+
+        Returns:
+            bool: True if the table is fresh
+        """
+        with self._refresh_lock:
+            if not force and self._refreshed_at and time.monotonic() - self._refreshed_at <= self.max_age:
+                return True
+            if not force and self._recently_failed(self._failed_at):
+                # Bekleyen okuyucular başarısız isteği sırayla tekrarlamasın
+                return False
+            started = time.monotonic()
+            try:
+                response = self.fetch_tickers()
+                tickers = (response.get('data') or []) if response else []
+            except Exception as e:
+                with self._lock:
+                    self._errors += 1
+                self._failed_at = time.monotonic()
+                logger.error(f"Bulk ticker refresh failed: {str(e)}")
+                return False
+
+            prices = {}
+            for ticker in tickers:
+                try:
+                    prices[ticker['symbol']] = (float(ticker['last']), started)
+                except (KeyError, TypeError, ValueError):
+                    continue
+            with self._lock:
+                self._prices.update(prices)
+                self._refreshes += 1
+            self._refreshed_at = started
+            self._failed_at = None
+            logger.debug(f"Price cache refreshed: {len(prices)} symbols in {(time.monotonic() - started) * 1000:.1f} ms")
+            return True
+
+    def _refresh_symbol(self, symbol):
+        """Single-flight fetch of one symbol; readers that waited reuse its result"""
+        with self._lock:
+            symbol_lock = self._symbol_locks.setdefault(symbol, threading.Lock())
+        with symbol_lock:
+            entry = self._prices.get(symbol)
+            if entry is not None and time.monotonic() - entry[1] <= self.max_age:
+                return entry
+            if self._recently_failed(self._symbol_failed_at.get(symbol)):
+                return None
+            started = time.monotonic()
+            try:
+                response = self.fetch_ticker(symbol)
+                price = float(response['data']['last'])
+            except Exception as e:
+                with self._lock:
+                    self._errors += 1
+                self._symbol_failed_at[symbol] = time.monotonic()
+                logger.error(f"Ticker fetch failed for {symbol}: {str(e)}")
+                return None
+            entry = (price, started)
+            with self._lock:
+                self._prices[symbol] = entry
+            self._symbol_failed_at.pop(symbol, None)
+            return entry
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'symbols': len(self._prices),
+                'max_age': self.max_age,
+                'age': round(time.monotonic() - self._refreshed_at, 3) if self._refreshed_at else None,
+                'refreshes': self._refreshes,
+                'hits': self._hits,
+                'errors': self._errors,
+                'skipped': self._skipped
+            }
@@ -0,0 +1,239 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class SignalQueue:
+    """Durable on-disk queue of trading signals drained into per-symbol actors
+
+    Every signal is written to its own JSON file before the webhook answers, so
+    queued signals survive a restart. The dispatcher claims a signal by renaming
+    its file to ``.processing`` and hands it to the SymbolExecutor, which keeps
+    signals of one symbol in order and runs different symbols concurrently. The
+    file is deleted once the handler returns. Signals that were being processed
+    when the process died are re-queued on start, unless they were received
+    more than max_age seconds ago: a stale trading signal is renamed to
+    ``.failed`` instead of being executed. Delivery is at-least-once and the
+    queue does not detect duplicates; a repeated close finds no open trade in
+    the trade ledger (see trade_ledger.py), a repeated open is sent again.
+    """
+
+    PENDING_SUFFIX = '.json'
+    PROCESSING_SUFFIX = '.processing'
+    FAILED_SUFFIX = '.failed'
+
+    def __init__(self, directory, handler, executor, latency_window=200, max_age=300.0):
+        """
+        Args:
+            directory (str): Spool directory for queued signals
+            handler (callable): Called with each signal dict
+            executor (SymbolExecutor): Runs the handler per symbol
+            latency_window (int): Number of recent signals kept for latency stats
+            max_age (float): Seconds after receipt a recovered signal is still executed
+        """
+        self.directory = directory
+        self.handler = handler
+        self.executor = executor
+        self.max_age = float(max_age)
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._dispatcher = None
+        self._in_flight = 0
+        self._processed = 0
+        self._failed = 0
+        self._expired = 0
+        self._queue_wait = deque(maxlen=latency_window)
+        self._total_latency = deque(maxlen=latency_window)
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def start(self):
+        """Recover spooled signals and start the dispatcher thread"""
+        if self._dispatcher:
+            return self
+
+        pending = []
+        now = time.time()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(self.PROCESSING_SUFFIX):
+                signal_id = name[:-len(self.PROCESSING_SUFFIX)]
+            elif name.endswith(self.PENDING_SUFFIX):
+                signal_id = name[:-len(self.PENDING_SUFFIX)]
+            else:
+                continue
+
+            try:
+                with open(path, 'r') as f:
+                    received_at = float(json.load(f)['received_at'])
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.error(f"Unreadable queued signal {name}: {str(e)}")
+                self._mark_failed(path, signal_id)
+                continue
+            age = now - received_at
+            if age > self.max_age:
+                # Yeniden başlatmadan sonra bayat sinyalle emir açılmamalı
+                logger.warning(f"Dropping recovered signal {signal_id}: received {age:.0f}s ago "
+                               f"(max age {self.max_age:.0f}s)")
+                self._mark_failed(path, signal_id)
+                with self._lock:
+                    self._expired += 1
+                continue
+
+            if name.endswith(self.PROCESSING_SUFFIX):
+                os.replace(path, self._pending_path(signal_id))
+            pending.append(signal_id)
+
+        # Signal ids start with the receive time, so name order is arrival order
+        for signal_id in sorted(pending):
+            self._queue.put(signal_id)
+        if pending:
+            logger.info(f"Recovered {len(pending)} queued signals from {self.directory}")
+
+        self._dispatcher = threading.Thread(target=self._dispatch, name="signal-dispatcher", daemon=True)
+        self._dispatcher.start()
+        logger.info(f"Signal queue started with {self.executor.max_workers} symbol workers")
+        return self
+
+    def enqueue(self, symbol, direction, action, payload=None):
+        """Persist a signal and queue it for execution
+
+        Returns:
+            str: Signal id
+        """
+        signal_id = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        record = {
+            'id': signal_id,
+            'symbol': symbol,
+            'direction': direction,
+            'action': action,
+            'received_at': time.time(),
+            'payload': payload
+        }
+
+        tmp_path = os.path.join(self.directory, signal_id + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(record, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._pending_path(signal_id))
+
+        self._queue.put(signal_id)
+        logger.info(f"Queued signal {signal_id}: {symbol}/{direction}/{action}")
+        return signal_id
+
+    def _pending_path(self, signal_id):
+        return os.path.join(self.directory, signal_id + self.PENDING_SUFFIX)
+
+    def _processing_path(self, signal_id):
+        return os.path.join(self.directory, signal_id + self.PROCESSING_SUFFIX)
+
+    def _mark_failed(self, path, signal_id):
+        """Keep a signal that will not be executed as ``.failed`` for inspection"""
+        try:
+            os.replace(path, os.path.join(self.directory, signal_id + self.FAILED_SUFFIX))
+        except OSError as e:
+            logger.error(f"Could not mark signal {signal_id} as failed: {str(e)}")
+
+    def _claim(self, signal_id):
+        """Move a pending signal to processing; None if another worker took it"""
+        processing_path = self._processing_path(signal_id)
+        try:
+            os.replace(self._pending_path(signal_id), processing_path)
+        except FileNotFoundError:
+            return None
+        try:
+            with open(processing_path, 'r') as f:
+                return json.load(f)
+        except ValueError as e:
+            logger.error(f"Unreadable queued signal {signal_id}: {str(e)}")
+            self._mark_failed(processing_path, signal_id)
+            return None
+
+    def _dispatch(self):
+        while True:
+            signal_id = self._queue.get()
+            try:
+                record = self._claim(signal_id)
+                if record is None:
+                    continue
+                with self._lock:
+                    self._in_flight += 1
+                try:
+                    self.executor.submit(record['symbol'], self._execute, record)
+                except Exception:
+                    # Talep edilmiş ama çalıştırılamayan sinyal bir sonraki başlatmada yeniden denenir
+                    with self._lock:
+                        self._in_flight -= 1
+                        self._failed += 1
+                    os.replace(self._processing_path(signal_id), self._pending_path(signal_id))
+                    raise
+            except Exception as e:
+                logger.error(f"Signal dispatch error for {signal_id}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def _execute(self, record):
+        started = time.time()
+        with self._lock:
+            self._queue_wait.append(started - record['received_at'])
+
+        failed = False
+        try:
+            self.handler(record)
+        except Exception as e:
+            failed = True
+            logger.error(f"Error processing queued signal {record['id']}: {str(e)}")
+            import traceback
+            logger.error(f"Signal processing error details: {traceback.format_exc()}")
+        finally:
+            try:
+                os.remove(self._processing_path(record['id']))
+            except FileNotFoundError:
+                pass
+            finished = time.time()
+            with self._lock:
+                self._in_flight -= 1
+                self._processed += 1
+                if failed:
+                    self._failed += 1
+                self._total_latency.append(finished - record['received_at'])
+
+        logger.info(f"Signal {record['id']} done in {(finished - record['received_at']) * 1000:.1f} ms "
+                    f"(queued {(started - record['received_at']) * 1000:.1f} ms)")
+
+    @staticmethod
+    def _summary(samples):
+        if not samples:
+            return {'count': 0}
+        ordered = sorted(samples)
+        count = len(ordered)
+        return {
+            'count': count,
+            'last_ms': round(samples[-1] * 1000, 2),
+            'avg_ms': round(sum(ordered) / count * 1000, 2),
+            'p50_ms': round(ordered[count // 2] * 1000, 2),
+            'p95_ms': round(ordered[min(count - 1, int(count * 0.95))] * 1000, 2),
+            'max_ms': round(ordered[-1] * 1000, 2)
+        }
+
+    def metrics(self):
+        """Queue depth, throughput and per-signal latency"""
+        with self._lock:
+            return {
+                'depth': self._queue.qsize(),
+                'in_flight': self._in_flight,
+                'processed': self._processed,
+                'failed': self._failed,
+                'expired': self._expired,
+                'queue_wait': self._summary(list(self._queue_wait)),
+                'latency': self._summary(list(self._total_latency)),
+                'executor': self.executor.metrics()
+            }
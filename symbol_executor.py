@@ -0,0 +1,163 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class SymbolExecutor:
+    """Per-symbol actors on a bounded thread pool
+
+    Tasks submitted for the same symbol run strictly one after another in
+    submission order; tasks for different symbols run concurrently. Each actor
+    runs one task per pool slot and then yields, so a busy symbol cannot starve
+    the others.
+    """
+
+    def __init__(self, max_workers=4):
+        """
+        Args:
+            max_workers (int): Maximum number of symbols executing at the same time
+        """
+        self.max_workers = max(1, int(max_workers))
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='symbol-actor')
+        self._lock = threading.Lock()
+        self._mailboxes = {}
+        self._running = set()
+        self._completed = 0
+
+    def submit(self, symbol, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs) on the actor of symbol
+
+        Returns:
+            Future: Resolves with the task result
+        """
+        future = Future()
+        with self._lock:
+            mailbox = self._mailboxes.setdefault(symbol, deque())
+            mailbox.append((fn, args, kwargs, future))
+            if symbol not in self._running:
+                self._running.add(symbol)
+                self._pool.submit(self._run_next, symbol)
+        return future
+
+    def _run_next(self, symbol):
+        with self._lock:
+            fn, args, kwargs, future = self._mailboxes[symbol].popleft()
+
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                logger.error(f"Task for {symbol} failed: {str(e)}")
+                future.set_exception(e)
+
+        with self._lock:
+            self._completed += 1
+            if self._mailboxes[symbol]:
+                # Same symbol keeps its order, but goes to the back of the pool queue
+                self._pool.submit(self._run_next, symbol)
+            else:
+                del self._mailboxes[symbol]
+                self._running.discard(symbol)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'active_symbols': sorted(self._running),
+                'pending': {symbol: len(mailbox) for symbol, mailbox in self._mailboxes.items() if mailbox},
+                'completed': self._completed
+            }
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+
+class TradeReservation:
+    """Slot held by a signal between the limit check and the order result"""
+
+    def __init__(self, limits):
+        self._limits = limits
+        self._done = False
+
+    def commit(self):
+        """The position was opened"""
+        if not self._done:
+            self._done = True
+            self._limits._finish(committed=True)
+
+    def release(self):
+        """The open was abandoned or failed"""
+        if not self._done:
+            self._done = True
+            self._limits._finish(committed=False)
+
+
+class TradeLimits:
+    """Cross-symbol trade limits shared atomically by all symbol actors
+
+    Signals for different symbols read open positions and today's trades
+    concurrently, so each of them may miss opens the others are making right
+    now. A reservation counts every open that is in flight, plus opens
+    committed after the caller took its snapshot, before comparing against
+    max_open_positions and max_daily_trades.
+    """
+
+    def __init__(self, retention=600):
+        """
+        Args:
+            retention (float): Seconds committed opens are remembered
+        """
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._committed = deque()
+        self._rejected = {'max_open_positions': 0, 'max_daily_trades': 0}
+
+    def try_reserve(self, observed_at, open_positions, max_open_positions, today_trades, max_daily_trades):
+        """Atomically check both limits and reserve a slot
+
+        Args:
+            observed_at (float): time.monotonic() taken before reading the counts
+            open_positions (int): Open positions seen by the caller
+            max_open_positions (int): Configured maximum
+            today_trades (int): Trades opened today seen by the caller
+            max_daily_trades (int): Configured maximum
+
+        Returns:
+            tuple: (TradeReservation or None, name of the limit that was hit or None)
+        """
+        with self._lock:
+            now = time.monotonic()
+            while self._committed and self._committed[0] < now - self.retention:
+                self._committed.popleft()
+
+            unseen = sum(1 for committed_at in self._committed if committed_at > observed_at)
+            in_flight = self._pending + unseen
+
+            if today_trades + in_flight >= max_daily_trades:
+                self._rejected['max_daily_trades'] += 1
+                return None, 'max_daily_trades'
+            if open_positions + in_flight >= max_open_positions:
+                self._rejected['max_open_positions'] += 1
+                return None, 'max_open_positions'
+
+            self._pending += 1
+            return TradeReservation(self), None
+
+    def _finish(self, committed):
+        with self._lock:
+            self._pending -= 1
+            if committed:
+                self._committed.append(time.monotonic())
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'pending_opens': self._pending,
+                'recent_opens': len(self._committed),
+                'rejected': dict(self._rejected)
+            }
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""AlertState test on a price path around TP/SL levels (offline)
+
+Replays a random walk that oscillates around the take profit of a long
+and the stop loss of a short position, checks the alerts against the old
+level-triggered behaviour (an alert on every 5 second iteration) and checks:
+
+- one alert per crossing; re-armed only after the price reversed by rearm_ratio
+- a restart with the same state file does not fire crossed levels again
+- a changed level re-arms; a closed position is forgotten
+
+    python alert_state_test.py --steps 2000 --rearm-ratio 0.001
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from alert_state import AlertState, ARMED, STOP_LOSS, TAKE_PROFIT, TRIGGERED, beyond
+
+
+def check(ok, message):
+    print(f"{'✅' if ok else '❌'} {message}")
+    return ok
+
+
+def price_path(steps, level, seed=7):
+    """Random walk around level (mean-reverting so it keeps crossing)"""
+    rng = random.Random(seed)
+    price, path = level * 0.995, []
+    for _ in range(steps):
+        price += (level - price) * 0.05 + rng.gauss(0, level * 0.0008)
+        path.append(price)
+    return path
+
+
+def expected_crossings(kind, side, path, level, rearm_ratio):
+    """Crossings counted independently: beyond the level after a retreat of more than rearm_ratio"""
+    armed, crossings = True, 0
+    for price in path:
+        if armed and beyond(kind, side, price, level):
+            armed, crossings = False, crossings + 1
+        elif not armed and not beyond(kind, side, price, level, -rearm_ratio):
+            armed = True
+    return crossings
+
+
+def run_checks(steps, rearm_ratio, work_dir):
+    results = []
+    path_file = os.path.join(work_dir, 'alert_state.json')
+    alerts = AlertState(path_file, rearm_ratio=rearm_ratio)
+
+    cases = [('BTCUSDT_UMCBL:long', TAKE_PROFIT, 'long', 30000.0),
+             ('ETHUSDT_UMCBL:short', STOP_LOSS, 'short', 1800.0)]
+    for seed, (pos_id, kind, side, level) in enumerate(cases, start=7):
+        path = price_path(steps, level, seed)
+        fired = sum(alerts.evaluate(pos_id, kind, side, level, price) for price in path)
+        old = sum(beyond(kind, side, price, level) for price in path)
+        expected = expected_crossings(kind, side, path, level, rearm_ratio)
+        results.append(check(fired == expected and 0 < fired < old,
+                             f"{pos_id} {kind}: {fired} alerts for {expected} crossings "
+                             f"(level-triggered loop sent {old})"))
+
+    # Fiyat seviyenin ötesinde kalırken yeniden başlat: aynı alarm tekrar gönderilmemeli
+    pos_id, kind, side, level = cases[0]
+    alerts.evaluate(pos_id, kind, side, level, level * 1.01)
+    restarted = AlertState(path_file, rearm_ratio=rearm_ratio)
+    results.append(check(restarted.state(pos_id, kind) == TRIGGERED
+                         and not restarted.evaluate(pos_id, kind, side, level, level * 1.02),
+                         "restart with the state file does not fire the crossed level again"))
+
+    results.append(check(restarted.evaluate(pos_id, kind, side, level * 1.03, level * 1.035),
+                         "a moved TP level re-arms and fires when crossed"))
+
+    restarted.close(pos_id)
+    restarted.prune(['ETHUSDT_UMCBL:short'])
+    results.append(check(restarted.state(pos_id, kind) is None
+                         and restarted.state(cases[1][0], STOP_LOSS) in (ARMED, TRIGGERED),
+                         f"closed position forgotten, open one kept: {restarted.metrics()}"))
+    return all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='AlertState offline test')
+    parser.add_argument('--steps', type=int, default=2000, help='Monitor iterations replayed per position')
+    parser.add_argument('--rearm-ratio', type=float, default=0.001, help='Retreat before a level re-arms')
+
+    args = parser.parse_args()
+    work_dir = tempfile.mkdtemp(prefix='alert-state-')
+    try:
+        success = run_checks(args.steps, args.rearm_ratio, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
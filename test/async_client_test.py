@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""AsyncClient test against the local stub server
+
+Checks that the awaitable API classes sign requests exactly like the sync
+client (the stub verifies every signature), that API errors surface as
+BitgetAPIException and that independent reads run concurrently.
+
+    python async_client_test.py --latency 0.05
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from bitget import consts as c
+from bitget.async_client import close_async_session
+from bitget.bitget_api import AsyncBitgetApi
+from bitget.exceptions import BitgetAPIException
+from bitget.v1.mix.account_api import AsyncAccountApi
+from bitget.v1.mix.market_api import AsyncMarketApi
+from bitget.v1.mix.order_api import AsyncOrderApi
+
+from stub_server import StubBitgetServer
+
+API_KEY = "stub-key"
+SECRET_KEY = "stub-secret"
+PASSPHRASE = "stub-pass"
+
+
+async def run_checks(latency):
+    market = AsyncMarketApi(API_KEY, SECRET_KEY, PASSPHRASE)
+    account = AsyncAccountApi(API_KEY, SECRET_KEY, PASSPHRASE)
+    order = AsyncOrderApi(API_KEY, SECRET_KEY, PASSPHRASE)
+    base = AsyncBitgetApi(API_KEY, SECRET_KEY, PASSPHRASE)
+    ok = True
+
+    # İmzalı GET ve POST istekleri
+    ticker = await market.ticker({"symbol": "BTCUSDT_UMCBL"})
+    print(f"✅ ticker: {ticker['data']['last']}")
+
+    placed = await order.placeOrder({"symbol": "BTCUSDT_UMCBL", "marginCoin": "USDT", "size": "0.001",
+                                     "side": "open_long", "orderType": "market", "clientOid": "1"})
+    print(f"✅ placeOrder: {placed['data']['orderId']}")
+
+    # API hataları BitgetAPIException olarak gelmeli
+    try:
+        await base.get("/api/mix/v1/position/holds", {"productType": "umcbl", "marginCoin": "USDT"})
+        print("❌ holds endpoint should have failed")
+        ok = False
+    except BitgetAPIException as e:
+        print(f"✅ error surfaced: {e}")
+
+    # Bağımsız okumalar eşzamanlı çalışmalı
+    start = time.perf_counter()
+    await market.ticker({"symbol": "BTCUSDT_UMCBL"})
+    await account.account({"symbol": "BTCUSDT_UMCBL", "marginCoin": "USDT"})
+    await account.allPosition({"productType": "umcbl", "marginCoin": "USDT"})
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        market.ticker({"symbol": "BTCUSDT_UMCBL"}),
+        account.account({"symbol": "BTCUSDT_UMCBL", "marginCoin": "USDT"}),
+        account.allPosition({"productType": "umcbl", "marginCoin": "USDT"}),
+    )
+    concurrent = time.perf_counter() - start
+
+    print(f"sequential: {sequential * 1000:.1f} ms, concurrent: {concurrent * 1000:.1f} ms")
+    if latency and concurrent >= sequential:
+        print("❌ concurrent reads were not faster than sequential reads")
+        ok = False
+    else:
+        print("✅ concurrent reads overlap")
+
+    await close_async_session()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='AsyncClient stub server test')
+    parser.add_argument('--latency', type=float, default=0.05, help='Stub latency per request (seconds)')
+
+    args = parser.parse_args()
+
+    server = StubBitgetServer(secret_key=SECRET_KEY, latency=args.latency).start()
+    c.API_URL = server.url
+    try:
+        success = asyncio.run(run_checks(args.latency))
+    finally:
+        server.stop()
+
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
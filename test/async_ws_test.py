@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""AsyncBitgetWsClient test against a local WebSocket server
+
+The local server answers login and subscribe requests like Bitget, replies
+'pong' to 'ping' and, on request, pushes a burst of ticker frames to every
+subscription or drops the connection. Checks:
+
+- a slow listener does not stall the other subscriptions (bounded queues)
+- drop_oldest and conflate overflow policies
+- ping/pong without extra threads
+- reconnect with login, resubscription and the reconnect listener
+
+    python async_ws_test.py --burst 500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+from aiohttp import web
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from bitget.async_client import close_async_session
+from bitget.ws.async_ws_client import AsyncBitgetWsClient, CONFLATE, DROP_OLDEST
+from bitget.ws.bitget_ws_client import SubscribeReq
+
+
+class LocalWsServer:
+    def __init__(self):
+        self.sockets = []
+        self.logins = 0
+        self.pings = 0
+        self.subscribed = []
+        self.subscribe_ops = 0
+        self.socket_args = {}
+        self.runner = None
+        self.url = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/ws', self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"ws://127.0.0.1:{port}/ws"
+        return self
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+    async def handle(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.sockets.append(ws)
+        self.socket_args[ws] = []
+        async for msg in ws:
+            if msg.data == 'ping':
+                self.pings += 1
+                await ws.send_str('pong')
+                continue
+            request_obj = json.loads(msg.data)
+            if request_obj['op'] == 'login':
+                ok = 'apiKey' in request_obj['args'][0] and 'sign' in request_obj['args'][0]
+                self.logins += ok
+                await ws.send_str(json.dumps({"event": "login", "code": 0 if ok else 30005}))
+            elif request_obj['op'] == 'subscribe':
+                self.subscribe_ops += 1
+                for arg in request_obj['args']:
+                    self.subscribed.append(arg)
+                    self.socket_args[ws].append(arg)
+                    await ws.send_str(json.dumps({"event": "subscribe", "arg": arg}))
+        return ws
+
+    def socket_of(self, arg):
+        # Last connection the arg was subscribed on
+        return next(ws for ws in reversed(self.sockets) if arg in self.socket_args[ws])
+
+    async def burst(self, arg, count):
+        ws = self.sockets[-1]
+        for i in range(count):
+            await ws.send_str(json.dumps({"action": "snapshot", "arg": arg, "data": [{"last": str(i)}]}))
+
+    async def push(self, arg, data, action="update"):
+        await self.socket_of(arg).send_str(json.dumps({"action": action, "arg": arg, "data": data}))
+
+    async def drop(self, ws=None):
+        await (self.sockets[-1] if ws is None else ws).close()
+
+
+def check(ok, message):
+    print(f"{'✅' if ok else '❌'} {message}")
+    return ok
+
+
+async def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(0.01)
+    return True
+
+
+async def run_checks(burst):
+    server = await LocalWsServer().start()
+    threads_before = threading.active_count()
+    results = []
+
+    fast, slow, latest = [], [], []
+    reconnected = asyncio.Event()
+
+    async def slow_listener(message):
+        await asyncio.sleep(0.01)
+        slow.append(message)
+
+    async def conflated_listener(message):
+        await asyncio.sleep(0.05)
+        latest.append(message)
+
+    client = AsyncBitgetWsClient(server.url, need_login=True, ping_interval=0.2) \
+        .api_key('stub-key').api_secret_key('stub-secret').passphrase('stub-pass') \
+        .reconnect_listener(reconnected.set)
+    await client.start(timeout=5)
+    results.append(check(server.logins == 1, "login request sent with camelCase keys"))
+
+    fast_req = SubscribeReq('mc', 'ticker', 'BTCUSDT')
+    slow_req = SubscribeReq('mc', 'ticker', 'ETHUSDT')
+    conflate_req = SubscribeReq('mc', 'ticker', 'SOLUSDT')
+    await client.subscribe([fast_req], fast.append)
+    await client.subscribe([slow_req], slow_listener, queue_size=10, overflow=DROP_OLDEST)
+    await client.subscribe([conflate_req], conflated_listener, queue_size=1, overflow=CONFLATE)
+    await wait_until(lambda: len(server.subscribed) == 3)
+
+    started = time.monotonic()
+    for req in (slow_req, conflate_req, fast_req):
+        await server.burst(req.to_dict(), burst)
+    await wait_until(lambda: len(fast) == burst)
+    fast_elapsed = time.monotonic() - started
+    results.append(check(len(fast) == burst,
+                         f"fast subscription got {len(fast)}/{burst} frames in {fast_elapsed * 1000:.0f} ms "
+                         f"behind a slow listener"))
+
+    await asyncio.sleep(0.3)
+    metrics = client.metrics()['subscriptions']
+    slow_metrics = metrics['mc/ticker/ETHUSDT']
+    results.append(check(slow_metrics['dropped'] > 0 and slow_metrics['queued'] <= 10,
+                         f"drop_oldest bounded the slow queue: {slow_metrics}"))
+    results.append(check(latest and latest[-1]['data'][0]['last'] == str(burst - 1),
+                         f"conflate delivered the latest frame after {len(latest)} deliveries"))
+
+    await asyncio.sleep(0.5)
+    results.append(check(server.pings >= 2, f"{server.pings} pings answered"))
+    results.append(check(threading.active_count() == threads_before,
+                         f"no threads created ({threading.active_count()} before and after)"))
+
+    server.subscribed.clear()
+    await server.drop()
+    try:
+        await asyncio.wait_for(reconnected.wait(), 5)
+    except asyncio.TimeoutError:
+        pass
+    results.append(check(reconnected.is_set() and server.logins == 2 and len(server.subscribed) == 3,
+                         f"reconnected, logged in again and restored {len(server.subscribed)} subscriptions"))
+
+    await client.close()
+    await close_async_session()
+    await server.stop()
+    return all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='AsyncBitgetWsClient local server test')
+    parser.add_argument('--burst', type=int, default=500, help='Frames pushed to each subscription')
+
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run_checks(args.burst)) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""CandleBuilder test on a recorded Bitget trade file (offline)
+
+Replays recorded `trade` channel frames into a CandleBuilder backed by a
+temporary CandleStore and checks:
+
+- the closed 15m bars match OHLCV computed directly from the trades
+- the partial first bar is not stored; later bars are appended in order
+- the running ATR equals an ATR seeded from the final store (batch parity)
+- BitgetHandler.get_atr serves the live-built ATR without downloading candles
+- the REST backfill downloads Bitget futures candles (local stub server) into a
+  store separate from older Binance spot files
+
+    python candle_builder_test.py --file fixtures/trades_btcusdt.jsonl
+    python candle_builder_test.py --record fixtures/trades_btcusdt.jsonl
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from atr_engine import AtrEngine, INTERVAL_MS
+from candle_builder import CandleBuilder, replay_trades
+from candle_store import CandleStore
+
+SYMBOL = 'BTCUSDT'
+INTERVAL = '15m'
+PERIOD = 14
+
+
+def check(ok, message):
+    print(f"{'✅' if ok else '❌'} {message}")
+    return ok
+
+
+def generate_trades(start_ms, end_ms, seed=11):
+    """Trade frames of a random walk, 1-4 trades per frame"""
+    rng = random.Random(seed)
+    price, ts = 30000.0, start_ms
+    frames = []
+    while ts < end_ms:
+        trades = []
+        for _ in range(rng.randint(1, 4)):
+            ts += rng.randint(1000, 40000)
+            price = round(price + rng.gauss(0, 12), 1)
+            trades.append([str(ts), f"{price:.1f}", f"{rng.uniform(0.001, 0.5):.3f}", rng.choice(('buy', 'sell'))])
+        frames.append({"action": "update", "arg": {"instType": "mc", "channel": "trade", "instId": SYMBOL},
+                       "data": trades})
+    return frames
+
+
+def reference_bars(frames, interval_ms):
+    """OHLCV per interval straight from the trades (oldest first)"""
+    bars = {}
+    for frame in frames:
+        for ts, price, size, _ in frame['data']:
+            ts, price, size = int(ts), float(price), float(size)
+            open_time = ts - ts % interval_ms
+            bar = bars.get(open_time)
+            if bar is None:
+                bars[open_time] = [open_time, price, price, price, price, size]
+            else:
+                bar[2], bar[3], bar[4] = max(bar[2], price), min(bar[3], price), price
+                bar[5] += size
+    return [bars[key] for key in sorted(bars)]
+
+
+def history_rows(first_open, count, interval_ms, seed=3):
+    """Closed candles before first_open, standing in for the REST history in the store"""
+    rng = random.Random(seed)
+    rows, close = [], 30000.0
+    for i in range(count, 0, -1):
+        open_time = first_open - i * interval_ms
+        high, low = close + rng.uniform(5, 60), close - rng.uniform(5, 60)
+        next_close = rng.uniform(low, high)
+        rows.append([open_time, close, high, low, next_close, rng.uniform(10, 100), open_time + interval_ms - 1])
+        close = next_close
+    return rows
+
+
+def prepare(work_dir, frames, interval_ms):
+    """Store with history up to and including the first traded bar, ATR seeded from it"""
+    first_ts = int(frames[0]['data'][0][0])
+    first_open = first_ts - first_ts % interval_ms
+    store = CandleStore(os.path.join(work_dir, 'candles'), fetcher=None)
+    rows = history_rows(first_open, PERIOD + 50, interval_ms)
+    rows.append(reference_bars(frames, interval_ms)[0] + [first_open + interval_ms - 1])
+    store.append(SYMBOL, INTERVAL, rows)
+    engine = AtrEngine()
+    engine.seed(SYMBOL, INTERVAL, PERIOD, store.read(SYMBOL, INTERVAL))
+    return store, engine
+
+
+def run_replay(path, work_dir):
+    interval_ms = INTERVAL_MS[INTERVAL]
+    with open(path, 'r', encoding='utf-8') as f:
+        frames = [json.loads(line) for line in f if line.strip()]
+    store, engine = prepare(work_dir, frames, interval_ms)
+    stored_before = len(store.read(SYMBOL, INTERVAL))
+
+    builder = CandleBuilder(engine, store, intervals=(INTERVAL,))
+    applied = replay_trades(path, builder)
+    last_ts = int(frames[-1]['data'][-1][0])
+    builder.flush(last_ts - last_ts % interval_ms + interval_ms + builder.close_delay_ms)
+    print(f"{applied} trade frames replayed: {builder.metrics()}")
+
+    results = []
+    expected = reference_bars(frames, interval_ms)[1:]
+    stored = store.read(SYMBOL, INTERVAL)[stored_before:]
+    matches = len(stored) == len(expected) and all(
+        int(row['open_time']) == bar[0] and abs(row['open'] - bar[1]) < 1e-9 and abs(row['high'] - bar[2]) < 1e-9
+        and abs(row['low'] - bar[3]) < 1e-9 and abs(row['close'] - bar[4]) < 1e-9 and abs(row['volume'] - bar[5]) < 1e-6
+        for row, bar in zip(stored, expected))
+    results.append(check(matches, f"{len(stored)} built bars match OHLCV from the trades"))
+    results.append(check(builder.metrics()['deferred'] == 1, "partial first bar left to the REST sync"))
+
+    live = engine.value(SYMBOL, INTERVAL, PERIOD)
+    batch = AtrEngine().seed(SYMBOL, INTERVAL, PERIOD, store.read(SYMBOL, INTERVAL)).value
+    results.append(check(abs(live - batch) < 1e-9, f"running ATR {live:.6f} == batch ATR {batch:.6f}"))
+    return all(results)
+
+
+def run_handler_check(work_dir):
+    """get_atr after a bar closed from live trades must not download candles"""
+    from bitget_handler import BitgetHandler
+
+    interval_ms = INTERVAL_MS[INTERVAL]
+    now_ms = int(time.time() * 1000)
+    current_open = now_ms - now_ms % interval_ms
+    # Son iki aralığın işlemleri: önceki mum akıştan kapanır, şimdiki mum oluşuyor
+    frames = generate_trades(current_open - 2 * interval_ms, now_ms - 1000, seed=5)
+    frames[0]['data'][0][0] = str(current_open - 2 * interval_ms)
+
+    handler = BitgetHandler('stub-key', 'stub-secret', 'stub-pass', {
+        'candle_store_dir': os.path.join(work_dir, 'handler-candles'),
+        'contracts_cache_path': os.path.join(work_dir, 'contracts.json')
+    })
+    store = handler.candle_store
+    store.append(SYMBOL, INTERVAL, history_rows(current_open - 2 * interval_ms, PERIOD + 50, interval_ms))
+    handler.atr_engine.seed(SYMBOL, INTERVAL, PERIOD, store.read(SYMBOL, INTERVAL))
+
+    downloads = []
+    store.fetcher = lambda *args: downloads.append(args) or []
+    for frame in frames:
+        handler.candle_builder.handle_message(frame)
+
+    atr = handler.get_atr(f"{SYMBOL}_UMCBL", PERIOD, INTERVAL)
+    state = handler.atr_engine.get(SYMBOL, INTERVAL, PERIOD)
+    handler.close()
+    return check(not downloads and state.last_close_time == current_open - 1 and atr > 0,
+                 f"get_atr served {atr:.4f} from the live bars without downloading ({len(downloads)} downloads)")
+
+
+def run_backfill_check(work_dir):
+    """REST backfill reads Bitget futures candles into its own store, never the Binance files"""
+    from bitget import consts as c
+    from bitget_handler import BitgetHandler
+
+    from stub_server import StubBitgetServer
+
+    server = StubBitgetServer().start()
+    c.API_URL = server.url
+    candle_dir = os.path.join(work_dir, 'backfill-candles')
+    # Eski sürümün Binance spot dosyası: yeni mumlar buna eklenmemeli
+    old_store = CandleStore(candle_dir, fetcher=None)
+    old_store.append(SYMBOL, INTERVAL, history_rows(0, 3, INTERVAL_MS[INTERVAL]))
+    old_size = os.path.getsize(old_store.path(SYMBOL, INTERVAL))
+
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            handler = BitgetHandler('stub-key', 'stub-secret', 'stub-pass', {
+                'candle_store_dir': candle_dir,
+                'contracts_cache_path': os.path.join(work_dir, 'backfill-contracts.json')
+            })
+            atr = handler.get_atr(f"{SYMBOL}_UMCBL", PERIOD, INTERVAL)
+            handler.close()
+    finally:
+        server.stop()
+    stored = len(handler.candle_store.read(SYMBOL, INTERVAL))
+    return check(atr > 0 and server.requests.get('/api/mix/v1/market/candles', 0) >= 1
+                 and server.requests.get('/api/v3/klines', 0) == 0
+                 and os.path.getsize(old_store.path(SYMBOL, INTERVAL)) == old_size and stored > PERIOD,
+                 f"ATR {atr:.4f} backfilled from {stored} Bitget candles in a separate store, "
+                 f"Binance file untouched")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CandleBuilder offline test')
+    parser.add_argument('--file', default=os.path.join(current_dir, 'fixtures', 'trades_btcusdt.jsonl'),
+                        help='Recorded trade frames (one raw message per line)')
+    parser.add_argument('--record', help='Generate a trade file (3 hours of a random walk) and exit')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+
+    if args.record:
+        start = 1697000000000 + 137000
+        frames = generate_trades(start, start + 3 * 60 * 60 * 1000)
+        with open(args.record, 'w', encoding='utf-8') as f:
+            for frame in frames:
+                f.write(json.dumps(frame, separators=(',', ':')) + '\n')
+        print(f"{len(frames)} frames written to {args.record}")
+        return
+
+    work_dir = tempfile.mkdtemp(prefix='candle-builder-')
+    try:
+        success = run_replay(args.file, work_dir)
+        success = run_handler_check(work_dir) and success
+        success = run_backfill_check(work_dir) and success
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""ContractRegistry failure caching test (offline)
+
+Checks:
+- with no disk cache and a failing exchange, concurrent lookups fetch the
+  contract list once and return None until failure_ttl has passed
+- after failure_ttl the list is fetched again and the specs are served
+
+    python contract_registry_test.py --lookups 200 --failure-ttl 0.3
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from contract_registry import ContractRegistry
+
+CONTRACT = {"symbol": "BTCUSDT_UMCBL", "pricePlace": "1", "priceEndStep": "1", "volumePlace": "3",
+            "sizeMultiplier": "0.001", "minTradeNum": "0.001"}
+
+
+def check(ok, message):
+    print(f"{'✅' if ok else '❌'} {message}")
+    return ok
+
+
+class Exchange:
+    """Contract endpoint that fails until `up` is set, counting its calls"""
+
+    def __init__(self):
+        self.up = False
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def contracts(self):
+        with self._lock:
+            self.calls += 1
+        time.sleep(0.02)
+        if not self.up:
+            raise ConnectionError("exchange unreachable")
+        return {"code": "00000", "data": [CONTRACT]}
+
+
+def run_checks(work_dir, lookups, failure_ttl):
+    exchange = Exchange()
+    registry = ContractRegistry(exchange.contracts, cache_path=os.path.join(work_dir, 'contracts.json'),
+                                failure_ttl=failure_ttl)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        specs = list(pool.map(registry.get, ['BTCUSDT_UMCBL'] * lookups))
+    results = [check(exchange.calls == 1 and all(spec is None for spec in specs),
+                     f"{lookups} lookups during an outage fetched the contract list {exchange.calls} time(s)")]
+
+    time.sleep(failure_ttl)
+    exchange.up = True
+    spec = registry.get('BTCUSDT_UMCBL')
+    results.append(check(exchange.calls == 2 and spec is not None and str(spec.tick_size) == '0.1',
+                         f"retried after failure_ttl: tick size {spec.tick_size if spec else None}"))
+    return all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ContractRegistry failure caching test')
+    parser.add_argument('--lookups', type=int, default=200, help='Concurrent lookups during the outage')
+    parser.add_argument('--failure-ttl', type=float, default=0.3, help='Seconds a failed load is not retried')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+
+    work_dir = tempfile.mkdtemp(prefix='contract-registry-')
+    try:
+        success = run_checks(work_dir, args.lookups, args.failure_ttl)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
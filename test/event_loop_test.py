@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""BackgroundLoop test and asyncio.run() comparison (offline)
+
+Checks:
+- coroutines submitted from many threads run on the one loop thread
+- submit() costs less per call than asyncio.run() with a fresh loop
+- one aiohttp session is shared by every submitted coroutine
+- run() from the loop thread raises instead of deadlocking
+- stop() runs the shutdown hooks, cancels pending tasks and ends the thread
+
+    python event_loop_test.py --calls 2000 --threads 8
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from bitget.async_client import get_async_session
+from event_loop import BackgroundLoop
+
+
+def check(ok, message):
+    print(f"{'✅' if ok else '❌'} {message}")
+    return ok
+
+
+async def tiny():
+    await asyncio.sleep(0)
+    return threading.current_thread().name
+
+
+def time_asyncio_run(calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        asyncio.run(tiny())
+    return (time.perf_counter() - started) / calls
+
+
+def time_submit(loop, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        loop.submit(tiny()).result()
+    return (time.perf_counter() - started) / calls
+
+
+def run_checks(calls, threads):
+    results = []
+    loop = BackgroundLoop(name="test-loop").start()
+
+    names = []
+    names_lock = threading.Lock()
+
+    def worker():
+        futures = [loop.submit(tiny()) for _ in range(calls // threads)]
+        with names_lock:
+            names.extend(future.result(5) for future in futures)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    results.append(check(len(names) == calls // threads * threads and set(names) == {"test-loop"},
+                         f"{len(names)} coroutines from {threads} threads ran on the loop thread"))
+
+    fresh = time_asyncio_run(calls)
+    shared = time_submit(loop, calls)
+    results.append(check(shared < fresh, f"submit() {shared * 1e6:.0f} µs/call vs "
+                                         f"asyncio.run() {fresh * 1e6:.0f} µs/call ({fresh / shared:.1f}x)"))
+
+    sessions = {id(loop.run(get_async_session(), timeout=5)) for _ in range(10)}
+    results.append(check(len(sessions) == 1, "one aiohttp session shared by the submitted coroutines"))
+
+    async def nested():
+        try:
+            loop.run(tiny(), timeout=1)
+        except RuntimeError:
+            return True
+        return False
+
+    results.append(check(loop.run(nested(), timeout=5), "run() from the loop thread raises RuntimeError"))
+
+    hooks = []
+
+    async def async_hook():
+        await asyncio.sleep(0.01)
+        hooks.append('async')
+
+    loop.add_shutdown_hook(lambda: hooks.append('sync'))
+    loop.add_shutdown_hook(async_hook)
+    forever = loop.submit(asyncio.sleep(3600))
+    loop.stop(timeout=5)
+    results.append(check(hooks == ['async', 'sync'] and forever.cancelled() and not loop._thread.is_alive(),
+                         f"stop() ran hooks {hooks}, cancelled the pending task and ended the thread"))
+    try:
+        loop.submit(tiny())
+        results.append(check(False, "submit() after stop() raises"))
+    except RuntimeError:
+        results.append(check(True, "submit() after stop() raises RuntimeError"))
+    print(f"metrics: {loop.metrics()}")
+    return all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='BackgroundLoop offline test')
+    parser.add_argument('--calls', type=int, default=2000, help='Coroutines submitted in total')
+    parser.add_argument('--threads', type=int, default=8, help='Threads submitting at once')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+    sys.exit(0 if run_checks(args.calls, args.threads) else 1)
+
+
+if __name__ == "__main__":
+    main()
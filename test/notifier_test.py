@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""TelegramNotifier test with a fake sender (offline)
+
+The fake sender records every send instead of calling Telegram. Checks:
+
+- notify() returns without waiting on the send
+- a burst is coalesced into digest messages and nothing is lost
+- sends to one chat are at least the chat interval apart
+- a RetryAfter error pauses the worker for the requested time and the message is resent
+- group chat IDs starting with 100 are sent as negative IDs
+- stop() sends what is still queued
+
+    python notifier_test.py --burst 50 --interval 0.2
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+import notifier
+from notifier import TelegramNotifier
+
+
+class FakeRetryAfter(Exception):
+    """Stands in for telegram.error.RetryAfter"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Flood control exceeded. Retry in {retry_after} seconds")
+        self.retry_after = retry_after
+
+
+class FakeSender:
+    def __init__(self, delay=0.05, fail_first=None):
+        self.delay = delay
+        self.fail_first = fail_first
+        self.sent = []
+
+    async def __call__(self, token, chat_id, text):
+        await asyncio.sleep(self.delay)
+        if self.fail_first is not None:
+            error, self.fail_first = self.fail_first, None
+            raise error
+        self.sent.append((time.monotonic(), chat_id, text))
+
+
+def check(ok, message):
+    print(f"{'✅' if ok else '❌'} {message}")
+    return ok
+
+
+def wait_until(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def delivered(sender):
+    """Number of notifications in the sent messages (a digest counts its items)"""
+    total = 0
+    for _, _, text in sender.sent:
+        if text.startswith("📋 "):
+            total += int(text.split()[1])
+        else:
+            total += 1
+    return total
+
+
+def run_burst(burst, interval):
+    sender = FakeSender()
+    telegram = TelegramNotifier(lambda: ('stub-token', '12345'), sender=sender).start()
+
+    started = time.perf_counter()
+    slowest = 0.0
+    for i in range(burst):
+        t0 = time.perf_counter()
+        telegram.notify(f"✅ Order {i} placed")
+        slowest = max(slowest, time.perf_counter() - t0)
+    enqueue_ms = (time.perf_counter() - started) * 1000
+
+    results = [check(slowest < 0.005, f"{burst} notify() calls in {enqueue_ms:.2f} ms "
+                                      f"(slowest {slowest * 1e6:.0f} µs)")]
+    wait_until(lambda: delivered(sender) == burst)
+    metrics = telegram.metrics()
+    max_sends = 1 + -(-(burst - 1) // telegram.max_batch)
+    results.append(check(delivered(sender) == burst and len(sender.sent) <= max_sends,
+                         f"{burst} notifications delivered in {len(sender.sent)} messages "
+                         f"({metrics['digests']} digests)"))
+    gaps = [b[0] - a[0] for a, b in zip(sender.sent, sender.sent[1:])]
+    results.append(check(all(gap >= interval * 0.95 for gap in gaps),
+                         f"sends at least {interval}s apart (shortest {min(gaps, default=0):.3f}s)"))
+    telegram.stop()
+    return all(results)
+
+
+def run_retry_after(retry_after):
+    sender = FakeSender(fail_first=FakeRetryAfter(retry_after))
+    telegram = TelegramNotifier(lambda: ('stub-token', '1001234567'), sender=sender)
+    started = time.monotonic()
+    telegram.notify("⚠️ Stop loss updated")
+    wait_until(lambda: sender.sent)
+    elapsed = time.monotonic() - started
+    metrics = telegram.metrics()
+    results = [check(len(sender.sent) == 1 and elapsed >= retry_after and metrics['retry_after'] == 1
+                     and metrics['errors'] == 0,
+                     f"RetryAfter {retry_after}s honored, message resent after {elapsed:.2f}s"),
+               check(sender.sent and sender.sent[0][1] == '-1001234567',
+                     f"group chat ID sent as {sender.sent[0][1] if sender.sent else None}")]
+    telegram.stop()
+    return all(results)
+
+
+def run_stop_flush():
+    sender = FakeSender(delay=0.1)
+    telegram = TelegramNotifier(lambda: ('stub-token', '12345'), sender=sender)
+    for i in range(5):
+        telegram.notify(f"🔄 Position {i} closed")
+    telegram.stop()
+    return check(delivered(sender) == 5 and telegram.metrics()['pending'] == 0 and not telegram.notify("late"),
+                 f"stop() sent the {delivered(sender)} queued notifications")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TelegramNotifier offline test')
+    parser.add_argument('--burst', type=int, default=50, help='Notifications queued at once')
+    parser.add_argument('--interval', type=float, default=0.2, help='Chat interval used instead of 1s/3s')
+    parser.add_argument('--retry-after', type=float, default=0.5, help='Seconds requested by the fake RetryAfter')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+
+    # Testi hızlandırmak için sohbet aralıklarını kısalt
+    notifier.PRIVATE_CHAT_INTERVAL = args.interval
+    notifier.GROUP_CHAT_INTERVAL = args.interval * 3
+
+    success = run_burst(args.burst, args.interval)
+    success = run_retry_after(args.retry_after) and success
+    success = run_stop_flush() and success
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Order book throughput benchmark over recorded `books` channel frames
+
+Replays a books snapshot followed by its updates into the old
+BooksInfo.innerMerge/check_sum logic (copied below without its prints) and
+into bitget/ws/order_book.OrderBook, verifying the checksum of every update
+the way BitgetWsClient does, and prints updates per second.
+
+Frames are read from a file with one raw WebSocket message per line
+(--file), or generated with a seeded random walk (--updates). --record
+writes the generated frames so they can be replayed later.
+
+    python order_book_benchmark.py --file fixtures/books_btcusdt.jsonl --repeat 20
+    python order_book_benchmark.py --updates 20000 --mid 10 --tick 0.001
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from zlib import crc32
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from bitget.ws.order_book import OrderBook, signed_int
+
+
+class LegacyBooksInfo:
+    """BooksInfo as it was in bitget_ws_client.py (prints removed)"""
+
+    def __init__(self, asks, bids, checksum):
+        self.asks = asks
+        self.bids = bids
+        self.checksum = checksum
+
+    def merge(self, book_info):
+        self.asks = self.innerMerge(self.asks, book_info.asks, False)
+        self.bids = self.innerMerge(self.bids, book_info.bids, True)
+        return self
+
+    def innerMerge(self, all_list, update_list, is_reverse):
+        price_and_value = {}
+        for v in all_list:
+            price_and_value[v[0]] = v
+        for v in update_list:
+            if v[1] == "0":
+                del price_and_value[v[0]]
+                continue
+            price_and_value[v[0]] = v
+        keys = sorted(price_and_value.keys(), reverse=is_reverse)
+        result = []
+        for i in keys:
+            result.append(price_and_value[i])
+        return result
+
+    def check_sum(self, new_check_sum):
+        crc32str = ''
+        for x in range(25):
+            if self.bids[x] is not None:
+                crc32str = crc32str + self.bids[x][0] + ":" + self.bids[x][1] + ":"
+            if self.asks[x] is not None:
+                crc32str = crc32str + self.asks[x][0] + ":" + self.asks[x][1] + ":"
+        crc32str = crc32str[0:len(crc32str) - 1]
+        return signed_int(crc32(bytes(crc32str, encoding="utf8"))) == new_check_sum
+
+
+def reference_checksum(asks, bids):
+    """Checksum of plain {price: size} dicts, sorted numerically from scratch"""
+    top_bids = sorted(bids.items(), key=lambda level: -float(level[0]))[:25]
+    top_asks = sorted(asks.items(), key=lambda level: float(level[0]))[:25]
+    parts = []
+    for i in range(max(len(top_bids), len(top_asks))):
+        if i < len(top_bids):
+            parts.append(f"{top_bids[i][0]}:{top_bids[i][1]}")
+        if i < len(top_asks):
+            parts.append(f"{top_asks[i][0]}:{top_asks[i][1]}")
+    return signed_int(crc32(":".join(parts).encode("utf8")))
+
+
+def generate(updates, mid, tick, depth=200, seed=7):
+    """Snapshot + update frames of a random walk around mid, with valid checksums"""
+    rng = random.Random(seed)
+    decimals = max(0, -int(f"{tick:e}".split('e')[1]))
+    price = lambda ticks: f"{ticks * tick:.{decimals}f}"
+    size = lambda: f"{rng.uniform(0.001, 5):.3f}"
+    mid_ticks = int(round(mid / tick))
+
+    asks = {price(mid_ticks + 1 + i): size() for i in range(depth)}
+    bids = {price(mid_ticks - 1 - i): size() for i in range(depth)}
+    arg = {"instType": "mc", "channel": "books", "instId": "BTCUSDT"}
+    ts = 1697000000000
+
+    def frame(action, ask_levels, bid_levels):
+        return {"action": action, "arg": arg, "data": [{
+            "asks": ask_levels, "bids": bid_levels,
+            "checksum": reference_checksum(asks, bids), "ts": str(ts)}]}
+
+    frames = [frame("snapshot", [[p, s] for p, s in asks.items()], [[p, s] for p, s in bids.items()])]
+    for _ in range(updates):
+        ts += 100
+        # Orta fiyat birkaç tick yürür; seviyeler değişir, silinir veya eklenir
+        mid_ticks += rng.choice((-1, 0, 0, 1))
+        changes = {'asks': [], 'bids': []}
+        for side_name, side, sign in (('asks', asks, 1), ('bids', bids, -1)):
+            for _ in range(rng.randint(1, 6)):
+                level = price(mid_ticks + sign * rng.randint(1, 40))
+                if level in side and rng.random() < 0.3:
+                    del side[level]
+                    changes[side_name].append([level, "0"])
+                else:
+                    side[level] = size()
+                    changes[side_name].append([level, side[level]])
+        # Karşı tarafa geçen seviyeler silinir (kesişen defter olmasın)
+        for level in [p for p in asks if float(p) <= mid_ticks * tick]:
+            del asks[level]
+            changes['asks'].append([level, "0"])
+        for level in [p for p in bids if float(p) >= mid_ticks * tick]:
+            del bids[level]
+            changes['bids'].append([level, "0"])
+        frames.append(frame("update", changes['asks'], changes['bids']))
+    return frames
+
+
+def run_legacy(frames):
+    book, failures = None, 0
+    for frame in frames:
+        data = frame['data'][0]
+        info = LegacyBooksInfo(data['asks'], data['bids'], data['checksum'])
+        if frame['action'] == 'snapshot':
+            book = info
+            continue
+        book = book.merge(info)
+        try:
+            ok = book.check_sum(info.checksum)
+        except IndexError:
+            ok = False
+        failures += not ok
+    return failures
+
+
+def run_order_book(frames):
+    book, failures = OrderBook(), 0
+    for frame in frames:
+        data = frame['data'][0]
+        if frame['action'] == 'snapshot':
+            book.snapshot(data['asks'], data['bids'], data['ts'])
+            continue
+        book.update(data['asks'], data['bids'], data['ts'])
+        failures += not book.verify(data['checksum'])
+    return failures
+
+
+def timed(run, frames, repeat):
+    start = time.perf_counter()
+    failures = 0
+    for _ in range(repeat):
+        failures += run(frames)
+    return time.perf_counter() - start, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Order book update throughput benchmark')
+    parser.add_argument('--file', help='Recorded books frames (one raw message per line)')
+    parser.add_argument('--updates', type=int, default=5000, help='Generated updates if no --file')
+    parser.add_argument('--mid', type=float, default=30000.0, help='Generated mid price')
+    parser.add_argument('--tick', type=float, default=0.1, help='Generated price tick')
+    parser.add_argument('--depth', type=int, default=200, help='Generated snapshot levels per side')
+    parser.add_argument('--repeat', type=int, default=3, help='Replays per implementation')
+    parser.add_argument('--record', help='Write the generated frames to this file and exit')
+
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            frames = [json.loads(line) for line in f if line.strip() and line.strip() != 'pong']
+    else:
+        frames = generate(args.updates, args.mid, args.tick, args.depth)
+
+    if args.record:
+        with open(args.record, 'w', encoding='utf-8') as f:
+            for frame in frames:
+                f.write(json.dumps(frame, separators=(',', ':')) + '\n')
+        print(f"{len(frames)} frames written to {args.record}")
+        return
+
+    updates = sum(1 for frame in frames if frame['action'] == 'update') * args.repeat
+    print(f"{updates} books updates ({len(frames)} frames x {args.repeat})")
+    print("=" * 72)
+    results = {}
+    for name, run in (('BooksInfo', run_legacy), ('OrderBook', run_order_book)):
+        elapsed, failures = timed(run, frames, args.repeat)
+        results[name] = (elapsed, failures)
+        print(f"{name:>10}: {updates / elapsed:12.0f} updates/s  "
+              f"{elapsed / updates * 1e6:8.2f} µs/update  checksum failures {failures}")
+
+    print("-" * 72)
+    print(f"speedup: {results['BooksInfo'][0] / results['OrderBook'][0]:.1f}x")
+    if results['OrderBook'][1] == 0:
+        print("✅ OrderBook checksum matches on every update")
+    else:
+        print(f"❌ OrderBook checksum failed on {results['OrderBook'][1]} updates")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Order path benchmark against the local stub server: cold vs warm
+
+cold: a fresh BitgetHandler per order, so place_order reads balance, price,
+      contracts, leverage and ATR itself before the placeOrder POST.
+warm: the OrderWarmer keeps templates ready; place_order only fills in a
+      clientOid and sends one signed POST.
+
+The stub adds --latency seconds to every request to stand in for the network
+round trip to the exchange.
+
+    python order_path_benchmark.py --iterations 20 --latency 0.02
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from bitget import consts as c
+from bitget_handler import BitgetHandler
+from order_warmer import OrderWarmer
+
+from stub_server import StubBitgetServer
+
+SYMBOL = 'BTCUSDT'
+
+
+def make_handler(server, work_dir):
+    config = {
+        'leverage': 10,
+        'order_size_percentage': 10,
+        'candle_store_dir': os.path.join(work_dir, 'candles'),
+        'contracts_cache_path': os.path.join(work_dir, 'contracts.json'),
+        'warm_symbols': [SYMBOL]
+    }
+    # ATR mumları da Bitget mum ucundan, yani stub sunucudan gelir
+    return BitgetHandler('stub-key', 'stub-secret', 'stub-pass', config)
+
+
+def timed_order(server, handler):
+    server.reset_counts()
+    start = time.perf_counter()
+    result = handler.place_order(SYMBOL, 'open_long')
+    elapsed = (time.perf_counter() - start) * 1000
+    if not result or not result.get('data', {}).get('orderId'):
+        raise RuntimeError(f"Order failed: {result}")
+    return elapsed, sum(server.requests.values())
+
+
+def run_cold(server, iterations):
+    samples, requests = [], []
+    for _ in range(iterations):
+        work_dir = tempfile.mkdtemp(prefix='order-bench-')
+        try:
+            handler = make_handler(server, work_dir)
+            elapsed, count = timed_order(server, handler)
+            handler.close()
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        samples.append(elapsed)
+        requests.append(count)
+    return samples, requests
+
+
+def run_warm(server, iterations):
+    work_dir = tempfile.mkdtemp(prefix='order-bench-')
+    try:
+        handler = make_handler(server, work_dir)
+        warmer = OrderWarmer(handler, interval=0.2, max_age=5.0)
+        handler.order_warmer = warmer.start()
+
+        samples, requests = [], []
+        for _ in range(iterations):
+            # Her emir şablonları geçersiz kılar; bir sonraki ısınmayı bekle
+            deadline = time.time() + 10
+            while warmer.metrics()['templates'] == 0:
+                if time.time() > deadline:
+                    raise RuntimeError("Order warmer did not produce templates")
+                time.sleep(0.01)
+            elapsed, count = timed_order(server, handler)
+            samples.append(elapsed)
+            requests.append(count)
+        warmer.stop()
+        handler.close()
+        return samples, requests
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold vs warm order path benchmark')
+    parser.add_argument('--iterations', type=int, default=20, help='Orders per mode')
+    parser.add_argument('--latency', type=float, default=0.02, help='Stub latency per request (seconds)')
+    parser.add_argument('--verbose', action='store_true', help='Show handler logs')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL)
+
+    server = StubBitgetServer(latency=args.latency).start()
+    c.API_URL = server.url
+    try:
+        results = {
+            'cold': run_cold(server, args.iterations),
+            'warm': run_warm(server, args.iterations)
+        }
+    finally:
+        server.stop()
+
+    print(f"place_order {SYMBOL} open_long, {args.iterations} orders per mode, "
+          f"stub latency {args.latency * 1000:.0f} ms/request")
+    print("=" * 72)
+    for mode in ('cold', 'warm'):
+        samples, requests = results[mode]
+        print(f"{mode:>5}: mean {statistics.mean(samples):8.2f} ms  "
+              f"median {statistics.median(samples):8.2f} ms  "
+              f"max {max(samples):8.2f} ms  "
+              f"requests/order {statistics.mean(requests):.1f}")
+
+    warm_requests = max(results['warm'][1])
+    print("-" * 72)
+    if warm_requests == 1:
+        print("✅ Warm path sends a single request (placeOrder)")
+    else:
+        print(f"❌ Warm path sent up to {warm_requests} requests per order")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""OrderWarmer test against the local stub server
+
+Checks:
+- without warm_symbols or without credentials the warmer is not armed and sends no request
+- warming never calls setLeverage, even when the configured leverage differs from the
+  exchange; the order placed from a warm template sets it once before sending
+- a failed balance read leaves no template and no warm snapshot (no dummy balance)
+- a cold order whose balance read fails (0) or is missing is aborted before placeOrder
+- a symbol whose price cannot be read gets no template
+
+    python order_warmer_test.py
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import shutil
+import sys
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from bitget import consts as c
+
+from stub_server import StubBitgetServer
+
+# Testte oluşturulan handler'lar; istek dinleyicileri sonunda close() ile kaldırılır
+handlers = []
+SET_LEVERAGE = "/api/mix/v1/account/setLeverage"
+PLACE_ORDER = "/api/mix/v1/order/placeOrder"
+BALANCE_PATHS = ("/api/mix/v1/account/account", "/api/mix/v1/account/accounts")
+
+
+def check(ok, message):
+    print(f"{'✅' if ok else '❌'} {message}")
+    return ok
+
+
+def make_handler(work_dir, credentials=('stub-key', 'stub-secret', 'stub-pass'), **config):
+    from bitget_handler import BitgetHandler
+    from order_warmer import OrderWarmer
+
+    handler = BitgetHandler(*credentials, {
+        'leverage': 20,
+        'order_size_percentage': 10,
+        'alert_state_path': os.path.join(work_dir, 'alert_state.json'),
+        'contracts_cache_path': os.path.join(work_dir, 'contracts.json'),
+        'candle_store_dir': os.path.join(work_dir, 'candles'),
+        **config
+    })
+    handler.order_warmer = OrderWarmer(handler, max_age=60)
+    handlers.append(handler)
+    return handler
+
+
+def run_checks(server, work_dir):
+    results = []
+
+    server.reset_counts()
+    unarmed = [make_handler(work_dir).order_warmer,
+               make_handler(work_dir, credentials=('', '', ''), warm_symbols=['BTCUSDT']).order_warmer]
+    refreshed = [warmer.refresh() for warmer in unarmed]
+    results.append(check(not any(warmer.armed() for warmer in unarmed) and not any(refreshed)
+                         and sum(server.requests.values()) == 0,
+                         f"not armed without warm_symbols or credentials ({sum(server.requests.values())} requests)"))
+
+    handler = make_handler(work_dir, warm_symbols=['BTCUSDT', 'ETHUSDT'])
+    warmer = handler.order_warmer
+    server.reset_counts()
+    warmer.refresh()
+    results.append(check(warmer.metrics()['templates'] == 4 and server.requests.get(SET_LEVERAGE, 0) == 0,
+                         f"{warmer.metrics()['templates']} templates built, "
+                         f"{server.requests.get(SET_LEVERAGE, 0)} setLeverage calls while warming"))
+
+    server.reset_counts()
+    result = handler.place_order('BTCUSDT', 'open_long')
+    results.append(check(bool(result and result.get('data', {}).get('orderId'))
+                         and server.requests.get(SET_LEVERAGE, 0) == 1,
+                         f"warm order set the leverage itself ({server.requests.get(SET_LEVERAGE, 0)} setLeverage)"))
+
+    route = server.route
+    server.route = lambda method, path, params, body: (500, {"code": "50000", "msg": "down", "data": None}) \
+        if path in BALANCE_PATHS else route(method, path, params, body)
+    warmer.refresh()
+    results.append(check(warmer.metrics()['templates'] == 0 and warmer.snapshot('BTCUSDT') is None,
+                         "failed balance read leaves no template and no warm snapshot"))
+
+    # Şablon yok: soğuk yol bakiyeyi okuyamaz (0) ve emri göndermemeli
+    server.reset_counts()
+    result = handler.place_order('BTCUSDT', 'open_long')
+    server.route = route
+    try:
+        handler.build_order_params('BTCUSDT_UMCBL', 'open_long', balance=None, price=45000.0)
+        missing_raised = False
+    except ValueError:
+        missing_raised = True
+    results.append(check('balance' in (result or {}).get('error', '') and missing_raised
+                         and server.requests.get(PLACE_ORDER, 0) == 0,
+                         f"cold order without a balance aborted: {(result or {}).get('error')}"))
+
+    # Fiyat önbelleği boş yeni bir handler; ETH fiyatı ne toplu ne tekil uçtan okunabilir
+    price = server.prices.pop('ETHUSDT_UMCBL')
+    warmer = make_handler(work_dir, warm_symbols=['BTCUSDT', 'ETHUSDT']).order_warmer
+    warmer.refresh()
+    server.prices['ETHUSDT_UMCBL'] = price
+    symbols = sorted({symbol for symbol, _ in warmer._templates})
+    results.append(check(symbols == ['BTCUSDT_UMCBL'] and warmer.snapshot('ETHUSDT') is None,
+                         f"symbol without a price gets no template: {symbols}"))
+    return all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OrderWarmer test')
+    parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+
+    server = StubBitgetServer().start()
+    c.API_URL = server.url
+    work_dir = tempfile.mkdtemp(prefix='order-warmer-')
+    # SDK istemcisi her yanıtı stdout'a yazıyor; kontrol çıktısını temiz tutmak için yut
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            success = run_checks(server, work_dir)
+    finally:
+        for handler in handlers:
+            handler.close()
+        server.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    print('\n'.join(line for line in output.getvalue().splitlines() if line[:1] in ('✅', '❌')))
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""PollScheduler and RequestBudget test, with the position monitor against the local stub server
+
+Checks:
+- risk modes: idle without positions, fast near a TP/SL/liquidation level (ATR or
+  price fraction), normal otherwise
+- exponential backoff capped at max_backoff, jitter within bounds, reset on success
+- an exhausted request budget stretches the interval until it refills
+- the monitor charges its requests to 'monitor' and dashboard requests to 'dashboard',
+  polls slowly while flat, fast near a level, and backs off while the exchange fails
+- a closed handler's budget is no longer charged for requests of later handlers
+
+    python poll_scheduler_test.py --seconds 3
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from bitget import consts as c
+from poll_scheduler import BACKOFF, FAST, IDLE, NORMAL, PollScheduler, RequestBudget
+
+from stub_server import StubBitgetServer
+
+
+def check(ok, message):
+    print(f"{'✅' if ok else '❌'} {message}")
+    return ok
+
+
+def position(price, tp=0, sl=0, liq=0, symbol='BTCUSDT_UMCBL'):
+    return {'symbol': symbol, 'holdSide': 'long', 'marginCoin': 'USDT', 'total': '0.01', 'available': '0.01',
+            'averageOpenPrice': str(price), 'marketPrice': str(price), 'unrealizedPL': '0', 'leverage': 10,
+            'presetTakeProfitPrice': str(tp), 'presetStopLossPrice': str(sl), 'liquidationPrice': str(liq)}
+
+
+def run_unit_checks():
+    results = []
+    scheduler = PollScheduler(near_atr=1.0, near_ratio=0.005)
+    atr = {'BTCUSDT_UMCBL': 100.0}.get
+    modes = [
+        scheduler.risk_mode([], atr),
+        scheduler.risk_mode([position(45000, tp=46000, sl=44000)], atr),
+        scheduler.risk_mode([position(45000, tp=46000, sl=44950)], atr),
+        scheduler.risk_mode([position(45000, liq=44920)], atr),
+        scheduler.risk_mode([position(2500, sl=2490, symbol='ETHUSDT_UMCBL')], atr),
+    ]
+    results.append(check(modes == [IDLE, NORMAL, FAST, FAST, FAST],
+                         f"risk modes (flat, far, near SL, near liquidation, no ATR): {modes}"))
+
+    scheduler = PollScheduler(normal_interval=5, max_backoff=120, jitter=0.1)
+    backoff = [scheduler.on_error() for _ in range(8)]
+    expected = [min(120, 5 * 2 ** i) for i in range(8)]
+    within = all(e * 0.9 <= b <= e * 1.1 for b, e in zip(backoff, expected))
+    results.append(check(within and scheduler.metrics()['mode'] == BACKOFF,
+                         f"backoff {[round(b, 1) for b in backoff]}"))
+    after = scheduler.on_success([position(45000, tp=50000)])
+    results.append(check(scheduler.metrics()['errors'] == 0 and 4.5 <= after <= 5.5,
+                         f"success resets the backoff ({after:.2f}s)"))
+
+    samples = [scheduler.on_success([position(45000, tp=50000)]) for _ in range(2000)]
+    results.append(check(min(samples) >= 4.5 and max(samples) <= 5.5 and statistics.pstdev(samples) > 0.1,
+                         f"jitter spread {min(samples):.2f}..{max(samples):.2f}s"))
+
+    budget = RequestBudget(rate=10, burst=20)
+    with budget.charge('dashboard'):
+        budget.spend(40)
+    scheduler = PollScheduler(budget, fast_interval=0.5, jitter=0)
+    interval = scheduler.on_success([position(45000, sl=44990)])
+    results.append(check(1.9 < interval <= 2.1 and scheduler.metrics()['budget_waits'] == 1,
+                         f"fast poll waits {interval:.2f}s for the budget spent by the dashboard"))
+    return all(results)
+
+
+def polls_per_second(server, seconds):
+    server.reset_counts()
+    time.sleep(seconds)
+    return server.requests.get('/api/mix/v1/position/allPosition', 0) / seconds
+
+
+def run_monitor_checks(seconds):
+    from bitget_handler import BitgetHandler
+
+    results = []
+    server = StubBitgetServer().start()
+    c.API_URL = server.url
+    work_dir = tempfile.mkdtemp(prefix='poll-scheduler-')
+    handler = BitgetHandler('stub-key', 'stub-secret', 'stub-pass', {
+        'alert_state_path': os.path.join(work_dir, 'alert_state.json'),
+        'contracts_cache_path': os.path.join(work_dir, 'contracts.json'),
+        'candle_store_dir': os.path.join(work_dir, 'candles'),
+        'monitor_fast_interval': 0.1, 'monitor_interval': 0.5, 'monitor_idle_interval': 1.0,
+        'monitor_max_backoff': 2.0, 'request_budget_rate': 50, 'request_budget_burst': 50
+    })
+    handler.send_telegram_notification = lambda message: None
+    handler.update_dashboard_positions = lambda positions: positions
+    threading.Thread(target=handler.monitor_positions, daemon=True).start()
+    # Başlangıç okuması ve ilk poll hemen yapılır; boşta aralığını onlardan sonra ölç
+    time.sleep(0.3)
+
+    idle = polls_per_second(server, seconds)
+    results.append(check(handler.poll_scheduler.metrics()['mode'] == IDLE and idle <= 1.5,
+                         f"flat: {idle:.1f} polls/s"))
+
+    server.positions = [position(45000, tp=46000, sl=44000)]
+    time.sleep(1.2)
+    normal = polls_per_second(server, seconds)
+    results.append(check(handler.poll_scheduler.metrics()['mode'] == NORMAL and normal <= 2.5,
+                         f"open position far from its levels: {normal:.1f} polls/s"))
+
+    server.positions = [position(45000, tp=46000, sl=44990)]
+    time.sleep(0.6)
+    fast = polls_per_second(server, seconds)
+    results.append(check(handler.poll_scheduler.metrics()['mode'] == FAST and fast >= 5,
+                         f"price near SL: {fast:.1f} polls/s"))
+
+    route = server.route
+    server.route = lambda method, path, params, body: (500, {"code": "50000", "msg": "down", "data": None}) \
+        if path.startswith('/api/mix/v1/position/') else route(method, path, params, body)
+    time.sleep(seconds)
+    metrics = handler.poll_scheduler.metrics()
+    results.append(check(metrics['mode'] == BACKOFF and metrics['errors'] >= 2 and metrics['interval'] >= 0.9,
+                         f"exchange failing: backoff after {metrics['errors']} errors, "
+                         f"interval {metrics['interval']}s"))
+    server.route = route
+
+    with handler.request_budget.charge('dashboard'):
+        handler.get_account_balance('USDT')
+    spent = handler.request_budget.metrics()['spent']
+    results.append(check(spent.get('monitor', 0) > 0 and spent.get('dashboard', 0) >= 1,
+                         f"request spend by source: {spent}"))
+
+    # Kapatılan handler'ın bütçesi sonraki handler'ların isteklerinden etkilenmez
+    handler.close()
+    scheduler = handler.poll_scheduler
+    scheduler.fast_interval = scheduler.normal_interval = scheduler.idle_interval = scheduler.max_backoff = 3600
+    time.sleep(0.2)
+    spent = handler.request_budget.metrics()['spent']
+    other = BitgetHandler('stub-key', 'stub-secret', 'stub-pass', {
+        'alert_state_path': os.path.join(work_dir, 'other_alert_state.json'),
+        'contracts_cache_path': os.path.join(work_dir, 'contracts.json'),
+        'candle_store_dir': os.path.join(work_dir, 'candles')
+    })
+    other.get_account_balance('USDT')
+    other.close()
+    results.append(check(handler.request_budget.metrics()['spent'] == spent,
+                         "closed handler is no longer charged for other handlers' requests"))
+    server.stop()
+    shutil.rmtree(work_dir, ignore_errors=True)
+    return all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PollScheduler test')
+    parser.add_argument('--seconds', type=float, default=3, help='Seconds each monitor phase is measured')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+
+    success = run_unit_checks()
+    # SDK istemcisi her yanıtı stdout'a yazıyor; kontrol çıktısını temiz tutmak için yut
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        monitor_ok = run_monitor_checks(args.seconds)
+    print('\n'.join(line for line in output.getvalue().splitlines() if line[:1] in ('✅', '❌')))
+    sys.exit(0 if success and monitor_ok else 1)
+
+
+if __name__ == "__main__":
+    main()
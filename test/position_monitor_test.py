@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Position monitor TP/SL alerts in streaming mode against the local stub server
+
+Checks:
+- with the position book fed by the stream (no position push after the reconcile),
+  a take profit level crossed by the ticker price fires its alert although the
+  position's marketPrice never reached it
+- for a symbol without a ticker, position pushes fed through the stream drive the
+  alert state: a crossed stop loss fires once, re-arms after the price comes back
+  and fires again on the next crossing
+- the position stream is started once credentials are entered, restarted with the
+  new ones when they change (the old stream is stopped) and kept on other changes
+
+    python position_monitor_test.py --tp 46000 --sl 140
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from bitget import consts as c
+
+from stub_server import StubBitgetServer
+
+SYMBOL = 'BTCUSDT_UMCBL'
+# Stub sunucuda ticker'ı olmayan sembol: fiyat sadece pozisyon push'larından gelir
+PUSH_SYMBOL = 'SOLUSDT_UMCBL'
+
+
+def check(ok, message):
+    print(f"{'✅' if ok else '❌'} {message}")
+    return ok
+
+
+def rest_position(symbol, side, price, tp=0, sl=0, size='0.01'):
+    """allPosition row as Bitget v1 returns it (no positionId)"""
+    return {'marginCoin': 'USDT', 'symbol': symbol, 'holdSide': side, 'openDelegateCount': '0',
+            'margin': '10', 'available': size, 'locked': '0', 'total': size, 'leverage': 10,
+            'achievedProfits': '0', 'averageOpenPrice': str(price), 'marginMode': 'crossed',
+            'holdMode': 'double_hold', 'unrealizedPL': '0', 'liquidationPrice': '0',
+            'keepMarginRate': '0.004', 'marketPrice': str(price), 'cTime': '1697000000000',
+            'presetTakeProfitPrice': str(tp), 'presetStopLossPrice': str(sl)}
+
+
+class StubStream:
+    """PositionStream without a socket: reconciled from REST and live until stopped"""
+
+    def __init__(self, handler):
+        from position_stream import PositionStream
+
+        self._stream = PositionStream(handler)
+        self.book = self._stream.book
+        self.running = True
+
+    def reconcile(self):
+        return self._stream.reconcile()
+
+    def push(self, message):
+        # Private kanal mesajları gerçek akıştaki gibi işlenir
+        self._stream._on_message(message)
+
+    def live(self):
+        return self.running
+
+    def stop(self):
+        self.running = False
+
+
+def ws_push(pos_id, symbol, side, mark_price, total='1'):
+    """positions channel push as Bitget v1 sends it (no TP/SL fields)"""
+    return {'action': 'snapshot', 'arg': {'instType': 'UMCBL', 'channel': 'positions', 'instId': 'default'},
+            'data': [{'posId': pos_id, 'instId': symbol, 'marginCoin': 'USDT', 'marginMode': 'crossed',
+                      'holdSide': side, 'holdMode': 'double_hold', 'total': total, 'available': total,
+                      'locked': '0', 'averageOpenPrice': '150', 'leverage': 10, 'upl': '0',
+                      'liqPx': '0', 'markPrice': str(mark_price), 'uTime': str(int(time.time() * 1000))}]}
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+def start_monitor(server, work_dir, name):
+    from bitget_handler import BitgetHandler
+
+    state_dir = os.path.join(work_dir, name)
+    os.makedirs(state_dir)
+    handler = BitgetHandler('stub-key', 'stub-secret', 'stub-pass', {
+        'alert_state_path': os.path.join(state_dir, 'alert_state.json'),
+        'contracts_cache_path': os.path.join(state_dir, 'contracts.json'),
+        'candle_store_dir': os.path.join(state_dir, 'candles'),
+        'monitor_fast_interval': 0.05, 'monitor_interval': 0.05, 'monitor_idle_interval': 0.05,
+        'price_max_age': 0.05, 'price_retry_after': 0.05
+    })
+    messages = []
+    handler.send_telegram_notification = messages.append
+    stream = StubStream(handler)
+    stream.reconcile()
+    handler.position_stream = stream
+    threading.Thread(target=handler.monitor_positions, daemon=True).start()
+    return handler, stream, messages
+
+
+def stop_monitor(handler):
+    # Monitör thread'i durdurulamıyor; close() akışı kapatır, thread test sonunda sessizce bekler
+    scheduler = handler.poll_scheduler
+    scheduler.fast_interval = scheduler.normal_interval = scheduler.idle_interval = scheduler.max_backoff = 3600
+    handler.close()
+
+
+def run_ticker_trigger_check(server, work_dir, tp):
+    server.positions = [rest_position(SYMBOL, 'long', 45000, tp=tp)]
+    server.prices[SYMBOL] = 45000.0
+    handler, stream, messages = start_monitor(server, work_dir, 'ticker')
+    time.sleep(0.3)
+    quiet = not messages
+
+    # Pozisyon push'ı yok; sadece ticker fiyatı seviyeyi geçiyor
+    server.prices[SYMBOL] = tp + 100.0
+    fired = wait_until(lambda: any('Take Profit Triggered' in message for message in messages))
+    market_price = stream.book.positions()[0].get('marketPrice')
+    stop_monitor(handler)
+    return check(quiet and fired and len(messages) == 1 and market_price == '45000',
+                 f"ticker crossing TP {tp} fired {len(messages)} alert(s) with marketPrice still {market_price}")
+
+
+def run_push_rearm_check(server, work_dir, sl):
+    server.positions = [rest_position(PUSH_SYMBOL, 'long', 150, sl=sl, size='1')]
+    handler, stream, messages = start_monitor(server, work_dir, 'push')
+    alerts = lambda: sum('Stop Loss Triggered' in message for message in messages)
+
+    # SL geçilir, geçiş tarafında kalır, rearm_ratio'dan fazla geri döner ve yeniden geçilir
+    path = [150, sl - 1, sl - 2, sl * 1.01, sl - 1]
+    counts = []
+    for price in path:
+        stream.push(ws_push('2001', PUSH_SYMBOL, 'long', price))
+        wait_until(lambda: handler.last_position_states.get(f"{PUSH_SYMBOL}:long", {}).get('marketPrice')
+                   == str(price))
+        time.sleep(0.2)
+        counts.append(alerts())
+    metrics = handler.alert_state.metrics()
+    stop_monitor(handler)
+    return check(counts == [0, 1, 1, 1, 2] and metrics['rearmed'] == 1,
+                 f"pushes along {path} fired {counts[-1]} SL alerts (after each push: {counts}), "
+                 f"re-armed {metrics['rearmed']} time(s)")
+
+
+class RecordingStream:
+    """PositionStream stand-in recording the credentials it was started with"""
+
+    def __init__(self, handler):
+        self.api_key = handler.api_key
+        self.started = self.stopped = False
+
+    def start(self):
+        self.started = True
+        return self
+
+    def stop(self):
+        self.stopped = True
+
+
+def run_credential_change_checks(work_dir):
+    import bitget_handler
+    from bitget_handler import BitgetHandler
+
+    config = {'alert_state_path': os.path.join(work_dir, 'alert_state.json'),
+              'contracts_cache_path': os.path.join(work_dir, 'contracts.json'),
+              'candle_store_dir': os.path.join(work_dir, 'candles')}
+    credentials = lambda key: {'bitget_api_key': key, 'bitget_secret_key': f"{key}-secret",
+                               'bitget_passphrase': f"{key}-pass"}
+    handler = BitgetHandler('', '', '', config)
+    stream_class = bitget_handler.PositionStream
+    bitget_handler.PositionStream = RecordingStream
+    try:
+        results = [check(handler.start_position_stream() is None, "no position stream without credentials")]
+
+        handler.apply_config({**config, **credentials('key-1')})
+        first = handler.position_stream
+        results.append(check(first is not None and first.started and first.api_key == 'key-1',
+                             "position stream started once credentials were entered"))
+
+        handler.apply_config({**config, **credentials('key-1'), 'monitor_interval': 10})
+        kept = handler.position_stream is first and not first.stopped
+        handler.apply_config({**config, **credentials('key-2')})
+        second = handler.position_stream
+        results.append(check(kept and first.stopped and second is not first and second.started
+                             and second.api_key == 'key-2',
+                             "credential change restarts the stream, other changes keep it"))
+
+        handler.apply_config({**config, **credentials('key-3'), 'position_stream': False})
+        results.append(check(second.stopped and handler.position_stream is None,
+                             "position_stream disabled: old stream stopped, none started"))
+    finally:
+        handler.close()
+        bitget_handler.PositionStream = stream_class
+    return all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Streaming position monitor TP/SL test')
+    parser.add_argument('--tp', type=float, default=46000, help='Take profit level of the BTC long')
+    parser.add_argument('--sl', type=float, default=140, help='Stop loss level of the pushed SOL long')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+
+    server = StubBitgetServer().start()
+    c.API_URL = server.url
+    work_dir = tempfile.mkdtemp(prefix='position-monitor-')
+    # SDK istemcisi her yanıtı stdout'a yazıyor; kontrol çıktısını temiz tutmak için yut
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            success = run_ticker_trigger_check(server, work_dir, args.tp)
+            success = run_push_rearm_check(server, work_dir, args.sl) and success
+            success = run_credential_change_checks(work_dir) and success
+            time.sleep(0.3)
+    finally:
+        server.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    print('\n'.join(line for line in output.getvalue().splitlines() if line[:1] in ('✅', '❌')))
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Open position reads against the local stub server when the exchange misbehaves
+
+Checks:
+- a transient allPosition error does not make the BTC-only singlePosition fallback
+  the preferred endpoint; the next call reads every position from allPosition again
+- with raise_errors=True a fallback-only answer raises instead of returning a partial list
+- a pre-trade snapshot whose position read fails has no positions, so the signal is
+  rejected instead of being checked against an empty or partial list
+- the position monitor prunes alert states of positions closed while the app was down,
+  also when no position is open; while positions cannot be read the states are kept
+
+    python position_reads_test.py
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from bitget import consts as c
+
+from stub_server import StubBitgetServer
+
+ALL_POSITION = "/api/mix/v1/position/allPosition"
+# Testte oluşturulan handler'lar; istek dinleyicileri sonunda close() ile kaldırılır
+handlers = []
+
+
+def check(ok, message):
+    print(f"{'✅' if ok else '❌'} {message}")
+    return ok
+
+
+def rest_position(symbol, side, price, size='0.01'):
+    """allPosition row as Bitget v1 returns it (no positionId)"""
+    return {'marginCoin': 'USDT', 'symbol': symbol, 'holdSide': side, 'openDelegateCount': '0',
+            'margin': '10', 'available': size, 'locked': '0', 'total': size, 'leverage': 10,
+            'achievedProfits': '0', 'averageOpenPrice': str(price), 'marginMode': 'crossed',
+            'holdMode': 'double_hold', 'unrealizedPL': '0', 'liquidationPrice': '0',
+            'keepMarginRate': '0.004', 'marketPrice': str(price), 'cTime': '1697000000000'}
+
+
+class FlakyStub(StubBitgetServer):
+    """Stub whose allPosition fails the next `failures` calls with 429; singlePosition honours its symbol"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.failures = 0
+
+    def route(self, method, path, params, body):
+        if path == ALL_POSITION and self.failures > 0:
+            self.failures -= 1
+            return 429, {"code": "429", "msg": "Too Many Requests", "data": None}
+        if path == "/api/mix/v1/position/singlePosition":
+            return 200, {"code": "00000", "msg": "success",
+                         "data": [p for p in self.positions if p['symbol'] == params.get('symbol')]}
+        return super().route(method, path, params, body)
+
+
+def make_handler(server, work_dir, **config):
+    from bitget_handler import BitgetHandler
+
+    c.API_URL = server.url
+    handler = BitgetHandler('stub-key', 'stub-secret', 'stub-pass', {
+        'alert_state_path': os.path.join(work_dir, 'alert_state.json'),
+        'contracts_cache_path': os.path.join(work_dir, 'contracts.json'),
+        'candle_store_dir': os.path.join(work_dir, 'candles'),
+        **config
+    })
+    handlers.append(handler)
+    return handler
+
+
+def run_fallback_checks(server, handler):
+    results = []
+    server.positions = [rest_position('BTCUSDT_UMCBL', 'long', 45000), rest_position('ETHUSDT_UMCBL', 'short', 2500)]
+
+    server.failures = 1
+    first = sorted(p['symbol'] for p in handler.get_open_positions())
+    later = [sorted(p['symbol'] for p in handler.get_open_positions()) for _ in range(3)]
+    results.append(check(first == ['BTCUSDT_UMCBL'] and all(symbols == ['BTCUSDT_UMCBL', 'ETHUSDT_UMCBL']
+                                                            for symbols in later),
+                         f"after one 429 the fallback answered {first}, later calls read {later[-1]}"))
+
+    server.failures = 1
+    try:
+        handler.get_open_positions(raise_errors=True)
+        results.append(check(False, "raise_errors=True returned a partial list"))
+    except RuntimeError as e:
+        results.append(check(True, f"raise_errors=True raised on a fallback-only answer: {e}"))
+    return all(results)
+
+
+def run_pretrade_checks(server, handler):
+    from pretrade import PreTradeGatherer
+
+    results = []
+    gatherer = PreTradeGatherer(deadline=5.0)
+    server.positions = [rest_position('BTCUSDT_UMCBL', 'long', 45000), rest_position('ETHUSDT_UMCBL', 'short', 2500)]
+
+    snapshot = gatherer.gather(handler, 'ETHUSDT')
+    results.append(check(snapshot.positions is not None and len(snapshot.positions) == 2,
+                         f"pre-trade snapshot read {len(snapshot.positions or [])} positions"))
+
+    # app.process_signal, snapshot.positions None ise sinyali reddeder
+    server.failures = 1
+    snapshot = gatherer.gather(handler, 'ETHUSDT')
+    results.append(check(snapshot.positions is None and 'positions' in snapshot.errors,
+                         f"failed position read rejects the signal: {snapshot.errors.get('positions')}"))
+    return all(results)
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+def run_prune_checks(server, work_dir):
+    """Alert states of positions closed while the app was down are pruned even with no open position"""
+    results = []
+    for name, failures in (('flat', 0), ('failing', 10 ** 6)):
+        state_dir = os.path.join(work_dir, name)
+        os.makedirs(state_dir)
+        with open(os.path.join(state_dir, 'alert_state.json'), 'w') as f:
+            json.dump({'BTCUSDT_UMCBL:long|tp': {'state': 'triggered', 'level': 50000.0, 'side': 'long'}}, f)
+        server.positions = []
+        server.failures = failures
+        handler = make_handler(server, state_dir, monitor_interval=0.1, monitor_idle_interval=0.1,
+                               monitor_max_backoff=0.2)
+        handler.send_telegram_notification = lambda message: None
+        threading.Thread(target=handler.monitor_positions, daemon=True).start()
+
+        if failures:
+            # Pozisyonlar okunamazken durumlar korunur, ilk başarılı okumada temizlenir
+            time.sleep(0.5)
+            kept = handler.alert_state.metrics()['tracked'] == 1
+            server.failures = 0
+            pruned = wait_until(lambda: handler.alert_state.metrics()['tracked'] == 0)
+            results.append(check(kept and pruned, "alert states kept while positions cannot be read, "
+                                                  "pruned on the first successful read"))
+        else:
+            pruned = wait_until(lambda: handler.alert_state.metrics()['tracked'] == 0)
+            results.append(check(pruned, "stale alert state pruned at start with no open position"))
+        # Monitör thread'i durdurulamıyor; test sonunda sessizce beklesin
+        scheduler = handler.poll_scheduler
+        scheduler.normal_interval = scheduler.idle_interval = scheduler.max_backoff = 3600
+    time.sleep(0.5)
+    return all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Open position read robustness test')
+    parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+
+    server = FlakyStub().start()
+    work_dir = tempfile.mkdtemp(prefix='position-reads-')
+    # SDK istemcisi her yanıtı stdout'a yazıyor; kontrol çıktısını temiz tutmak için yut
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            handler = make_handler(server, work_dir)
+            success = run_fallback_checks(server, handler)
+            success = run_pretrade_checks(server, handler) and success
+            success = run_prune_checks(server, work_dir) and success
+    finally:
+        for handler in handlers:
+            handler.close()
+        server.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    print('\n'.join(line for line in output.getvalue().splitlines() if line[:1] in ('✅', '❌')))
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
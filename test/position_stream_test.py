@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""PositionBook replay test on recorded private WebSocket frames
+
+Feeds a recorded positions/orders/account message file into a PositionBook
+and checks the resulting state: field names mapped to the REST names, closed
+positions (total 0) removed, account and order pushes kept. A REST reconcile
+afterwards must replace the book; REST rows (no positionId) and pushes of the
+same position must share one entry, and pushes after a reconcile must keep the
+REST-only TP/SL fields. A failed REST read must keep the book and be retried.
+
+    python position_stream_test.py --file fixtures/ws_positions.jsonl
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from position_stream import PositionBook, PositionStream, replay
+
+
+def check(ok, message):
+    print(f"{'✅' if ok else '❌'} {message}")
+    return ok
+
+
+def run_checks(path):
+    book = PositionBook()
+    applied = replay(path, book)
+    print(f"{applied} private pushes applied from {path}")
+
+    positions = {pos['symbol']: pos for pos in book.positions()}
+    results = [
+        check(sorted(positions) == ['BTCUSDT_UMCBL', 'SOLUSDT_UMCBL'],
+              f"open positions after replay: {sorted(positions)}"),
+        check('ETHUSDT_UMCBL' not in positions, "position closed with total 0 removed"),
+    ]
+
+    btc = positions.get('BTCUSDT_UMCBL', {})
+    results.append(check(
+        btc.get('positionId') == '1001' and btc.get('marketPrice') == '30150' and btc.get('unrealizedPL') == '0.5',
+        f"BTC fields mapped to REST names and updated (marketPrice {btc.get('marketPrice')})"
+    ))
+
+    account = book.account('USDT') or {}
+    results.append(check(account.get('available') == '967.2', f"account available: {account.get('available')}"))
+
+    orders = book.recent_orders()
+    results.append(check([order['ordId'] for order in orders] == ['2001', '2002'], f"{len(orders)} order pushes kept"))
+
+    # Yeniden bağlanınca REST'ten gelen liste defteri tamamen değiştirmeli
+    version = book.version
+    book.reconcile([rest_position('BTCUSDT_UMCBL', 'long', '0.02'), rest_position('XRPUSDT_UMCBL', 'short', '0')])
+    positions = book.positions()
+    results.append(check(
+        len(positions) == 1 and positions[0]['total'] == '0.02' and book.version > version,
+        "REST reconcile replaced the book"
+    ))
+
+    # REST satırında positionId yok; aynı pozisyonun WS push'ı aynı kayda düşmeli
+    book.apply(ws_push('update', '1001', 'BTCUSDT_UMCBL', 'long', '0.03'))
+    positions = book.positions()
+    results.append(check(len(positions) == 1 and positions[0]['total'] == '0.03',
+                         f"WS update of a REST-read position updates it in place ({len(positions)} entries)"))
+    book.apply(ws_push('update', '1001', 'BTCUSDT_UMCBL', 'long', '0'))
+    results.append(check(book.positions() == [], "WS close of a REST-read position leaves no ghost"))
+
+    results.append(check(book.wait_for_change(book.version, timeout=0.05) == book.version,
+                         "wait_for_change returns after its timeout"))
+    return all(results)
+
+
+def rest_position(symbol, side, total, tp=0, sl=0):
+    """allPosition row as Bitget v1 returns it (no positionId)"""
+    return {'marginCoin': 'USDT', 'symbol': symbol, 'holdSide': side, 'openDelegateCount': '0',
+            'margin': '10', 'available': total, 'locked': '0', 'total': total, 'leverage': 10,
+            'achievedProfits': '0', 'averageOpenPrice': '30100', 'marginMode': 'crossed',
+            'holdMode': 'double_hold', 'unrealizedPL': '0', 'liquidationPrice': '27250',
+            'keepMarginRate': '0.004', 'marketPrice': '30120', 'cTime': '1697000000000',
+            'presetTakeProfitPrice': str(tp), 'presetStopLossPrice': str(sl)}
+
+
+def run_tpsl_replay_checks(path):
+    """TP/SL read from REST must survive the pushes replayed after the reconcile"""
+    book = PositionBook()
+    book.reconcile([rest_position('BTCUSDT_UMCBL', 'long', '0.01', tp=31000, sl=29000)])
+    applied = replay(path, book)
+    positions = book.positions()
+    btc = positions[0] if positions else {}
+    return check(
+        applied == 2 and len(positions) == 1 and btc.get('marketPrice') == '31600'
+        and btc.get('presetTakeProfitPrice') == '31000' and btc.get('presetStopLossPrice') == '29000',
+        f"TP/SL kept after {applied} pushes (TP {btc.get('presetTakeProfitPrice')}, "
+        f"SL {btc.get('presetStopLossPrice')}, marketPrice {btc.get('marketPrice')})"
+    )
+
+
+def ws_push(action, pos_id, symbol, side, total):
+    return {'action': action, 'arg': {'instType': 'UMCBL', 'channel': 'positions', 'instId': 'default'},
+            'data': [{'posId': pos_id, 'instId': symbol, 'marginCoin': 'USDT', 'marginMode': 'crossed',
+                      'holdSide': side, 'total': total, 'available': total, 'averageOpenPrice': '30100',
+                      'upl': '0', 'liqPx': '27250', 'markPrice': '30120'}]}
+
+
+class FailingHandler:
+    """Handler whose REST position read fails until `failures` runs out"""
+
+    def __init__(self, positions, failures):
+        self.positions = positions
+        self.failures = failures
+        self.calls = 0
+
+    def get_open_positions(self, raise_errors=False):
+        self.calls += 1
+        if self.failures > 0:
+            self.failures -= 1
+            if raise_errors:
+                raise RuntimeError("allPosition did not answer")
+            return []
+        return list(self.positions)
+
+
+def run_reconcile_failure_checks():
+    book = PositionBook()
+    book.reconcile([rest_position('BTCUSDT_UMCBL', 'long', '0.01')])
+    handler = FailingHandler([rest_position('BTCUSDT_UMCBL', 'long', '0.01'),
+                              rest_position('ETHUSDT_UMCBL', 'short', '0.1')], failures=2)
+    stream = PositionStream(handler, book=book, retry_interval=0.01)
+
+    results = [check(stream.reconcile() is False and len(book.positions()) == 1,
+                     "failed REST read keeps the current book")]
+    # Bağlantı açıkmış gibi davran: başarılı olana kadar tekrar dener
+    stream._live.set()
+    stream._reconcile_until_done()
+    results.append(check(handler.calls == 3 and len(book.positions()) == 2 and stream._reconciled.is_set(),
+                         f"reconcile retried until REST answered ({handler.calls} reads)"))
+    return all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PositionBook replay test')
+    parser.add_argument('--file', default=os.path.join(current_dir, 'fixtures', 'ws_positions.jsonl'),
+                        help='Recorded message file (one raw frame per line)')
+    parser.add_argument('--tpsl-file', default=os.path.join(current_dir, 'fixtures', 'ws_positions_tpsl.jsonl'),
+                        help='Position pushes replayed after a REST reconcile with TP/SL levels')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+    success = run_checks(args.file)
+    success = run_tpsl_replay_checks(args.tpsl_file) and success
+    success = run_reconcile_failure_checks() and success
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
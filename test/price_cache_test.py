@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""PriceCache failure handling test (offline)
+
+Checks:
+- while the exchange is down, concurrent quotes send one bulk tickers request and
+  one single ticker request instead of one per waiting reader
+- with the bulk endpoint down, concurrent quotes of one symbol share one ticker request
+- after retry_after the refresh is retried and prices are served again
+
+    python price_cache_test.py --readers 200 --retry-after 0.3
+"""
+
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from price_cache import PriceCache
+
+SYMBOL = 'BTCUSDT_UMCBL'
+
+
+def check(ok, message):
+    print(f"{'✅' if ok else '❌'} {message}")
+    return ok
+
+
+class Exchange:
+    """Tickers endpoints that fail while down, counting their calls"""
+
+    def __init__(self):
+        self.bulk_up = False
+        self.single_up = False
+        self.calls = {'bulk': 0, 'single': 0}
+        self._lock = threading.Lock()
+
+    def _call(self, kind, up):
+        with self._lock:
+            self.calls[kind] += 1
+        time.sleep(0.02)
+        if not up:
+            raise ConnectionError(f"{kind} tickers unreachable")
+
+    def tickers(self):
+        self._call('bulk', self.bulk_up)
+        return {"code": "00000", "data": [{"symbol": SYMBOL, "last": "45000"}]}
+
+    def ticker(self, symbol):
+        self._call('single', self.single_up)
+        return {"code": "00000", "data": {"symbol": symbol, "last": "45001"}}
+
+
+def quote_all(cache, readers):
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        return list(pool.map(lambda _: cache.quote(SYMBOL)[0], range(readers)))
+
+
+def run_checks(readers, retry_after):
+    results = []
+    exchange = Exchange()
+    cache = PriceCache(exchange.tickers, fetch_ticker=exchange.ticker, max_age=5, retry_after=retry_after)
+
+    prices = quote_all(cache, readers)
+    results.append(check(exchange.calls == {'bulk': 1, 'single': 1} and all(price is None for price in prices),
+                         f"{readers} quotes during an outage: {exchange.calls} requests"))
+
+    time.sleep(retry_after)
+    exchange.single_up = True
+    exchange.calls = {'bulk': 0, 'single': 0}
+    prices = quote_all(cache, readers)
+    results.append(check(exchange.calls == {'bulk': 1, 'single': 1} and set(prices) == {45001.0},
+                         f"bulk down, single up: {exchange.calls} requests, price {prices[0]}"))
+
+    time.sleep(retry_after)
+    exchange.bulk_up = True
+    exchange.calls = {'bulk': 0, 'single': 0}
+    cache.refresh(force=True)
+    prices = quote_all(cache, readers)
+    results.append(check(exchange.calls == {'bulk': 1, 'single': 0} and set(prices) == {45000.0},
+                         f"recovered: {exchange.calls} requests, metrics {cache.metrics()}"))
+    return all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PriceCache failure handling test')
+    parser.add_argument('--readers', type=int, default=200, help='Concurrent quotes per phase')
+    parser.add_argument('--retry-after', type=float, default=0.3, help='Seconds a failed refresh is not retried')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+    sys.exit(0 if run_checks(args.readers, args.retry_after) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Signal-to-order HTTP path benchmark: fresh connections vs shared pooled session
+
+The order path of BitgetHandler issues roughly six sequential requests
+(positions, balance, ticker, setLeverage x2, placeOrder). This tool replays the
+same number of sequential requests against public endpoints, once opening a new
+connection per request (the old ``requests.get`` behaviour) and once through the
+shared keep-alive session in bitget/client.py, and prints the per-path latency.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from bitget import consts as c
+from bitget.client import get_session, close_session
+
+# Public endpoints standing in for the six calls of the signal-to-order path
+PATH_REQUESTS = [
+    ('/api/mix/v1/market/ticker', {'symbol': 'BTCUSDT_UMCBL'}),
+    ('/api/mix/v1/market/depth', {'symbol': 'BTCUSDT_UMCBL', 'limit': '5'}),
+    ('/api/mix/v1/market/ticker', {'symbol': 'BTCUSDT_UMCBL'}),
+    ('/api/mix/v1/market/fills', {'symbol': 'BTCUSDT_UMCBL', 'limit': '1'}),
+    ('/api/mix/v1/market/ticker', {'symbol': 'BTCUSDT_UMCBL'}),
+    ('/api/mix/v1/market/depth', {'symbol': 'BTCUSDT_UMCBL', 'limit': '5'}),
+]
+
+
+def run_path(base_url, get):
+    """Run one signal-to-order path and return its duration in milliseconds"""
+    start = time.perf_counter()
+    for path, params in PATH_REQUESTS:
+        response = get(base_url + path, params=params)
+        response.raise_for_status()
+    return (time.perf_counter() - start) * 1000
+
+
+def cold_get(url, params):
+    # Her istek için yeni bağlantı (eski requests.get davranışı)
+    with requests.Session() as session:
+        return session.get(url, params=params, headers={'Connection': 'close'})
+
+
+def benchmark(base_url, iterations):
+    results = {}
+
+    cold = [run_path(base_url, cold_get) for _ in range(iterations)]
+    results['cold'] = cold
+
+    close_session()
+    session = get_session()
+    # İlk çağrı bağlantıyı ısıtır, ölçüme dahil edilmez
+    run_path(base_url, session.get)
+    pooled = [run_path(base_url, session.get) for _ in range(iterations)]
+    results['pooled'] = pooled
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bitget HTTP connection pool benchmark')
+    parser.add_argument('--url', type=str, default=c.API_URL, help='API base URL (e.g. a local stub server)')
+    parser.add_argument('--iterations', type=int, default=20, help='Number of signal-to-order paths per mode')
+
+    args = parser.parse_args()
+
+    results = benchmark(args.url, args.iterations)
+
+    print(f"Signal-to-order path ({len(PATH_REQUESTS)} sequential requests), {args.iterations} iterations")
+    print("=" * 60)
+    for mode in ('cold', 'pooled'):
+        samples = results[mode]
+        print(f"{mode:>7}: mean {statistics.mean(samples):8.2f} ms  "
+              f"median {statistics.median(samples):8.2f} ms  "
+              f"min {min(samples):8.2f} ms")
+
+    saved = statistics.mean(results['cold']) - statistics.mean(results['pooled'])
+    print("-" * 60)
+    print(f"Handshake savings per path: {saved:.2f} ms "
+          f"({saved / len(PATH_REQUESTS):.2f} ms per request)")
+
+
+if __name__ == "__main__":
+    main()
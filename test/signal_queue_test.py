@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""SignalQueue recovery test on a temporary spool directory (offline)
+
+Checks:
+- recovered .json/.processing signals younger than max_age are executed in arrival order
+- recovered signals older than max_age (and unreadable files) are renamed to .failed
+  and never reach the handler
+- a signal whose executor.submit fails after the claim goes back to .json, so the
+  next start retries it
+
+    python signal_queue_test.py --max-age 300
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from signal_queue import SignalQueue
+from symbol_executor import SymbolExecutor
+
+
+def check(ok, message):
+    print(f"{'✅' if ok else '❌'} {message}")
+    return ok
+
+
+def spool(directory, signal_id, received_at, suffix='.json', symbol='BTCUSDT'):
+    record = {'id': signal_id, 'symbol': symbol, 'direction': 'long', 'action': 'open',
+              'received_at': received_at, 'payload': None}
+    with open(os.path.join(directory, signal_id + suffix), 'w') as f:
+        json.dump(record, f)
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class FailingExecutor:
+    """Executor whose submit raises, as a shut down pool does"""
+
+    max_workers = 1
+
+    def submit(self, symbol, fn, *args, **kwargs):
+        raise RuntimeError("cannot schedule new futures after shutdown")
+
+    def metrics(self):
+        return {}
+
+
+def run_recovery_checks(work_dir, max_age):
+    directory = os.path.join(work_dir, 'recovery')
+    os.makedirs(directory)
+    now = time.time()
+    spool(directory, f"{time.time_ns() - 3}-fresh", now - 5)
+    spool(directory, f"{time.time_ns() - 2}-crashed", now - 10, suffix='.processing')
+    spool(directory, f"{time.time_ns() - 1}-stale", now - max_age - 60, suffix='.processing')
+    spool(directory, f"{time.time_ns()}-old", now - max_age - 3600)
+    with open(os.path.join(directory, f"{time.time_ns()}-broken.json"), 'w') as f:
+        f.write('{"id": ')
+
+    handled = []
+    queue = SignalQueue(directory, lambda record: handled.append(record['id'].split('-')[1]),
+                        SymbolExecutor(max_workers=2), max_age=max_age).start()
+    wait_until(lambda: len(handled) >= 2)
+    time.sleep(0.1)
+    failed = sorted(name.split('-')[1] for name in os.listdir(directory) if name.endswith('.failed'))
+    results = [
+        check(handled == ['fresh', 'crashed'], f"recent signals executed in order: {handled}"),
+        check(failed == ['broken.failed', 'old.failed', 'stale.failed'] and queue.metrics()['expired'] == 2,
+              f"stale and unreadable signals marked failed: {failed}"),
+    ]
+    return all(results)
+
+
+def run_submit_failure_check(work_dir, max_age):
+    directory = os.path.join(work_dir, 'submit')
+    os.makedirs(directory)
+    queue = SignalQueue(directory, lambda record: None, FailingExecutor(), max_age=max_age).start()
+    signal_id = queue.enqueue('BTCUSDT', 'long', 'open')
+    wait_until(lambda: queue.metrics()['failed'] == 1)
+    names = os.listdir(directory)
+    metrics = queue.metrics()
+    return check(names == [signal_id + '.json'] and metrics['in_flight'] == 0,
+                 f"failed submit moved the signal back to pending: {names}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SignalQueue recovery test')
+    parser.add_argument('--max-age', type=float, default=300, help='Seconds a recovered signal stays executable')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+
+    work_dir = tempfile.mkdtemp(prefix='signal-queue-')
+    try:
+        success = run_recovery_checks(work_dir, args.max_age)
+        success = run_submit_failure_check(work_dir, args.max_age) and success
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
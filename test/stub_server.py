@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Local Bitget REST stub server
+
+Answers the mix v1 endpoints used by BitgetHandler (including the candles
+used for ATR, plus the Binance klines endpoint) with canned JSON, checks request signatures when a
+secret key is given and counts requests per path. Test and benchmark scripts
+point ``bitget.consts.API_URL`` at it instead of api.bitget.com.
+
+Standalone usage:
+    python stub_server.py --port 8765 --latency 0.02
+"""
+
+import argparse
+import base64
+import hmac
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+OK = "00000"
+
+
+def _ticker(symbol, price):
+    return {"symbol": symbol, "last": str(price), "bestAsk": str(price + 0.5), "bestBid": str(price - 0.5),
+            "high24h": str(price * 1.02), "low24h": str(price * 0.98), "timestamp": str(int(time.time() * 1000))}
+
+
+def _klines(limit, start_price=45000.0):
+    now = int(time.time() // 900 * 900 * 1000)
+    rows = []
+    price = start_price
+    for i in range(limit):
+        open_time = now - (limit - 1 - i) * 900000
+        high = price + 60 + (i % 7) * 5
+        low = price - 55 - (i % 5) * 4
+        close = price + ((i % 3) - 1) * 20
+        rows.append([open_time, str(price), str(high), str(low), str(close), "12.5",
+                     open_time + 899999, "0", 100, "0", "0", "0"])
+        price = close
+    return rows
+
+
+class StubBitgetServer:
+    """Threaded HTTP server imitating the Bitget REST API
+
+    Args:
+        host (str): Bind address
+        port (int): Bind port, 0 picks a free one
+        secret_key (str, optional): Verify ACCESS-SIGN headers with this secret
+        latency (float): Seconds to sleep before every response
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, secret_key=None, latency=0.0):
+        self.secret_key = secret_key
+        self.latency = latency
+        self.prices = {"BTCUSDT_UMCBL": 45000.0, "ETHUSDT_UMCBL": 2500.0, "BNBUSDT_UMCBL": 600.0}
+        self.positions = []
+        self.requests = Counter()
+        self.orders = []
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def reset_counts(self):
+        with self._lock:
+            self.requests.clear()
+
+    def _check_sign(self, method, path_with_query, body, headers):
+        if not self.secret_key:
+            return True
+        timestamp = headers.get("ACCESS-TIMESTAMP", "")
+        message = str(timestamp) + method.upper() + path_with_query + body
+        mac = hmac.new(bytes(self.secret_key, encoding="utf8"), bytes(message, encoding="utf-8"), digestmod="sha256")
+        expected = str(base64.b64encode(mac.digest()), "utf8")
+        return hmac.compare_digest(expected, headers.get("ACCESS-SIGN", ""))
+
+    def route(self, method, path, params, body):
+        """Return (http_status, payload) for a request"""
+        if path == "/api/spot/v1/public/time":
+            return 200, {"code": OK, "msg": "success", "data": int(time.time() * 1000)}
+        if path == "/api/v3/klines":
+            return 200, _klines(int(params.get("limit", 100)))
+        if path == "/api/mix/v1/market/candles":
+            start = int(params.get("startTime", 0))
+            rows = [row[:6] + [row[5]] for row in _klines(int(params.get("limit", 100))) if row[0] >= start]
+            return 200, [[str(row[0])] + row[1:] for row in rows]
+        if path == "/api/mix/v1/market/ticker":
+            symbol = params.get("symbol", "")
+            if symbol not in self.prices:
+                return 400, {"code": "40034", "msg": "Parameter symbol does not exist", "data": None}
+            return 200, {"code": OK, "msg": "success", "data": _ticker(symbol, self.prices[symbol])}
+        if path == "/api/mix/v1/market/tickers":
+            return 200, {"code": OK, "msg": "success",
+                         "data": [_ticker(symbol, price) for symbol, price in self.prices.items()]}
+        if path == "/api/mix/v1/market/contracts":
+            return 200, {"code": OK, "msg": "success", "data": [
+                {"symbol": "BTCUSDT_UMCBL", "baseCoin": "BTC", "quoteCoin": "USDT", "pricePlace": "1",
+                 "priceEndStep": "1", "volumePlace": "3", "sizeMultiplier": "0.001", "minTradeNum": "0.001"},
+                {"symbol": "ETHUSDT_UMCBL", "baseCoin": "ETH", "quoteCoin": "USDT", "pricePlace": "2",
+                 "priceEndStep": "1", "volumePlace": "2", "sizeMultiplier": "0.01", "minTradeNum": "0.01"},
+                {"symbol": "BNBUSDT_UMCBL", "baseCoin": "BNB", "quoteCoin": "USDT", "pricePlace": "2",
+                 "priceEndStep": "1", "volumePlace": "2", "sizeMultiplier": "0.01", "minTradeNum": "0.01"},
+            ]}
+        if path == "/api/mix/v1/account/account":
+            return 200, {"code": OK, "msg": "success", "data": {
+                "marginCoin": "USDT", "available": "1000", "equity": "1000", "unrealizedPL": "0",
+                "crossMarginLeverage": 10, "fixedLongLeverage": 10, "fixedShortLeverage": 10, "marginMode": "crossed"}}
+        if path == "/api/mix/v1/account/accounts":
+            return 200, {"code": OK, "msg": "success", "data": [
+                {"marginCoin": "USDT", "available": "1000", "equity": "1000", "unrealizedPL": "0",
+                 "crossMarginLeverage": 10, "fixedLongLeverage": 10, "fixedShortLeverage": 10, "marginMode": "crossed"}]}
+        if path in ("/api/mix/v1/position/allPosition", "/api/mix/v1/position/singlePosition"):
+            return 200, {"code": OK, "msg": "success", "data": list(self.positions)}
+        if path == "/api/mix/v1/account/setLeverage" and method == "POST":
+            return 200, {"code": OK, "msg": "success", "data": {
+                "symbol": body.get("symbol"), "marginCoin": "USDT", "longLeverage": body.get("leverage"),
+                "shortLeverage": body.get("leverage"), "marginMode": "crossed"}}
+        if path == "/api/mix/v1/order/placeOrder" and method == "POST":
+            order_id = str(10 ** 18 + len(self.orders))
+            self.orders.append(body)
+            return 200, {"code": OK, "msg": "success",
+                         "data": {"orderId": order_id, "clientOid": body.get("clientOid")}}
+        if path == "/api/mix/v1/order/history":
+            return 200, {"code": OK, "msg": "success", "data": {"orderList": [], "nextFlag": False}}
+        return 404, {"code": "40404", "msg": "Request URL NOT FOUND", "data": None}
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Başlık ve gövde ayrı yazılıyor; Nagle + delayed ACK her yanıta ~40 ms eklemesin
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _serve(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw_body = self.rfile.read(length).decode("utf-8") if length else ""
+                parts = urlsplit(self.path)
+                params = dict(parse_qsl(parts.query))
+                with server._lock:
+                    server.requests[parts.path] += 1
+
+                if server.latency:
+                    time.sleep(server.latency)
+
+                if parts.path.startswith("/api/mix/") and not server._check_sign(method, self.path, raw_body, self.headers):
+                    status, payload = 400, {"code": "40009", "msg": "sign signature error", "data": None}
+                else:
+                    body = json.loads(raw_body) if raw_body else {}
+                    status, payload = server.route(method, parts.path, params, body)
+
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._serve("GET")
+
+            def do_POST(self):
+                self._serve("POST")
+
+            def do_DELETE(self):
+                self._serve("DELETE")
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bitget REST stub server')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Bind address')
+    parser.add_argument('--port', type=int, default=8765, help='Bind port')
+    parser.add_argument('--secret', type=str, default=None, help='Verify signatures with this secret key')
+    parser.add_argument('--latency', type=float, default=0.0, help='Artificial latency per request (seconds)')
+
+    args = parser.parse_args()
+
+    server = StubBitgetServer(args.host, args.port, args.secret, args.latency).start()
+    print(f"🚀 Stub Bitget server listening on {server.url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
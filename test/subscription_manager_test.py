@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""SubscriptionManager test against the local WebSocket server of async_ws_test.py
+
+Checks:
+- channels are sharded over connections with at most --max-channels each
+- subscribe messages are batched (--batch-size channels per message)
+- a 'seq' gap triggers a REST snapshot fill delivered to the listener
+- a snapshot row older than a push delivered while the REST call ran is dropped
+- a dropped connection reconnects, restores only its own channels and fills them
+- a connection is closed with its last channel
+
+    python subscription_manager_test.py --symbols 120 --max-channels 50
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from bitget.async_client import close_async_session
+from bitget.ws.bitget_ws_client import SubscribeReq
+from bitget.ws.subscription_manager import SubscriptionManager
+
+from async_ws_test import LocalWsServer, check, wait_until
+
+
+async def run_checks(symbols, max_channels, batch_size):
+    server = await LocalWsServer().start()
+    results = []
+
+    received = {}
+    fills = []
+    late_push = threading.Event()
+    slow_inst = 'S1USDT'
+
+    def listener(message):
+        received.setdefault(message['arg']['instId'], []).append(message)
+        if message['arg']['instId'] == slow_inst and message['data'][-1].get('seq') == 6:
+            late_push.set()
+
+    def fetch_ticker(inst_id):
+        # REST ticker standing in for the pushes that were missed
+        fills.append(inst_id)
+        if inst_id == slow_inst:
+            # Yanıt, cevap dönmeden önce gelen push'tan (ts 6000) daha eski
+            late_push.wait(5)
+            return {'instId': inst_id, 'last': 'rest', 'seq': None, 'ts': 5500}
+        return {'instId': inst_id, 'last': 'rest', 'seq': None}
+
+    manager = SubscriptionManager(server.url, max_channels=max_channels,
+                                  snapshot_fetchers={'ticker': fetch_ticker},
+                                  batch_size=batch_size, op_interval=0.01, ping_interval=1)
+    channels = [SubscribeReq('mc', 'ticker', f"S{i}USDT") for i in range(symbols)]
+
+    started = time.monotonic()
+    await manager.subscribe(channels, listener)
+    await wait_until(lambda: len(server.subscribed) == symbols)
+    metrics = manager.metrics()
+    expected_connections = -(-symbols // max_channels)
+    results.append(check(metrics['connections'] == expected_connections
+                         and max(metrics['channels_per_connection']) <= max_channels,
+                         f"{symbols} channels on {metrics['connections']} connections "
+                         f"{metrics['channels_per_connection']} in {(time.monotonic() - started) * 1000:.0f} ms"))
+    expected_ops = sum(-(-count // batch_size) for count in metrics['channels_per_connection'])
+    results.append(check(server.subscribe_ops == expected_ops,
+                         f"{server.subscribe_ops} subscribe messages for {symbols} channels"))
+
+    # seq 1, 2, 5: 3 ve 4 kayıp
+    arg = channels[0].to_dict()
+    for seq in (1, 2, 5):
+        await server.push(arg, [{'instId': arg['instId'], 'last': str(seq), 'seq': seq}])
+    await wait_until(lambda: any(m.get('source') == 'rest' for m in received.get(arg['instId'], [])))
+    sources = [m.get('source', 'ws') for m in received.get(arg['instId'], [])]
+    results.append(check(manager.metrics()['gaps'] == 1 and 'rest' in sources,
+                         f"seq gap detected and filled from REST: {sources}"))
+
+    # REST çağrısı sürerken seq 6 (ts 6000) teslim edilir; ts 5500'lük snapshot teslim edilmemeli
+    arg = channels[1].to_dict()
+    for seq in (1, 2, 5, 6):
+        await server.push(arg, [{'instId': arg['instId'], 'last': str(seq), 'seq': seq, 'ts': seq * 1000}])
+    await wait_until(lambda: manager.metrics()['stale_rows'] == 1)
+    sources = [m.get('source', 'ws') for m in received.get(arg['instId'], [])]
+    results.append(check(manager.metrics()['stale_rows'] == 1 and sources == ['ws'] * 4,
+                         f"snapshot older than the last push dropped: {sources}"))
+
+    # İkinci bağlantı koparsa sadece onun kanalları geri yüklenir ve REST'ten doldurulur
+    second = server.socket_of(channels[max_channels].to_dict())
+    second_channels = len(server.socket_args[second])
+    fills.clear()
+    server.subscribed.clear()
+    await server.drop(second)
+    await wait_until(lambda: len(fills) == second_channels and len(server.subscribed) == second_channels)
+    results.append(check(len(server.subscribed) == second_channels and len(fills) == second_channels,
+                         f"reconnected connection restored {len(server.subscribed)} channels "
+                         f"and filled {len(fills)} from REST"))
+
+    last_shard = channels[(expected_connections - 1) * max_channels:]
+    await manager.unsubscribe(last_shard)
+    results.append(check(manager.metrics()['connections'] == expected_connections - 1,
+                         f"connection closed with its last channel ({manager.metrics()['connections']} left)"))
+
+    await manager.close()
+    await close_async_session()
+    await server.stop()
+    return all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SubscriptionManager local server test')
+    parser.add_argument('--symbols', type=int, default=120, help='Ticker channels to subscribe')
+    parser.add_argument('--max-channels', type=int, default=50, help='Channels per connection')
+    parser.add_argument('--batch-size', type=int, default=20, help='Channels per subscribe message')
+
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run_checks(args.symbols, args.max_channels, args.batch_size)) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""TriggerIndex benchmark against the linear TP/SL check (offline)
+
+Opens --positions random long/short positions with TP and SL levels over
+--symbols symbols and replays --ticks random-walk price updates. Each tick
+is checked twice: linearly (AlertState.evaluate on both levels of every
+position of the symbol, as monitor_positions did) and through the
+TriggerIndex. Checks:
+
+- both send exactly the same alerts at the same ticks
+- the index evaluates only the crossed levels and is faster per tick
+- moving a level (update) and closing a position (remove) keep the index consistent
+
+    python trigger_index_test.py --positions 500 --symbols 20 --ticks 20000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from alert_state import AlertState, STOP_LOSS, TAKE_PROFIT
+from trigger_index import TriggerIndex
+
+
+def check(ok, message):
+    print(f"{'✅' if ok else '❌'} {message}")
+    return ok
+
+
+def make_positions(count, symbols, rng):
+    prices = {f"S{i}USDT_UMCBL": rng.uniform(1, 1000) for i in range(symbols)}
+    positions = {}
+    for i in range(count):
+        symbol = rng.choice(list(prices))
+        price, side = prices[symbol], rng.choice(('long', 'short'))
+        up, down = price * rng.uniform(1.001, 1.02), price * rng.uniform(0.98, 0.999)
+        tp, sl = (up, down) if side == 'long' else (down, up)
+        positions[f"P{i}"] = {'symbol': symbol, 'holdSide': side, 'marketPrice': f"{price:.6f}",
+                              'presetTakeProfitPrice': f"{tp:.6f}", 'presetStopLossPrice': f"{sl:.6f}"}
+    return prices, positions
+
+
+def make_ticks(prices, count, rng):
+    prices = dict(prices)
+    symbols = list(prices)
+    ticks = []
+    for _ in range(count):
+        symbol = rng.choice(symbols)
+        prices[symbol] *= 1 + rng.gauss(0, 0.002)
+        ticks.append((symbol, f"{prices[symbol]:.6f}"))
+    return ticks
+
+
+def linear_alerts(positions, ticks):
+    """The monitor's old check: every level of every position of the symbol on every tick"""
+    alerts = AlertState(None)
+    by_symbol = {}
+    for pos_id, pos in positions.items():
+        by_symbol.setdefault(pos['symbol'], []).append((pos_id, pos))
+    fired = []
+    evaluated = 0
+    started = time.perf_counter()
+    for n, (symbol, price) in enumerate(ticks):
+        evaluated += 2 * len(by_symbol.get(symbol, ()))
+        for pos_id, pos in by_symbol.get(symbol, ()):
+            side = pos.get('holdSide', '').lower()
+            if alerts.evaluate(pos_id, TAKE_PROFIT, side, float(pos.get('presetTakeProfitPrice', '0')), float(price)):
+                fired.append((n, pos_id, TAKE_PROFIT))
+            if alerts.evaluate(pos_id, STOP_LOSS, side, float(pos.get('presetStopLossPrice', '0')), float(price)):
+                fired.append((n, pos_id, STOP_LOSS))
+    return fired, time.perf_counter() - started, evaluated
+
+
+def indexed_alerts(positions, ticks):
+    index = TriggerIndex(AlertState(None))
+    for pos_id, pos in positions.items():
+        index.update(pos_id, pos)
+    fired = []
+    started = time.perf_counter()
+    for n, (symbol, price) in enumerate(ticks):
+        fired.extend((n, pos_id, kind) for pos_id, kind, _ in index.on_price(symbol, price))
+    return fired, time.perf_counter() - started, index
+
+
+def run_checks(count, symbols, tick_count, seed):
+    rng = random.Random(seed)
+    prices, positions = make_positions(count, symbols, rng)
+    ticks = make_ticks(prices, tick_count, rng)
+
+    linear, linear_time, linear_evaluated = linear_alerts(positions, ticks)
+    indexed, indexed_time, index = indexed_alerts(positions, ticks)
+    # Aynı tick içindeki sıra farklı olabilir
+    results = [check(sorted(linear) == sorted(indexed) and linear,
+                     f"{len(indexed)} alerts, identical to the linear check")]
+    evaluated = index.metrics()['evaluated']
+    results.append(check(indexed_time < linear_time,
+                         f"{tick_count} ticks: linear {linear_time / tick_count * 1e6:.1f} µs/tick, "
+                         f"index {indexed_time / tick_count * 1e6:.1f} µs/tick "
+                         f"({linear_time / indexed_time:.1f}x, {evaluated} levels evaluated "
+                         f"vs {linear_evaluated})"))
+
+    # Seviye taşıma ve kapanış: eski seviye artık tetiklenmemeli
+    pos_id, pos = next(iter(positions.items()))
+    symbol, side = pos['symbol'], pos['holdSide']
+    price = float(ticks[-1][1]) if ticks[-1][0] == symbol else prices[symbol]
+    moved = dict(pos, presetTakeProfitPrice=f"{price * (1.5 if side == 'long' else 0.5):.6f}",
+                 presetStopLossPrice=f"{price * (0.5 if side == 'long' else 1.5):.6f}")
+    levels = index.metrics()['levels']
+    index.update(pos_id, moved)
+    hit = [p for p, _, _ in index.on_price(symbol, price * (1.2 if side == 'long' else 0.8))]
+    index.remove(pos_id)
+    results.append(check(pos_id not in hit and index.metrics()['levels'] == levels - 2,
+                         f"moved levels no longer fire, closed position removed ({index.metrics()})"))
+    return all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TriggerIndex offline benchmark')
+    parser.add_argument('--positions', type=int, default=500, help='Open positions')
+    parser.add_argument('--symbols', type=int, default=20, help='Symbols the positions are spread over')
+    parser.add_argument('--ticks', type=int, default=20000, help='Price updates replayed')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed')
+
+    args = parser.parse_args()
+    sys.exit(0 if run_checks(args.positions, args.symbols, args.ticks, args.seed) else 1)
+
+
+if __name__ == "__main__":
+    main()
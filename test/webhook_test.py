@@ -50,7 +50,7 @@ def send_webhook(url, signal_type, symbol="BTCUSDT", direction="long", action="o
         print(f"RESPONSE: {json.dumps(response.json(), indent=2)}")
         print(f"\nSENT DATA: {json.dumps(data, indent=2)}")
         
-        if response.status_code == 200:
+        if response.status_code in (200, 202):
             print(f"✅ Başarılı! Webhook sinyali gönderildi: {symbol}/{direction}/{action}")
             return True
         else:
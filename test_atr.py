@@ -1,41 +1,39 @@
+import argparse
 import requests
 import pandas as pd
 
+from atr_engine import true_range
+from candle_store import CandleStore, fetch_binance_klines
+
+# Candles come from the local store (data/candles); only newer ones are downloaded
+store = CandleStore('data/candles', fetcher=fetch_binance_klines)
+
 def get_binance_ohlcv(symbol='BTCUSDT', interval='15m', limit=100):
-    url = 'https://api.binance.com/api/v3/klines'
-    params = {
-        'symbol': symbol,
-        'interval': interval,
-        'limit': limit
-    }
-    response = requests.get(url, params=params)
-    data = response.json()
+    store.sync(symbol, interval)
+    candles = store.tail(symbol, interval, limit)
     
-    df = pd.DataFrame(data, columns=[
-        'timestamp', 'open', 'high', 'low', 'close', 'volume',
-        'close_time', 'quote_asset_volume', 'number_of_trades',
-        'taker_buy_base_vol', 'taker_buy_quote_vol', 'ignore'
-    ])
-    df = df[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
-    df[['open', 'high', 'low', 'close', 'volume']] = df[['open', 'high', 'low', 'close', 'volume']].astype(float)
+    df = pd.DataFrame({
+        'timestamp': candles['open_time'],
+        'open': candles['open'],
+        'high': candles['high'],
+        'low': candles['low'],
+        'close': candles['close'],
+        'volume': candles['volume']
+    })
     df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
     return df
 
 def calculate_atr(df, period=14):
     df['previous_close'] = df['close'].shift(1)
-    df['tr'] = df[['high', 'low', 'previous_close']].apply(
-        lambda x: max(
-            x['high'] - x['low'],
-            abs(x['high'] - x['previous_close']),
-            abs(x['low'] - x['previous_close'])
-        ), axis=1
-    )
+    df['tr'] = true_range(df['high'], df['low'], df['close'])
     # Wilder's ATR (RMA)
     df['ATR'] = df['tr'].ewm(alpha=1/period, adjust=False).mean()
     return df
 
 def get_current_price(symbol='BTCUSDT'):
-    """Get current market price"""
+    """Get current market price (last stored close when offline)"""
+    if store.fetcher is None:
+        return float(store.tail(symbol, '15m', 1)['close'][-1])
     url = 'https://api.binance.com/api/v3/ticker/price'
     params = {'symbol': symbol}
     response = requests.get(url, params=params)
@@ -97,6 +95,12 @@ def calculate_tp_sl(symbol='BTCUSDT', atr_period=14, atr_tp_multiplier=2.5, atr_
 
 # Test
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='ATR-based TP/SL calculation test')
+    parser.add_argument('--offline', action='store_true', help='Only use candles already stored in data/candles')
+    args = parser.parse_args()
+    if args.offline:
+        store.fetcher = None
+    
     # Test parameters
     symbols = ['BTCUSDT', 'ETHUSDT', 'BNBUSDT']
     position_types = ['long', 'short']
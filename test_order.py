@@ -47,6 +47,9 @@ def main():
         # Test siparişi oluşturmadan hesaplama yap
         current_price = handler.get_symbol_price(symbol)
         logger.info(f"Current {symbol} price: ${current_price}")
+        if current_price <= 0:
+            logger.error(f"No fresh price for {symbol}, cannot calculate order size")
+            return
         
         # BTC lot size hesaplama
         size = order_amount / current_price
@@ -0,0 +1,153 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id TEXT PRIMARY KEY,
+    symbol TEXT NOT NULL,
+    direction TEXT NOT NULL,
+    size TEXT NOT NULL DEFAULT '0',
+    entry_price TEXT NOT NULL DEFAULT '0',
+    exit_price TEXT NOT NULL DEFAULT '0',
+    open_time TEXT NOT NULL DEFAULT '',
+    close_time TEXT NOT NULL DEFAULT '',
+    closed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_trades_open_time ON trades (open_time);
+CREATE INDEX IF NOT EXISTS idx_trades_symbol_direction_closed ON trades (symbol, direction, closed);
+CREATE INDEX IF NOT EXISTS idx_trades_closed_close_time ON trades (closed, close_time);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+COLUMNS = ('id', 'symbol', 'direction', 'size', 'entry_price', 'exit_price', 'open_time', 'close_time', 'closed')
+
+
+class TradeLedger:
+    """Embedded SQLite (WAL) ledger of the trades opened by the bot
+
+    Replaces data/positions.json: every write touches only the changed row and
+    the daily-trade count and close matching are indexed queries, so their cost
+    does not grow with the trade history. Each thread gets its own connection;
+    WAL lets the dashboard read while a signal worker writes.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): SQLite database file
+        """
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row(position):
+        return (
+            str(position.get('id', '')),
+            position.get('symbol', ''),
+            position.get('direction', ''),
+            str(position.get('size', '0')),
+            str(position.get('entry_price', '0')),
+            str(position.get('exit_price', '0')),
+            position.get('open_time', ''),
+            position.get('close_time', ''),
+            1 if position.get('closed', False) else 0
+        )
+
+    @staticmethod
+    def _to_dict(row):
+        position = dict(row)
+        position['closed'] = bool(position['closed'])
+        return position
+
+    def migrate_from_json(self, json_path):
+        """One-shot import of data/positions.json; later calls are no-ops
+
+        Returns:
+            int: Number of imported positions
+        """
+        conn = self._connect()
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+            return 0
+        if not os.path.exists(json_path):
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)",
+                             (datetime.now().isoformat(),))
+            return 0
+
+        with open(json_path, 'r') as f:
+            positions = json.load(f)
+
+        with conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO trades ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                [self._row(pos) for pos in positions if pos.get('id')]
+            )
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)",
+                         (datetime.now().isoformat(),))
+        logger.info(f"Migrated {len(positions)} positions from {json_path} to {self.path}")
+        return len(positions)
+
+    def add_open(self, position):
+        """Insert a newly opened position"""
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO trades ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                self._row(position)
+            )
+
+    def close(self, position_id, close_time, exit_price):
+        """Mark one position as closed"""
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "UPDATE trades SET closed = 1, close_time = ?, exit_price = ? WHERE id = ?",
+                (close_time, str(exit_price), str(position_id))
+            )
+
+    def count_opened_on(self, day):
+        """Number of positions opened on day ('YYYY-MM-DD')"""
+        next_day = (datetime.strptime(day, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+        row = self._connect().execute(
+            "SELECT COUNT(*) FROM trades WHERE open_time >= ? AND open_time < ?",
+            (day, next_day)
+        ).fetchone()
+        return row[0]
+
+    def open_positions(self, symbol, direction):
+        """Open positions for symbol/direction, oldest first"""
+        rows = self._connect().execute(
+            "SELECT * FROM trades WHERE symbol = ? AND direction = ? AND closed = 0 ORDER BY open_time",
+            (symbol, direction)
+        ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def closed_positions(self, limit=None):
+        """Closed positions, most recently closed first"""
+        query = "SELECT * FROM trades WHERE closed = 1 ORDER BY close_time DESC"
+        params = ()
+        if limit:
+            query += " LIMIT ?"
+            params = (int(limit),)
+        return [self._to_dict(row) for row in self._connect().execute(query, params).fetchall()]
@@ -0,0 +1,144 @@
+import logging
+import threading
+from operator import itemgetter
+
+from sortedcontainers import SortedKeyList
+
+from alert_state import TAKE_PROFIT, STOP_LOSS
+
+logger = logging.getLogger(__name__)
+
+
+def _level(value):
+    try:
+        level = float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+    return level if level > 0 else 0.0
+
+
+class TriggerIndex:
+    """TP/SL levels of open positions sorted per symbol, checked by bisecting the price
+
+    Each level sits in one of two sorted lists of its symbol: 'up' levels
+    fire when the price rises to them (long TP, short SL), 'down' levels when
+    it falls to them (long SL, short TP). A price update bisects both lists
+    and only evaluates the levels it crossed, so its cost does not grow with
+    the number of positions. Armed levels are indexed at the level itself;
+    triggered ones at their re-arm price (the level moved back by the
+    AlertState rearm_ratio), in the opposite direction. AlertState stays the
+    source of truth for the states and their persistence.
+    """
+
+    def __init__(self, alert_state):
+        """
+        Args:
+            alert_state (AlertState): Persisted edge-triggered alert states
+        """
+        self.alert_state = alert_state
+        self._lock = threading.Lock()
+        # symbol -> {'up': [...], 'down': [...]} of (price, pos_id, kind) sorted by price
+        self._books = {}
+        # (pos_id, kind) -> (symbol, side, level, direction, entry)
+        self._entries = {}
+        self._positions = {}
+        self._updates = 0
+        self._evaluated = 0
+
+    @staticmethod
+    def _fires_up(kind, side):
+        return (kind == TAKE_PROFIT) == (side == 'long')
+
+    def _book(self, symbol):
+        book = self._books.get(symbol)
+        if book is None:
+            book = self._books[symbol] = {'up': SortedKeyList(key=itemgetter(0)),
+                                         'down': SortedKeyList(key=itemgetter(0))}
+        return book
+
+    def _insert(self, pos_id, kind, symbol, side, level):
+        """Index one level as armed (at the level) or triggered (at its re-arm price)"""
+        fires_up = self._fires_up(kind, side)
+        if self.alert_state.is_triggered(pos_id, kind, side, level):
+            ratio = self.alert_state.rearm_ratio
+            # Tetiklenmiş seviye, fiyat ters yönde re-arm fiyatını geçince değerlendirilir
+            price = level * (1 - ratio) if fires_up else level * (1 + ratio)
+            direction = 'down' if fires_up else 'up'
+        else:
+            price = level
+            direction = 'up' if fires_up else 'down'
+        entry = (price, pos_id, kind)
+        self._book(symbol)[direction].add(entry)
+        self._entries[(pos_id, kind)] = (symbol, side, level, direction, entry)
+
+    def _discard(self, pos_id, kind):
+        indexed = self._entries.pop((pos_id, kind), None)
+        if indexed is not None:
+            symbol, _, _, direction, entry = indexed
+            self._books[symbol][direction].discard(entry)
+
+    def update(self, pos_id, position):
+        """Add, move or keep the TP/SL levels of a position (O(log n) per changed level)
+
+        Args:
+            pos_id (str): Position key (position_stream.position_key)
+            position (dict): Position as returned by the API
+        """
+        symbol = position.get('symbol', '')
+        side = (position.get('holdSide') or '').lower()
+        levels = ((TAKE_PROFIT, _level(position.get('presetTakeProfitPrice'))),
+                  (STOP_LOSS, _level(position.get('presetStopLossPrice'))))
+        with self._lock:
+            self._positions[pos_id] = position
+            for kind, level in levels:
+                indexed = self._entries.get((pos_id, kind))
+                if indexed is not None and indexed[:3] == (symbol, side, level):
+                    continue
+                self._discard(pos_id, kind)
+                if level > 0:
+                    self._insert(pos_id, kind, symbol, side, level)
+                    self._updates += 1
+
+    def remove(self, pos_id):
+        """Drop the levels of a closed position"""
+        with self._lock:
+            self._positions.pop(pos_id, None)
+            self._discard(pos_id, TAKE_PROFIT)
+            self._discard(pos_id, STOP_LOSS)
+
+    def on_price(self, symbol, price):
+        """Evaluate the levels of symbol crossed by price
+
+        Returns:
+            list: (pos_id, kind, position) of every alert to send
+        """
+        price = _level(price)
+        if price <= 0:
+            return []
+        with self._lock:
+            book = self._books.get(symbol)
+            if book is None:
+                return []
+            up, down = book['up'], book['down']
+            # up: seviye <= fiyat, down: seviye >= fiyat
+            crossed = list(up.irange_key(max_key=price)) + list(down.irange_key(min_key=price))
+            self._evaluated += len(crossed)
+
+            fired = []
+            for _, pos_id, kind in crossed:
+                _, side, level, _, _ = self._entries[(pos_id, kind)]
+                if self.alert_state.evaluate(pos_id, kind, side, level, price):
+                    fired.append((pos_id, kind, self._positions.get(pos_id)))
+                # Durum değiştiyse seviyeyi yeni listesine taşı
+                self._discard(pos_id, kind)
+                self._insert(pos_id, kind, symbol, side, level)
+            return fired
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'symbols': len(self._books),
+                'levels': len(self._entries),
+                'updates': self._updates,
+                'evaluated': self._evaluated
+            }